@@ -1,8 +1,27 @@
+import os
+
 import dash
 from dash import html, dcc
 
+import config
+from utils import cache_compartida, carga_diferida, compresion, memoria, perfilado, precalentamiento, telemetria, trabajos
+
+# Con carga diferida, los layouts de las páginas se evalúan recién al navegar.
+# Dash, para validar los callbacks, llamaría a todos en la primera petición,
+# así que en ese modo la validación se desactiva (CARGA_DIFERIDA=0 la restaura).
+CARGA_DIFERIDA = os.environ.get("CARGA_DIFERIDA", "1") != "0"
+
 # Crear app con soporte para pages
-app = dash.Dash(__name__, use_pages=True)
+app = dash.Dash(
+    __name__,
+    use_pages=True,
+    suppress_callback_exceptions=CARGA_DIFERIDA,
+    # Callbacks con background=True: se ejecutan en procesos aparte (utils.trabajos)
+    background_callback_manager=trabajos.ADMINISTRADOR
+)
+
+# Aplicación WSGI para gunicorn/waitress: gunicorn app:server -c gunicorn.conf.py
+server = app.server
 
 # Orden deseado de las páginas (🔥 se añade clima-global)
 orden_paginas = ['/', '/pagina1', '/pagina2', '/clima-global']
@@ -36,5 +55,39 @@ app.layout = html.Div([
     dash.page_container
 ], className='app-container')
 
+# Estado de las tareas de precarga
+precalentamiento.registrar_ruta_estado(app.server)
+
+# Estadísticas de las cachés compartidas en /admin/cache (con ADMIN_TOKEN)
+cache_compartida.registrar_ruta_estadisticas(app.server)
+
+# Métricas por callback en /metrics (TELEMETRIA=0 las desactiva)
+telemetria.instrumentar(app)
+
+# Perfilado a pedido (PERFILAR, o rutas /admin/perfiles con ADMIN_TOKEN)
+perfilado.instrumentar(app)
+
+# Diagnóstico de memoria con tracemalloc (MEMORIA_DIAGNOSTICO=1, o /admin/memoria/activar)
+memoria.instrumentar(app)
+
+# Respuestas comprimidas con gzip/brotli según Accept-Encoding (COMPRESION=0 la desactiva)
+compresion.instrumentar(app.server)
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    if config.DEBUG:
+        # Con el recargador de debug, solo el proceso hijo atiende peticiones
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            precalentamiento.iniciar()
+            carga_diferida.precargar_en_segundo_plano()
+        app.run(debug=True, host=config.HOST, port=config.PUERTO)
+    else:
+        # Producción sin gunicorn (p. ej. en Windows): waitress, un proceso con varios hilos
+        try:
+            from waitress import serve
+        except ImportError:
+            raise SystemExit("❌ Falta waitress (pip install waitress) o usa: gunicorn app:server -c gunicorn.conf.py")
+        # Precarga síncrona: un import de pandas a medio terminar en otro hilo rompe
+        # a plotly, que consulta sys.modules['pandas'] al construir cada traza
+        carga_diferida.precargar()
+        precalentamiento.iniciar()
+        serve(server, host=config.HOST, port=config.PUERTO, threads=config.WORKERS * config.HILOS)
@@ -0,0 +1,412 @@
+"""
+Prueba de carga con usuarios simultáneos contra /_dash-update-component.
+
+Cada usuario virtual repite sesiones como las de un navegador: abre una
+página (callback de navegación de Dash Pages), dispara los callbacks
+iniciales (los que no tienen prevent_initial_call) con los valores del layout
+recibido, y luego ejecuta las acciones del escenario de esa página (editar un
+parámetro, presionar un botón), esperando un tiempo de "pensar" entre pasos.
+Los callbacks con background=True se consultan cada 'interval' hasta tener
+el resultado, igual que el navegador; su latencia es la del resultado final.
+
+Sin --url el script levanta todo en local: el servidor simulado de APIs
+(utils.servidor_simulado) con las respuestas sintéticas de
+benchmarks.fixtures, y la app en perfil prod (waitress o gunicorn) apuntando
+a él con HTTP_REDIRIGIR. Al final informa p50/p95/p99 y rendimiento por
+callback.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.carga --usuarios 50 --duracion 60 --pensar 2
+    python -m benchmarks.carga --servidor gunicorn --workers 4 --hilos 2 --usuarios 200
+    python -m benchmarks.carga --url http://127.0.0.1:8050 --paginas /modelo-sir /covid
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(DIRECTORIO)
+
+# Acciones por página: ('valor', id, nuevo valor) edita un input; ('clic', id) presiona un botón
+ESCENARIOS = {
+    "/pagina3": [("clic", "btn-generar"), ("valor", "input-r", 0.5), ("clic", "btn-generar")],
+    "/pagina4": [("clic", "btn-generar")],
+    "/campo-vectorial": [("valor", "mallado", 30), ("clic", "btn-primary-action")],
+    "/modelo-sir": [("valor", "sir-beta", 0.4), ("clic", "btn-simular-sir")],
+    "/modelo-seir": [("valor", "seir-sigma", 0.3), ("clic", "btn-simular-seir")],
+    "/Proyecto2.1": [("valor", "sirB", 0.005), ("valor", "sirTmax", 30)],
+    "/proyecto-sir": [("valor", "sir-beta", 0.003)],
+    "/Proyecto2.3": [("clic", "btn-generar"), ("valor", "input-beta-sir", 0.2),
+                     ("clic", "btn-generar"), ("clic", "btn-calibrar-sir")],
+    "/covid": [("valor", "dropdown-panel-covid", "rt"), ("valor", "dropdown-pais", "Spain"),
+               ("clic", "btn-actualizar-covid"), ("valor", "dropdown-comparar-paises", ["Peru", "Chile", "Spain"])],
+    "/malaria-ajuste": [("clic", "btn-ajuste"), ("valor", "selector-pais", "IND")],
+    "/clima-global": [("valor", "ciudad-input", "Lima"), ("clic", "btn-buscar")],
+}
+
+NAVEGACION = "_pages_content"
+
+
+# ==========================================
+# CALLBACKS DE LA APP
+# ==========================================
+
+def _partir_salidas(texto):
+    # '..a.figure...b.children..' -> [('a', 'figure'), ('b', 'children')]; 'a.figure' -> [('a', 'figure')]
+    multiple = texto.startswith("..")
+    partes = texto[2:-2].split("...") if multiple else [texto]
+    return [tuple(p.split(".", 1)) for p in partes], multiple
+
+
+class Callback:
+    def __init__(self, dependencia):
+        self.salidas, self.multiple = _partir_salidas(dependencia["output"])
+        self.output = dependencia["output"]
+        self.entradas = [(e["id"], e["property"]) for e in dependencia["inputs"]]
+        self.estados = [(e["id"], e["property"]) for e in dependencia["state"]]
+        self.inicial = not dependencia.get("prevent_initial_call")
+        fondo = dependencia.get("background")
+        self.intervalo = fondo["interval"] / 1000 if fondo else None
+        # Nombre para el informe: la primera salida sin el sufijo de allow_duplicate
+        self.nombre = "{}.{}".format(self.salidas[0][0], self.salidas[0][1].split("@")[0])
+
+    def ids(self):
+        return {i for i, _ in self.salidas + self.entradas + self.estados}
+
+    def cuerpo(self, valores, disparados):
+        def lista(pares):
+            return [{"id": i, "property": p, "value": valores.get((i, p))} for i, p in pares]
+
+        salidas = [{"id": i, "property": p} for i, p in self.salidas]
+        return {
+            "output": self.output,
+            "outputs": salidas if self.multiple else salidas[0],
+            "inputs": lista(self.entradas),
+            "state": lista(self.estados),
+            "changedPropIds": [f"{i}.{p}" for i, p in disparados],
+        }
+
+
+def cargar_callbacks(url):
+    dependencias = requests.get(f"{url}/_dash-dependencies", timeout=30).json()
+    # Los clientside corren en el navegador y no llegan al servidor
+    return [Callback(d) for d in dependencias if not d.get("clientside_function")]
+
+
+def _recorrer_layout(nodo, valores):
+    # Guarda (id, propiedad) -> valor de cada componente con id del árbol
+    if isinstance(nodo, list):
+        for hijo in nodo:
+            _recorrer_layout(hijo, valores)
+        return
+    if not isinstance(nodo, dict) or "props" not in nodo:
+        return
+    props = nodo["props"]
+    if isinstance(props.get("id"), str):
+        for propiedad, valor in props.items():
+            if propiedad != "children" or not isinstance(valor, (dict, list)):
+                valores[(props["id"], propiedad)] = valor
+    for valor in props.values():
+        if isinstance(valor, (dict, list)):
+            _recorrer_layout(valor, valores)
+
+
+# ==========================================
+# USUARIO VIRTUAL
+# ==========================================
+
+class Registro:
+    """
+    Latencias y errores por callback, compartidos por todos los usuarios
+    """
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.tipos_error = defaultdict(int)     # (callback, 'HTTP 500' / excepción) -> cantidad
+        self.sesiones = 0
+        self._lock = threading.Lock()
+
+    def anotar(self, nombre, segundos, error=None):
+        with self._lock:
+            if error:
+                self.errores[nombre] += 1
+                self.tipos_error[(nombre, error)] += 1
+            else:
+                self.latencias[nombre].append(segundos)
+
+    def sesion_completa(self):
+        with self._lock:
+            self.sesiones += 1
+
+
+class Usuario:
+    def __init__(self, url, callbacks, registro, pensar, paginas, semilla):
+        self.url = url
+        self.callbacks = callbacks
+        self.navegacion = next(c for c in callbacks if c.salidas[0][0] == NAVEGACION)
+        self.registro = registro
+        self.pensar = pensar
+        self.paginas = paginas
+        self.aleatorio = random.Random(semilla)
+        self.sesion = requests.Session()
+
+    def _esperar(self, fin):
+        if self.pensar > 0:
+            time.sleep(min(self.aleatorio.uniform(0.5, 1.5) * self.pensar, max(fin - time.time(), 0)))
+
+    def _ejecutar(self, callback, valores, disparados):
+        """
+        POST del callback (y consultas si es de fondo); actualiza 'valores' con la respuesta
+        """
+        cuerpo = callback.cuerpo(valores, disparados)
+        inicio = time.perf_counter()
+        try:
+            respuesta = self.sesion.post(f"{self.url}/_dash-update-component", json=cuerpo, timeout=120)
+            while respuesta.status_code == 200 and callback.intervalo:
+                datos = respuesta.json()
+                if "response" in datos or "cacheKey" not in datos:
+                    break
+                time.sleep(callback.intervalo)
+                respuesta = self.sesion.post(
+                    f"{self.url}/_dash-update-component",
+                    params={"cacheKey": datos["cacheKey"], "job": datos["job"]},
+                    json=cuerpo, timeout=120
+                )
+        except requests.RequestException as e:
+            self.registro.anotar(callback.nombre, 0, error=type(e).__name__)
+            return None
+        segundos = time.perf_counter() - inicio
+
+        # 204: PreventUpdate, respuesta válida sin cambios
+        if respuesta.status_code not in (200, 204):
+            self.registro.anotar(callback.nombre, segundos, error=f"HTTP {respuesta.status_code}")
+            return None
+        self.registro.anotar(callback.nombre, segundos)
+        if respuesta.status_code == 204:
+            return {}
+
+        cambios = respuesta.json().get("response", {})
+        for id_componente, props in cambios.items():
+            for propiedad, valor in props.items():
+                valores[(id_componente, propiedad)] = valor
+        return cambios
+
+    def _disparar(self, valores, presentes, disparado):
+        for callback in self.callbacks:
+            if disparado in callback.entradas and callback.ids() <= presentes:
+                self._ejecutar(callback, valores, [disparado])
+
+    def sesion_de_pagina(self, ruta, fin):
+        valores = {("_pages_location", "pathname"): ruta, ("_pages_location", "search"): ""}
+        cambios = self._ejecutar(self.navegacion, valores, [("_pages_location", "pathname")])
+        if not cambios:
+            return
+        _recorrer_layout(cambios.get(NAVEGACION, {}).get("children"), valores)
+        presentes = {i for i, _ in valores}
+
+        # Callbacks iniciales de la página, como al cargarla en el navegador
+        for callback in self.callbacks:
+            if callback.inicial and callback is not self.navegacion and callback.ids() <= presentes:
+                self._ejecutar(callback, valores, [])
+
+        for accion in ESCENARIOS.get(ruta, []):
+            if time.time() >= fin:
+                return
+            self._esperar(fin)
+            if accion[0] == "clic":
+                clave = (accion[1], "n_clicks")
+                valores[clave] = (valores.get(clave) or 0) + 1
+            else:
+                clave = (accion[1], "value")
+                valores[clave] = accion[2]
+            self._disparar(valores, presentes, clave)
+        self.registro.sesion_completa()
+
+    def correr(self, fin):
+        while time.time() < fin:
+            self.sesion_de_pagina(self.aleatorio.choice(self.paginas), fin)
+            self._esperar(fin)
+
+
+# ==========================================
+# ENTORNO LOCAL (APP + APIS SIMULADAS)
+# ==========================================
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def iniciar_entorno(args):
+    """
+    Levanta el servidor simulado (hilo) y la app (subproceso); retorna (url, proceso, servidor)
+    """
+    from benchmarks import fixtures
+    from utils.servidor_simulado import crear_servidor
+
+    grabaciones = fixtures.asegurar()
+    servidor = crear_servidor(_puerto_libre(), grabaciones, args.latencia_api, args.jitter_api)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    temporal = tempfile.mkdtemp(prefix="carga-")
+    puerto = _puerto_libre()
+    entorno = {
+        **os.environ,
+        "APP_PERFIL": "prod",
+        "APP_HOST": "127.0.0.1",
+        "APP_PUERTO": str(puerto),
+        "APP_WORKERS": str(args.workers),
+        "APP_HILOS": str(args.hilos),
+        "HTTP_REDIRIGIR": f"http://127.0.0.1:{servidor.server_address[1]}",
+        "CACHE_RUTA": os.path.join(temporal, "respuestas.sqlite"),
+        "MALARIA_RUTA": os.path.join(temporal, "malaria.sqlite"),
+        "GAZETTEER_RUTA": os.path.join(temporal, "sin-gazetteer.txt"),
+        "TRABAJOS_RUTA": os.path.join(temporal, "trabajos"),
+        "CACHE_COMPARTIDA_RUTA": os.path.join(temporal, "compartida"),
+    }
+    if args.servidor == "gunicorn":
+        comando = [sys.executable, "-m", "gunicorn", "app:server", "-c", "gunicorn.conf.py"]
+    else:
+        comando = [sys.executable, "app.py"]
+    proceso = subprocess.Popen(comando, cwd=RAIZ, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{puerto}"
+    limite = time.time() + args.espera_arranque
+    while time.time() < limite:
+        if proceso.poll() is not None:
+            raise SystemExit(f"❌ La app terminó al arrancar (código {proceso.returncode})")
+        try:
+            if requests.get(f"{url}/_dash-dependencies", timeout=2).status_code == 200:
+                return url, proceso, servidor
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    proceso.terminate()
+    raise SystemExit(f"❌ La app no respondió en {args.espera_arranque} s")
+
+
+# ==========================================
+# INFORME
+# ==========================================
+
+def percentil(ordenados, p):
+    # Rango más cercano sobre una lista ya ordenada
+    if not ordenados:
+        return float("nan")
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumen(registro, segundos):
+    filas = {}
+    for nombre in sorted(set(registro.latencias) | set(registro.errores)):
+        latencias = sorted(registro.latencias[nombre])
+        filas[nombre] = {
+            "peticiones": len(latencias),
+            "errores": registro.errores[nombre],
+            "p50_ms": percentil(latencias, 50) * 1000,
+            "p95_ms": percentil(latencias, 95) * 1000,
+            "p99_ms": percentil(latencias, 99) * 1000,
+            "por_segundo": len(latencias) / segundos,
+        }
+    return filas
+
+
+def imprimir(filas, registro, segundos):
+    print(f"\n{'callback':<44} {'n':>6} {'err':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>7}")
+    for nombre, f in filas.items():
+        print(f"{nombre:<44} {f['peticiones']:>6} {f['errores']:>5} {f['p50_ms']:>7.0f}ms "
+              f"{f['p95_ms']:>7.0f}ms {f['p99_ms']:>7.0f}ms {f['por_segundo']:>7.2f}")
+    total = sum(f["peticiones"] for f in filas.values())
+    errores = sum(f["errores"] for f in filas.values())
+    todas = sorted(x for lista in registro.latencias.values() for x in lista)
+    print(f"\nTotal: {total} peticiones ({total / segundos:.1f}/s), {errores} errores, "
+          f"{registro.sesiones} sesiones completas en {segundos:.0f} s | "
+          f"p50 {percentil(todas, 50) * 1000:.0f} ms, p95 {percentil(todas, 95) * 1000:.0f} ms, "
+          f"p99 {percentil(todas, 99) * 1000:.0f} ms")
+    for (nombre, tipo), cantidad in sorted(registro.tipos_error.items()):
+        print(f"   ❌ {nombre}: {cantidad} x {tipo}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los callbacks de Dash")
+    parser.add_argument("--url", help="app ya levantada; sin esto se levanta una local con APIs simuladas")
+    parser.add_argument("--usuarios", type=int, default=20)
+    parser.add_argument("--duracion", type=float, default=60, help="segundos de carga")
+    parser.add_argument("--rampa", type=float, default=10, help="segundos para ir sumando usuarios")
+    parser.add_argument("--pensar", type=float, default=2.0, help="segundos medios entre acciones")
+    parser.add_argument("--paginas", nargs="*", default=list(ESCENARIOS), help="rutas a recorrer")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", help="guardar el resumen en este archivo JSON")
+    grupo = parser.add_argument_group("app local")
+    grupo.add_argument("--servidor", choices=["waitress", "gunicorn"], default="waitress")
+    grupo.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    grupo.add_argument("--hilos", type=int, default=2)
+    grupo.add_argument("--latencia-api", type=float, default=0.05, help="segundos por respuesta simulada")
+    grupo.add_argument("--jitter-api", type=float, default=0.05)
+    grupo.add_argument("--espera-arranque", type=float, default=90)
+    args = parser.parse_args()
+
+    desconocidas = set(args.paginas) - set(ESCENARIOS)
+    if desconocidas:
+        raise SystemExit(f"❌ Páginas sin escenario: {', '.join(sorted(desconocidas))}")
+
+    proceso = servidor = None
+    url = args.url.rstrip("/") if args.url else None
+    if url is None:
+        url, proceso, servidor = iniciar_entorno(args)
+        print(f"✅ App local en {url} ({args.servidor}, {args.workers} workers x {args.hilos} hilos)")
+
+    try:
+        callbacks = cargar_callbacks(url)
+        registro = Registro()
+        inicio = time.time()
+        fin = inicio + args.rampa + args.duracion
+        hilos = []
+        for i in range(args.usuarios):
+            usuario = Usuario(url, callbacks, registro, args.pensar, args.paginas, args.semilla + i)
+            retraso = args.rampa * i / max(args.usuarios, 1)
+            hilo = threading.Thread(
+                target=lambda u=usuario, r=retraso: (time.sleep(r), u.correr(fin)),
+                daemon=True, name=f"usuario-{i}"
+            )
+            hilo.start()
+            hilos.append(hilo)
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.time() - inicio
+
+        filas = resumen(registro, segundos)
+        imprimir(filas, registro, segundos)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as archivo:
+                json.dump({"parametros": vars(args), "segundos": segundos,
+                           "sesiones": registro.sesiones, "callbacks": filas}, archivo, indent=2)
+    finally:
+        if proceso is not None:
+            # SIGINT: cierre rápido, sin esperar las conexiones keep-alive como con SIGTERM
+            proceso.send_signal(signal.SIGINT)
+            try:
+                proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+        if servidor is not None:
+            servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Respuestas sintéticas de las APIs externas para benchmarks y pruebas de carga.
+
+Genera, en el formato de utils.grabaciones (un JSON por URL canónica), las
+respuestas de disease.sh, Banco Mundial, Nominatim y Open-Meteo que usan las
+páginas. Los datos son deterministas (semilla fija) y tienen el tamaño de los
+reales (≈200 países x 3 años de histórico), así que sirven tanto para
+HTTP_MODO=reproducir como para el servidor simulado (utils.servidor_simulado).
+
+Uso:
+    python -m benchmarks.fixtures [--ruta benchmarks/fixtures]
+"""
+import argparse
+import datetime
+import json
+import os
+
+import numpy as np
+import requests
+
+from utils import grabaciones
+
+RUTA_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Primer día y largo del histórico de disease.sh
+INICIO_HISTORICO = datetime.date(2020, 1, 22)
+DIAS_HISTORICO = 1143
+
+# Países con nombre real (los que piden las páginas) y población aproximada
+PAISES = {
+    "Peru": 33_000_000, "USA": 331_000_000, "US": 331_000_000, "Spain": 47_000_000,
+    "Mexico": 126_000_000, "Argentina": 45_000_000, "Brazil": 213_000_000,
+    "Colombia": 51_000_000, "Chile": 19_000_000, "Italy": 60_000_000, "France": 65_000_000,
+}
+PAISES_SINTETICOS = 190
+OPCIONES_DIAS = [30, 60, 90, "all"]
+
+# Malaria: códigos REF_AREA con ranking anual 2005-2018
+PAISES_MALARIA = ["ARG", "BRA", "KHM", "COL", "CHN", "ECU", "SLV", "GHA", "IND", "DOM"]
+PAISES_MALARIA_SINTETICOS = 130
+PAGINA_MALARIA = 1000
+
+# Ciudades para clima-global: consulta -> (lat, lon, nombre)
+CIUDADES = {
+    "Lima": (-12.0464, -77.0428, "Lima, Perú"),
+    "Madrid": (40.4168, -3.7038, "Madrid, España"),
+    "Bogota": (4.7110, -74.0721, "Bogotá, Colombia"),
+}
+
+
+def _guardar(url, datos, ruta, params=None):
+    respuesta = requests.Response()
+    respuesta.status_code = 200
+    respuesta.headers["Content-Type"] = "application/json"
+    respuesta._content = json.dumps(datos, separators=(",", ":")).encode("utf-8")
+    grabaciones.grabar(grabaciones.url_canonica(url, params), respuesta, ruta)
+
+
+# ==========================================
+# COVID (disease.sh)
+# ==========================================
+
+def _fechas_historico():
+    fechas = [INICIO_HISTORICO + datetime.timedelta(days=i) for i in range(DIAS_HISTORICO)]
+    return [f"{f.month}/{f.day}/{f:%y}" for f in fechas]
+
+
+def _acumulados(rng, poblacion):
+    # Tres olas logísticas con tamaño y fecha aleatorios
+    t = np.arange(DIAS_HISTORICO)
+    casos = np.zeros(DIAS_HISTORICO)
+    for _ in range(3):
+        tamaño = poblacion * rng.uniform(0.01, 0.08)
+        centro = rng.uniform(60, DIAS_HISTORICO - 60)
+        ancho = rng.uniform(15, 50)
+        casos += tamaño / (1 + np.exp(-(t - centro) / ancho))
+    ruido = rng.lognormal(0, 0.1, DIAS_HISTORICO)
+    diarios = np.clip(np.diff(casos, prepend=0) * ruido, 0, None)
+    casos = np.cumsum(diarios).astype(np.int64)
+    muertes = (casos * rng.uniform(0.005, 0.03)).astype(np.int64)
+    return casos, muertes
+
+
+def _timeline(fechas, casos, muertes):
+    return {
+        "cases": dict(zip(fechas, casos.tolist())),
+        "deaths": dict(zip(fechas, muertes.tolist())),
+        "recovered": dict.fromkeys(fechas, 0),
+    }
+
+
+def generar_covid(ruta, rng):
+    fechas = _fechas_historico()
+    poblaciones = dict(PAISES)
+    for i in range(PAISES_SINTETICOS):
+        poblaciones[f"Pais {i:03d}"] = int(rng.uniform(2e5, 2e8))
+
+    series = {pais: _acumulados(rng, poblacion) for pais, poblacion in poblaciones.items()}
+    masivos = [p for p in poblaciones if p != "US"]   # disease.sh agrupa como 'USA'
+
+    actuales = {
+        pais: {
+            "country": pais,
+            "cases": int(casos[-1]),
+            "todayCases": int(casos[-1] - casos[-2]),
+            "deaths": int(muertes[-1]),
+            "recovered": 0,
+            "population": poblaciones[pais],
+        }
+        for pais, (casos, muertes) in series.items()
+    }
+    _guardar("https://disease.sh/v3/covid-19/countries", [actuales[p] for p in masivos], ruta)
+    _guardar(
+        "https://disease.sh/v3/covid-19/historical",
+        [{"country": p, "province": None, "timeline": _timeline(fechas, *series[p])} for p in masivos],
+        ruta, {"lastdays": "all"}
+    )
+
+    for pais in PAISES:
+        casos, muertes = series[pais]
+        _guardar(f"https://disease.sh/v3/covid-19/countries/{pais}", actuales[pais], ruta)
+        for dias in OPCIONES_DIAS:
+            n = DIAS_HISTORICO if dias == "all" else dias
+            _guardar(
+                f"https://disease.sh/v3/covid-19/historical/{pais}",
+                {"country": pais, "province": ["mainland"],
+                 "timeline": _timeline(fechas[-n:], casos[-n:], muertes[-n:])},
+                ruta, {"lastdays": dias}
+            )
+
+
+# ==========================================
+# MALARIA (Banco Mundial)
+# ==========================================
+
+def generar_malaria(ruta, rng):
+    from utils.datos_malaria import PARAMS_INDICADOR, URL_DATOS
+
+    codigos = PAISES_MALARIA + [f"X{i:02d}" for i in range(PAISES_MALARIA_SINTETICOS)]
+    observaciones = []
+    for codigo in codigos:
+        base, tendencia = rng.uniform(10, 130), rng.uniform(-4, 4)
+        for año in range(2005, 2019):
+            ranking = int(np.clip(base + tendencia * (año - 2005) + rng.normal(0, 5), 1, 140))
+            observaciones.append({
+                "REF_AREA": codigo, "UNIT_MEASURE": "RANK",
+                "TIME_PERIOD": str(año), "OBS_VALUE": ranking,
+            })
+
+    for skip in range(0, len(observaciones) + 1, PAGINA_MALARIA):
+        _guardar(URL_DATOS, {
+            "count": len(observaciones),
+            "value": observaciones[skip:skip + PAGINA_MALARIA],
+        }, ruta, {**PARAMS_INDICADOR, "skip": skip})
+
+
+# ==========================================
+# CLIMA (Nominatim + Open-Meteo)
+# ==========================================
+
+def generar_clima(ruta, rng):
+    import urllib.parse
+
+    from utils.pronosticos import URL_PRONOSTICO, _redondear
+
+    inicio = datetime.datetime(2024, 1, 1)
+    horas = [(inicio + datetime.timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(168)]
+    for consulta, (lat, lon, nombre) in CIUDADES.items():
+        url = (
+            "https://nominatim.openstreetmap.org/search"
+            f"?q={urllib.parse.quote(consulta)}&format=json&limit=1"
+        )
+        _guardar(url, [{"lat": str(lat), "lon": str(lon), "display_name": nombre}], ruta)
+
+        temperaturas = 18 + 6 * np.sin(np.arange(168) * 2 * np.pi / 24) + rng.normal(0, 1, 168)
+        _guardar(URL_PRONOSTICO, {
+            "latitude": lat, "longitude": lon,
+            "hourly": {"time": horas, "temperature_2m": np.round(temperaturas, 1).tolist()},
+        }, ruta, {"latitude": _redondear(lat), "longitude": _redondear(lon), "hourly": "temperature_2m"})
+
+
+def generar(ruta=RUTA_FIXTURES, semilla=20240101):
+    """
+    Escribe todas las respuestas sintéticas en 'ruta'
+    """
+    rng = np.random.default_rng(semilla)
+    generar_covid(ruta, rng)
+    generar_malaria(ruta, rng)
+    generar_clima(ruta, rng)
+    return ruta
+
+
+def asegurar(ruta=RUTA_FIXTURES):
+    """
+    Genera las respuestas solo si 'ruta' todavía no existe
+    """
+    if not os.path.isdir(ruta):
+        generar(ruta)
+    return ruta
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera las respuestas sintéticas de las APIs")
+    parser.add_argument("--ruta", default=RUTA_FIXTURES)
+    args = parser.parse_args()
+    print(f"✅ Respuestas sintéticas en {generar(args.ruta)}")
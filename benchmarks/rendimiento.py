@@ -0,0 +1,281 @@
+"""
+Benchmarks de los generadores de modelos y de los callbacks de las páginas.
+
+Cada caso es una llamada directa (sin HTTP ni navegador) a una función de
+utils.funciones o a un callback de una página, con las APIs externas
+reproducidas desde las respuestas sintéticas de benchmarks.fixtures
+(HTTP_MODO=reproducir) y las cachés en un directorio temporal. Por caso se
+mide:
+    - tiempo: mínimo y mediana de varias repeticiones (tras una de calentamiento)
+    - pico de memoria: tracemalloc durante una llamada aparte
+    - tamaño de la figura/respuesta serializada a JSON, como la envía Dash
+
+Cada corrida se agrega a cache/benchmarks/historial.jsonl (fuera de git). La
+línea base de un caso es la mediana de sus últimas corridas en la misma
+máquina; si el caso empeora más que el umbral, el script termina con código 1.
+El tiempo se compara por el mínimo, que es lo menos sensible al ruido de
+otros procesos.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.rendimiento
+    python -m benchmarks.rendimiento -k sir --repeticiones 20
+    python -m benchmarks.rendimiento --sin-guardar --umbral 0.3
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RUTA_HISTORIAL = os.path.join(os.path.dirname(DIRECTORIO), "cache", "benchmarks", "historial.jsonl")
+
+# Entorno aislado; tiene que quedar definido antes de importar utils y la app
+_TEMPORAL = tempfile.mkdtemp(prefix="benchmarks-")
+os.environ.update({
+    "HTTP_MODO": "reproducir",
+    "HTTP_GRABACIONES": os.environ.get("HTTP_GRABACIONES", os.path.join(DIRECTORIO, "fixtures")),
+    "CACHE_RUTA": os.path.join(_TEMPORAL, "respuestas.sqlite"),
+    "MALARIA_RUTA": os.path.join(_TEMPORAL, "malaria.sqlite"),
+    "GAZETTEER_RUTA": os.path.join(_TEMPORAL, "sin-gazetteer.txt"),
+    "TRABAJOS_RUTA": os.path.join(_TEMPORAL, "trabajos"),
+    "CACHE_COMPARTIDA_RUTA": os.path.join(_TEMPORAL, "compartida"),
+    "TELEMETRIA": "0",
+})
+# Las repeticiones tienen que medir el cálculo, no la caché de figuras y simulaciones
+for _espacio in ("FIGURAS", "SIMULACIONES"):
+    os.environ.setdefault(f"CACHE_{_espacio}_MB", "0")
+
+from benchmarks import fixtures  # noqa: E402
+
+CASOS = {}    # nombre -> función sin argumentos
+
+
+def caso(nombre, funcion, *args):
+    CASOS[nombre] = lambda: funcion(*args)
+
+
+def _sin_progreso(_):
+    pass
+
+
+# ==========================================
+# CASOS
+# ==========================================
+
+def registrar_casos():
+    import app  # noqa: F401  (registra las páginas)
+    from utils import covid_global, funciones
+
+    paginas = {nombre.split(".", 1)[1]: modulo for nombre, modulo in sys.modules.items()
+               if nombre.startswith("pages.")}
+
+    # Generadores de utils.funciones
+    caso("funciones/ecu_log", funciones.fucion_graficas_ecu_log, 10, 100, 50, 0.3)
+    caso("funciones/logistica_cosecha", funciones.funcion_grafica_logistica_con_cosecha, 10, 0.3, 100, 50, 2)
+    for mallado in (10, 20, 40, 80):
+        caso(f"funciones/campo_vectorial/{mallado}", funciones.generar_campo_vectorial, "Y", "-X", 5, 5, mallado)
+    for T in (100, 365, 1000):
+        caso(f"funciones/sir/{T}", funciones.generar_modelo_sir, 1000, 1, 0.3, 0.1, T)
+        caso(f"funciones/seir/{T}", funciones.generar_modelo_seir, 1000, 1, 0, 0.35, 0.2, 0.1, T)
+
+    # Callbacks de las páginas, con los valores por defecto de sus formularios
+    caso("página3/actualizar_grafica", paginas["página3"].actualizar_grafica, 1, 10, 0.3, 100, 50)
+    caso("página4/update_graph", paginas["página4"].update_graph, 1, 10, 0.3, 100, 50)
+    for mallado in (10, 20, 40):
+        caso(f"página5/update_vector_field/{mallado}", paginas["página5"].update_vector_field,
+             1, "Y", "-X", 5, 5, mallado)
+    caso("página6/update_sir_graph", paginas["página6"].update_sir_graph, 1, 1000, 0.3, 0.1, 1, 160)
+    caso("página7/update_seir_graph", paginas["página7"].update_seir_graph, 1, 1000, 0.35, 0.2, 0.1, 1, 0, 160)
+    caso("página10/actualizar_sir_modificado", paginas["página10"].actualizar_sir_modificado,
+         275, 0.004, 0.01, 266, 1, 8, 15)
+    caso("pagina11/update_sir", paginas["pagina11"].update_sir, 0.99, 0.01, 0, 0.3, 0.1, 160)
+    for T in (100, 365, 1000):
+        caso(f"página12/generar_grafico_sir/{T}", paginas["página12"].generar_grafico_sir,
+             990, 10, 0, 0.3, 0.1, T)
+        caso(f"página12/actualizar_grafica_sir/{T}", paginas["página12"].actualizar_grafica_sir,
+             _sin_progreso, 1, 990, 10, 0, 0.3, 0.1, T)
+    # El índice global lo construye la precarga, no el callback
+    covid_global._precargar()
+    caso("página12/calibrar_con_datos_reales", paginas["página12"].calibrar_con_datos_reales,
+         _sin_progreso, 1, "Peru", 365)
+    for panel in ("acumulados", "nuevos", "rt"):
+        caso(f"página8/actualizar_dashboard_covid/{panel}", paginas["página8"].actualizar_dashboard_covid,
+             None, panel, "Peru", "all")
+    for metrica in ("casos", "rt"):
+        caso(f"página8/actualizar_comparacion_covid/{metrica}", paginas["página8"].actualizar_comparacion_covid,
+             ["Peru", "Spain", "USA", "Brazil", "Chile"], metrica, "all", ["por_100k"])
+    # Los callbacks no ingieren el dataset: la primera ingesta la hace la precarga
+    paginas["página9"]._precargar_ajustes()
+    caso("página9/actualizar_tabla_ajustes", paginas["página9"].actualizar_tabla_ajustes, 1)
+    caso("página9/ejecutar_ajuste_api_real", paginas["página9"].ejecutar_ajuste_api_real, _sin_progreso, 1, "GHA")
+    caso("clima-global/actualizar_clima", paginas["clima-global"].actualizar_clima, 1, "Lima")
+
+
+# ==========================================
+# MEDICIÓN
+# ==========================================
+
+def medir(funcion, repeticiones, tiempo_maximo):
+    """
+    Mide una función sin argumentos; corta antes de 'repeticiones' si se pasa
+    de 'tiempo_maximo' segundos (siempre hace al menos 3 repeticiones)
+    """
+    from plotly.io.json import to_json_plotly
+
+    resultado = funcion()      # calentamiento: cachés, importaciones diferidas, JIT de numpy
+    tiempos = []
+    inicio_total = time.perf_counter()
+    while len(tiempos) < repeticiones:
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        if len(tiempos) >= 3 and time.perf_counter() - inicio_total > tiempo_maximo:
+            break
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "mediana_s": statistics.median(tiempos),
+        "minimo_s": min(tiempos),
+        "repeticiones": len(tiempos),
+        "pico_bytes": pico,
+        "figura_bytes": len(to_json_plotly(resultado)),
+    }
+
+
+# ==========================================
+# HISTORIAL Y REGRESIONES
+# ==========================================
+
+def _maquina():
+    return f"{platform.node()}|{platform.machine()}|py{platform.python_version()}"
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORIO,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def leer_historial(ruta=RUTA_HISTORIAL):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, encoding="utf-8") as archivo:
+        return [json.loads(linea) for linea in archivo if linea.strip()]
+
+
+def linea_base(historial, nombre, maquina, corridas):
+    """
+    Mediana de cada métrica del caso en las últimas 'corridas' de esta máquina
+    """
+    previas = [c["resultados"][nombre] for c in historial
+               if c.get("maquina") == maquina and nombre in c.get("resultados", {})][-corridas:]
+    if not previas:
+        return None
+    return {metrica: statistics.median(p[metrica] for p in previas)
+            for metrica in ("minimo_s", "pico_bytes", "figura_bytes")}
+
+
+def comparar(resultado, base, umbrales):
+    """
+    Lista de (métrica, cambio relativo) que superan su umbral
+    """
+    if base is None:
+        return []
+    regresiones = []
+    for metrica, umbral in umbrales.items():
+        if base[metrica] > 0:
+            cambio = resultado[metrica] / base[metrica] - 1
+            if cambio > umbral:
+                regresiones.append((metrica, cambio))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de modelos y callbacks")
+    parser.add_argument("-k", "--filtro", default="", help="solo casos cuyo nombre contiene este texto")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--tiempo-maximo", type=float, default=3.0, help="segundos máximos por caso")
+    parser.add_argument("--umbral", type=float, default=0.3,
+                        help="empeoramiento de tiempo tolerado (0.3 = 30%%); subirlo en máquinas ruidosas")
+    parser.add_argument("--umbral-memoria", type=float, default=0.25)
+    parser.add_argument("--umbral-figura", type=float, default=0.05)
+    parser.add_argument("--corridas-base", type=int, default=5, help="corridas previas para la línea base")
+    parser.add_argument("--historial", default=RUTA_HISTORIAL)
+    parser.add_argument("--sin-guardar", action="store_true", help="no agregar la corrida al historial")
+    args = parser.parse_args()
+
+    fixtures.asegurar(os.environ["HTTP_GRABACIONES"])
+    registrar_casos()
+    casos = {n: f for n, f in CASOS.items() if args.filtro in n}
+    if not casos:
+        raise SystemExit(f"❌ Ningún caso contiene {args.filtro!r}")
+
+    historial = leer_historial(args.historial)
+    maquina = _maquina()
+    umbrales = {"minimo_s": args.umbral, "pico_bytes": args.umbral_memoria, "figura_bytes": args.umbral_figura}
+
+    resultados, fallidos = {}, {}
+    print(f"{'caso':<48} {'mínimo':>10} {'base':>10} {'Δ':>7} {'pico':>10} {'figura':>10}")
+    for nombre, funcion in casos.items():
+        try:
+            resultado = medir(funcion, args.repeticiones, args.tiempo_maximo)
+        except Exception as e:
+            print(f"❌ {nombre}: {e!r}")
+            fallidos[nombre] = [("error", repr(e))]
+            continue
+        resultados[nombre] = resultado
+
+        base = linea_base(historial, nombre, maquina, args.corridas_base)
+        regresiones = comparar(resultado, base, umbrales)
+        if regresiones:
+            fallidos[nombre] = regresiones
+        base_ms = f"{base['minimo_s'] * 1000:.2f}ms" if base else "-"
+        cambio = f"{(resultado['minimo_s'] / base['minimo_s'] - 1) * 100:+.0f}%" if base else "-"
+        print(
+            f"{nombre:<48} {resultado['minimo_s'] * 1000:>8.2f}ms {base_ms:>10} {cambio:>7} "
+            f"{resultado['pico_bytes'] / 1024:>8.0f}KB {resultado['figura_bytes'] / 1024:>8.1f}KB"
+            f"{'  ❌' if regresiones else ''}"
+        )
+
+    if not args.sin_guardar and resultados:
+        os.makedirs(os.path.dirname(os.path.abspath(args.historial)), exist_ok=True)
+        with open(args.historial, "a", encoding="utf-8") as archivo:
+            archivo.write(json.dumps({
+                "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+                "commit": _commit(),
+                "maquina": maquina,
+                "resultados": resultados,
+            }, ensure_ascii=False) + "\n")
+
+    if fallidos:
+        print("\n❌ Regresiones:")
+        for nombre, detalles in fallidos.items():
+            for metrica, cambio in detalles:
+                texto = f"{cambio * 100:+.0f}%" if isinstance(cambio, float) else cambio
+                print(f"   {nombre}: {metrica} {texto}")
+        return 1
+    print(f"\n✅ {len(resultados)} casos sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
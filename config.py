@@ -0,0 +1,56 @@
+"""
+Configuración de la app según el perfil de ejecución.
+
+APP_PERFIL elige el perfil ('dev' por defecto, o 'prod'); cualquier valor
+se puede reemplazar con su variable de entorno (APP_PUERTO, APP_WORKERS...).
+
+    dev:  servidor de desarrollo de Dash con debug y recargador
+    prod: sin debug; se sirve con gunicorn (gunicorn.conf.py) o waitress
+"""
+import os
+
+PERFILES = {
+    "dev": {
+        "DEBUG": True,
+        "HOST": "127.0.0.1",
+        "PUERTO": 8050,
+        "WORKERS": 1,
+        "HILOS": 4,
+        "TIMEOUT": 120,
+        "PRECARGAR_ANTES_DE_FORK": False,
+    },
+    "prod": {
+        "DEBUG": False,
+        "HOST": "0.0.0.0",
+        "PUERTO": 8050,
+        # Los solvers (odeint, least_squares, bootstrap) son CPU: un proceso por
+        # núcleo y pocos hilos por proceso, que solo solapan la espera de red
+        "WORKERS": os.cpu_count() or 1,
+        "HILOS": 2,
+        "TIMEOUT": 60,
+        "PRECARGAR_ANTES_DE_FORK": True,
+    },
+}
+
+PERFIL = os.environ.get("APP_PERFIL", "dev")
+if PERFIL not in PERFILES:
+    raise ValueError(f"APP_PERFIL desconocido: {PERFIL!r} (opciones: {', '.join(PERFILES)})")
+
+
+def _valor(nombre):
+    por_defecto = PERFILES[PERFIL][nombre]
+    texto = os.environ.get(f"APP_{nombre}")
+    if texto is None:
+        return por_defecto
+    if isinstance(por_defecto, bool):
+        return texto.lower() in ("1", "true", "si", "sí", "yes")
+    return type(por_defecto)(texto)
+
+
+DEBUG = _valor("DEBUG")
+HOST = _valor("HOST")
+PUERTO = _valor("PUERTO")
+WORKERS = _valor("WORKERS")
+HILOS = _valor("HILOS")
+TIMEOUT = _valor("TIMEOUT")
+PRECARGAR_ANTES_DE_FORK = _valor("PRECARGAR_ANTES_DE_FORK")
@@ -0,0 +1,4 @@
+"""
+Configuración de pytest: la raíz del repositorio queda en sys.path para que
+las pruebas importen utils.* igual que la app.
+"""
@@ -0,0 +1,49 @@
+"""
+Configuración de gunicorn para el perfil de producción.
+
+Uso:
+    APP_PERFIL=prod gunicorn app:server -c gunicorn.conf.py
+
+Los valores salen de config.py (APP_WORKERS, APP_HILOS, APP_PUERTO...).
+Con preload_app el maestro importa la app una sola vez; antes de crear los
+workers importa los módulos diferidos, de modo que cada worker nace (por
+fork) con scipy y pandas ya cargados y compartidos por copy-on-write. El
+maestro no hace precarga de datos: un hilo con la red o un lock tomado al
+momento del fork dejaría ese lock tomado para siempre en el worker. Cada
+worker arranca su propio planificador después del fork.
+"""
+# 'config' es el nombre de un ajuste de gunicorn: se importa con otro nombre
+import config as perfil
+
+bind = f"{perfil.HOST}:{perfil.PUERTO}"
+workers = perfil.WORKERS
+threads = perfil.HILOS
+worker_class = "gthread"
+timeout = perfil.TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+preload_app = True
+
+# Reciclar workers de a poco acota el crecimiento de memoria de las cachés
+max_requests = 2000
+max_requests_jitter = 200
+
+
+def when_ready(server):
+    # Corre en el maestro, con la app ya importada y antes del primer fork
+    if not perfil.PRECARGAR_ANTES_DE_FORK:
+        return
+    from utils import carga_diferida
+
+    tiempos = carga_diferida.precargar()
+    server.log.info("Módulos precargados: %s", ", ".join(sorted(tiempos)))
+
+
+def post_fork(server, worker):
+    # Los hilos no sobreviven al fork: cada worker arranca su planificador.
+    # La precarga es síncrona (no hace nada si el maestro ya importó todo): con
+    # pandas a medio importar en otro hilo, plotly falla al construir trazas.
+    from utils import carga_diferida, precalentamiento
+
+    carga_diferida.precargar()
+    precalentamiento.iniciar()
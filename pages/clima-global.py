@@ -2,9 +2,10 @@ import dash
 from dash import html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
 import requests
-import plotly.express as px
-import pandas as pd
-import urllib.parse
+
+from utils.carga_diferida import diferido
+from utils.geocodificacion import geocodificar, sugerir_ciudades
+from utils.pronosticos import pronostico_temperatura
 
 dash.register_page(
     __name__,
@@ -12,64 +13,35 @@ dash.register_page(
     name="Clima Global"
 )
 
+px = diferido("plotly.express")
+
 # ============================================================
 # 1. FUNCIÓN PARA OBTENER LAT/LON DE UNA CIUDAD (GEOCODING)
 # ============================================================
 def geocode(ciudad):
-
-    ciudad_encoded = urllib.parse.quote(ciudad)
-
-    url = (
-        "https://nominatim.openstreetmap.org/search"
-        f"?q={ciudad_encoded}&format=json&limit=1"
-    )
-
-    headers = {
-        "User-Agent": "ClimaDashApp/1.0 (contacto: ejemplo@gmail.com)"
-    }
-
-    r = requests.get(url, headers=headers)
-
+    """
+    Primero busca en el gazetteer local; Nominatim (con caché en disco)
+    solo se consulta para las ciudades que no están ahí
+    """
     try:
-        data = r.json()
-    except Exception:
-        return None
-
-    if not data:
+        return geocodificar(ciudad)
+    except (requests.exceptions.RequestException, ValueError, KeyError):
         return None
 
-    return {
-        "lat": float(data[0]["lat"]),
-        "lon": float(data[0]["lon"]),
-        "name": data[0]["display_name"],
-    }
-
 
 # ============================================================
 # 2. FUNCIÓN PARA OBTENER CLIMA
 # ============================================================
 def obtener_clima(lat, lon):
-    url_meteo = (
-        f"https://api.open-meteo.com/v1/forecast?"
-        f"latitude={lat}&longitude={lon}&hourly=temperature_2m"
-    )
-
-    r = requests.get(url_meteo)
-    data = r.json()
-
-    if "hourly" not in data:
+    """
+    Pronóstico horario desde la caché por celda de Open-Meteo; solo se
+    consulta la API si la celda no se pidió durante la corrida vigente
+    """
+    try:
+        return pronostico_temperatura(lat, lon)
+    except (requests.exceptions.RequestException, ValueError, KeyError):
         return None
 
-    horas = data["hourly"]["time"]
-    temps = data["hourly"]["temperature_2m"]
-
-    df = pd.DataFrame({
-        "Hora": pd.to_datetime(horas),
-        "Temperatura (°C)": temps,
-    })
-
-    return df
-
 
 # ============================================================
 # 3. LAYOUT
@@ -91,6 +63,8 @@ layout = dbc.Container(
                                 id="ciudad-input",
                                 placeholder="Escribe una ciudad (ej: Lima, Madrid, Tokyo)",
                                 type="text",
+                                list="sugerencias-ciudad",
+                                autocomplete="off",
                                 className="shadow-sm",
                                 style={
                                     "height": "50px",
@@ -124,6 +98,8 @@ layout = dbc.Container(
                     className="mb-4"
                 ),
 
+                html.Datalist(id="sugerencias-ciudad"),
+
                 html.Div(
                     id="info-ciudad",
                     className="mt-3",
@@ -158,8 +134,17 @@ layout = dbc.Container(
 
 
 # ============================================================
-# 4. CALLBACK
+# 4. CALLBACKS
 # ============================================================
+@dash.callback(
+    Output("sugerencias-ciudad", "children"),
+    Input("ciudad-input", "value"),
+    prevent_initial_call=True
+)
+def actualizar_sugerencias(texto):
+    return [html.Option(value=ciudad) for ciudad in sugerir_ciudades(texto or "")]
+
+
 @dash.callback(
     Output("info-ciudad", "children"),
     Output("grafico-temp", "figure"),
@@ -3,9 +3,11 @@ from dash import dcc, html, Input, Output, callback
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import numpy as np
-from scipy.integrate import odeint
 
 from styles import INPUT_STYLE_COMPACT, INFO_CARD_STYLE
+from utils.carga_diferida import diferido
+
+integrate = diferido("scipy.integrate")
 
 dash.register_page(
     __name__,
@@ -286,7 +288,7 @@ def update_sir(s0, i0, r0, beta, gamma, tmax):
         return -beta * S * I, beta * S * I - gamma * I, gamma * I
 
     t = np.linspace(0, tmax, 400)
-    S, I, R = odeint(sir_eq, (s0, i0, r0), t).T
+    S, I, R = integrate.odeint(sir_eq, (s0, i0, r0), t).T
 
     fig = go.Figure([
         go.Scatter(x=t, y=S, mode="lines", name="Susceptibles"),
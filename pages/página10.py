@@ -5,9 +5,12 @@ import dash
 from dash import html, dcc, Input, Output, callback, State
 import numpy as np
 import plotly.graph_objects as go
-from scipy.integrate import odeint
 from typing import List, Tuple, Union, Any
 
+from utils.carga_diferida import diferido
+
+integrate = diferido("scipy.integrate")
+
 # ============================================================
 # ⚙️ REGISTRO DE PÁGINA DASH
 # ============================================================
@@ -199,7 +202,7 @@ def actualizar_sir_modificado(
     t = np.linspace(0, tmax_val, 500)
     y0 = (S0_val, I0_val, R0_val)
     try:
-        sol = odeint(sir_rumor, y0, t, args=(b_val, k_val))
+        sol = integrate.odeint(sir_rumor, y0, t, args=(b_val, k_val))
     except Exception:
         fig_err = _fig_error("Error en la integración del modelo SIR.", tmax_val)
         return fig_err, html.Div("❌ Error: Problema al resolver las ecuaciones diferenciales. Revise los valores de b y k.")
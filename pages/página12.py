@@ -2,9 +2,16 @@ import dash
 from dash import html, dcc, Input, Output, State, callback
 import numpy as np
 import plotly.graph_objects as go
-from scipy.integrate import odeint
 from typing import List, Tuple, Any, Dict, Union
 
+from utils.cache_compartida import memoizar
+from utils.calibracion_sir import calibrar_sir, recortar_serie
+from utils.carga_diferida import diferido
+from utils.covid_global import obtener_indice
+from utils.telemetria import fase
+
+integrate = diferido("scipy.integrate")
+
 # ============================================================
 # ⚙️ REGISTRO DE PÁGINA DASH
 # ============================================================
@@ -41,6 +48,22 @@ def modelo_sir(y: List[float], t: float, beta: float, gamma: float, N: float) ->
     return [dSdt, dIdt, dRdt]
 
 
+@memoizar("simulaciones")
+def resolver_sir(S0: int, I0: int, R0: int, beta: float, gamma: float, t_max: int) -> np.ndarray:
+    """
+    Integra el modelo SIR en 1000 puntos entre 0 y t_max.
+
+    El resultado queda en la caché compartida: el callback corre en un proceso
+    de fondo, y los mismos parámetros no se vuelven a integrar en ningún worker.
+
+    Retorna:
+        np.ndarray: Matriz (1000, 3) con las columnas S, I, R.
+    """
+    N = S0 + I0 + R0
+    t = np.linspace(0, t_max, 1000)
+    return integrate.odeint(modelo_sir, [S0, I0, R0], t, args=(beta, gamma, N))
+
+
 # ============================================================
 # 📊 GENERADOR DE GRÁFICO Y CÁLCULOS
 # ============================================================
@@ -62,10 +85,9 @@ def generar_grafico_sir(
     # Preparación de datos para la integración
     N = S0 + I0 + R0
     t = np.linspace(0, t_max, 1000)
-    y0 = [S0, I0, R0]
 
     # Solución de las EDOs mediante integración numérica
-    solucion = odeint(modelo_sir, y0, t, args=(beta, gamma, N))
+    solucion = resolver_sir(S0, I0, R0, beta, gamma, t_max)
     S, I, R = solucion.T
 
     # --- Cálculo de Indicadores Clave ---
@@ -141,6 +163,50 @@ def generar_grafico_sir(
     return fig, R0_val, tiempo_pico, valor_pico, S_final, R_final, tasa_ataque_final
 
 
+# ============================================================
+# 🛠️ FUNCIONES AUXILIARES DE GRÁFICO
+# ============================================================
+def _fig_error(msg: str, t_max: int = 365) -> go.Figure:
+    """Genera una figura de Plotly para mostrar un mensaje de error."""
+    fig = go.Figure()
+    fig.add_annotation(
+        text=msg,
+        xref="paper", yref="paper", x=0.5, y=0.5,
+        showarrow=False, font=dict(size=20, color="#d62728")
+    )
+    fig.update_layout(
+        title="",
+        xaxis_title='Tiempo (días)',
+        yaxis_title='Población',
+        xaxis=dict(range=[0, t_max]),
+        template='plotly_white',
+        height=550
+    )
+    return fig
+
+def _fig_placeholder(msg: str) -> go.Figure:
+    """Genera una figura de Plotly para mostrar un mensaje de inicio."""
+    fig = go.Figure()
+    fig.add_annotation(
+        text=msg,
+        xref="paper", yref="paper", x=0.5, y=0.5,
+        showarrow=False, font=dict(size=20, color="#7f7f7f")
+    )
+    fig.update_layout(
+        title="",
+        xaxis_title='Tiempo (días)',
+        yaxis_title='Población',
+        template='plotly_white',
+        height=550
+    )
+    return fig
+
+
+# Países para la calibración (nombres de los endpoints masivos de disease.sh)
+PAISES_CALIBRACION = ['Peru', 'Mexico', 'Argentina', 'Brazil', 'Colombia', 'Chile',
+                      'Spain', 'Italy', 'France', 'USA']
+
+
 # ============================================================
 # 🎨 LAYOUT (ESTRUCTURA DE LA INTERFAZ)
 # ============================================================
@@ -209,6 +275,24 @@ layout = html.Div(className="sir-dashboard-layout", children=[
             ]),
             html.Button("🚀 Generar Simulación", id="btn-generar",
                         className="btn-primary btn-lg", n_clicks=0) # Estilo de botón primario
+        ]),
+        html.Hr(className="separator"),
+
+        # ------------------------ CALIBRACIÓN CON DATOS REALES ------------------------
+        html.Div(className="input-section", children=[
+            html.H3("📡 Calibrar con Datos COVID-19", className="section-subtitle"),
+
+            html.Div(className="sir-input-row", children=[
+                html.Label("País:", className="sir-input-label"),
+                dcc.Dropdown(id="dropdown-pais-calibracion", options=PAISES_CALIBRACION,
+                             value='Peru', clearable=False, style={'width': '100%'})
+            ]),
+
+            html.Button("🎯 Ajustar β, γ e iniciales", id="btn-calibrar-sir",
+                        className="btn-primary", n_clicks=0),
+            # Avance de la calibración (se ejecuta en segundo plano)
+            html.Progress(id="progreso-calibracion", value="0", max="100", style={'width': '100%'}),
+            html.Div(id="calibracion-info", className="sir-info-panel")
         ])
     ]),
 
@@ -219,14 +303,17 @@ layout = html.Div(className="sir-dashboard-layout", children=[
         html.Div(className="sir-graph-card", children=[
             dcc.Graph(
                 id='grafico-sir-interactivo',
+                figure=_fig_placeholder("Presiona 'Generar Simulación' para empezar."),
                 config={'displayModeBar': True, 'responsive': True},
                 style={'height': '100%', 'width': '100%'}
-            )
+            ),
+            # Avance de la simulación (se ejecuta en segundo plano)
+            html.Progress(id="progreso-sir", value="0", max="100", style={'width': '100%'})
         ]),
 
         html.Div(className="sir-info-card", children=[
             html.H3("📝 Resultados y Resumen", className="info-title"),
-            html.Div(id="simulation-info", className="sir-info-panel")
+            html.Div("Esperando parámetros...", id="simulation-info", className="sir-info-panel")
         ])
     ])
 ])
@@ -287,7 +374,10 @@ def actualizar_poblacion_total(N: int, S0: int, I0: int, R0: int) -> Tuple[int,
     return S0, I0, R0
 
 
-# --- 3. GENERAR Y ACTUALIZAR SIMULACIÓN ---
+# --- 3. GENERAR Y ACTUALIZAR SIMULACIÓN (EN SEGUNDO PLANO) ---
+# Se ejecuta en un proceso aparte (utils.trabajos); si cambia algún parámetro
+# mientras corre, el trabajo se cancela. El resultado se guarda por parámetros
+# (n_clicks no forma parte de la clave), así que repetir una simulación es inmediato.
 @callback(
     [Output('grafico-sir-interactivo', 'figure'),
      Output('simulation-info', 'children')],
@@ -297,12 +387,24 @@ def actualizar_poblacion_total(N: int, S0: int, I0: int, R0: int) -> Tuple[int,
      State('input-r0-sir', 'value'),
      State('input-beta-sir', 'value'),
      State('input-gamma-sir', 'value'),
-     State('input-t-max-sir', 'value')]
+     State('input-t-max-sir', 'value')],
+    background=True,
+    running=[(Output('btn-generar', 'disabled'), True, False)],
+    progress=[Output('progreso-sir', 'value'), Output('progreso-sir', 'max')],
+    cancel=[Input('input-s0-sir', 'value'),
+            Input('input-i0-sir', 'value'),
+            Input('input-r0-sir', 'value'),
+            Input('input-beta-sir', 'value'),
+            Input('input-gamma-sir', 'value'),
+            Input('input-t-max-sir', 'value')],
+    cache_args_to_ignore=[0],
+    prevent_initial_call=True
 )
 def actualizar_grafica_sir(
-    n_clicks: int, S0: int, I0: int, R0: int, beta: float, gamma: float, t_max: int
+    set_progress, n_clicks: int, S0: int, I0: int, R0: int, beta: float, gamma: float, t_max: int
 ) -> Tuple[go.Figure, Union[html.Div, str]]:
     """Ejecuta la simulación SIR y actualiza la gráfica y el resumen."""
+    set_progress(("0", "100"))
 
     # Se ejecuta solo si el botón ha sido presionado al menos una vez
     if n_clicks is None or n_clicks == 0:
@@ -326,9 +428,11 @@ def actualizar_grafica_sir(
 
     try:
         # Ejecutar la simulación principal
+        set_progress(("20", "100"))
         fig, R0_val, t_pico, v_pico, S_fin, R_fin, ataque = generar_grafico_sir(
             S0, I0, R0, beta, gamma, t_max
         )
+        set_progress(("80", "100"))
 
         # Lógica de interpretación de R₀
         if R0_val > 1.01: # Usamos un pequeño buffer para evitar errores de coma flotante cerca de 1
@@ -366,6 +470,7 @@ def actualizar_grafica_sir(
             ])
         ])
 
+        set_progress(("100", "100"))
         return fig, info
 
     except Exception as e:
@@ -377,40 +482,92 @@ def actualizar_grafica_sir(
         ])
 
 
-# ============================================================
-# 🛠️ FUNCIONES AUXILIARES DE GRÁFICO
-# ============================================================
-def _fig_error(msg: str, t_max: int = 365) -> go.Figure:
-    """Genera una figura de Plotly para mostrar un mensaje de error."""
-    fig = go.Figure()
-    fig.add_annotation(
-        text=msg,
-        xref="paper", yref="paper", x=0.5, y=0.5,
-        showarrow=False, font=dict(size=20, color="#d62728")
-    )
-    fig.update_layout(
-        title="",
-        xaxis_title='Tiempo (días)',
-        yaxis_title='Población',
-        xaxis=dict(range=[0, t_max]),
-        template='plotly_white',
-        height=550
-    )
-    return fig
+# --- 4. CALIBRAR CON CASOS REALES ---
+# En segundo plano: el multi-start corre en el proceso del trabajo, con avance
+# por punto de partida, y cambiar de país lo cancela. n_clicks queda en la
+# clave de la caché de resultados, así cada clic vuelve a ajustar.
+@callback(
+    [Output('input-n-sir', 'value', allow_duplicate=True),
+     Output('input-s0-sir', 'value', allow_duplicate=True),
+     Output('input-i0-sir', 'value', allow_duplicate=True),
+     Output('input-r0-sir', 'value', allow_duplicate=True),
+     Output('input-beta-sir', 'value', allow_duplicate=True),
+     Output('input-gamma-sir', 'value', allow_duplicate=True),
+     Output('grafico-sir-interactivo', 'figure', allow_duplicate=True),
+     Output('calibracion-info', 'children')],
+    Input('btn-calibrar-sir', 'n_clicks'),
+    [State('dropdown-pais-calibracion', 'value'),
+     State('input-t-max-sir', 'value')],
+    background=True,
+    running=[(Output('btn-calibrar-sir', 'disabled'), True, False)],
+    progress=[Output('progreso-calibracion', 'value'), Output('progreso-calibracion', 'max')],
+    cancel=[Input('dropdown-pais-calibracion', 'value')],
+    prevent_initial_call=True
+)
+def calibrar_con_datos_reales(set_progress, n_clicks: int, pais: str, t_max: int):
+    """Ajusta el SIR a los casos acumulados del país y copia el resultado a los inputs."""
+    sin_cambios = [dash.no_update] * 7
+    set_progress(("0", "100"))
 
-def _fig_placeholder(msg: str) -> go.Figure:
-    """Genera una figura de Plotly para mostrar un mensaje de inicio."""
-    fig = go.Figure()
-    fig.add_annotation(
-        text=msg,
-        xref="paper", yref="paper", x=0.5, y=0.5,
-        showarrow=False, font=dict(size=20, color="#7f7f7f")
-    )
-    fig.update_layout(
-        title="",
-        xaxis_title='Tiempo (días)',
-        yaxis_title='Población',
-        template='plotly_white',
-        height=550
-    )
-    return fig
\ No newline at end of file
+    indice = obtener_indice()
+    if indice is None or pais not in indice.posicion:
+        return *sin_cambios, html.Div("❌ No hay datos disponibles para el país.", className="error-message")
+
+    N = indice.poblacion[indice.posicion[pais]]
+    if not np.isfinite(N) or N <= 0:
+        return *sin_cambios, html.Div("❌ El país no tiene población registrada.", className="error-message")
+
+    inicio, casos = recortar_serie(indice.serie(pais, 'casos'), t_max or 365)
+    if casos is None or len(casos) < 30:
+        return *sin_cambios, html.Div("❌ Serie demasiado corta para ajustar.", className="error-message")
+
+    try:
+        with fase("calculo"):
+            ajuste = calibrar_sir(
+                casos, N, al_avanzar=lambda hechos, total: set_progress((str(hechos), str(total)))
+            )
+    except Exception as e:
+        return *sin_cambios, html.Div(f"❌ Error en la calibración: {e}", className="error-message")
+
+    # Valores enteros que suman exactamente N, para no disparar el reescalado de población
+    N_int = int(round(N))
+    I0 = int(round(ajuste['I0']))
+    R0 = int(round(ajuste['R0']))
+    S0 = N_int - I0 - R0
+
+    fecha_inicio = indice.fechas[inicio]
+    with fase("figura"):
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(
+            x=ajuste['t'], y=ajuste['observados'], mode='markers',
+            name='Casos acumulados observados',
+            marker=dict(color='#7f7f7f', size=4)
+        ))
+        fig.add_trace(go.Scatter(
+            x=ajuste['t'], y=ajuste['ajustados'], mode='lines',
+            name='SIR ajustado (N - S)',
+            line=dict(color='#d62728', width=3)
+        ))
+        fig.update_layout(
+            title={
+                'text': f'Calibración SIR - {pais} desde {fecha_inicio:%d/%m/%Y}',
+                'y': 0.95, 'x': 0.5, 'xanchor': 'center', 'yanchor': 'top'
+            },
+            xaxis_title='Tiempo (días)',
+            yaxis_title='Casos acumulados',
+            hovermode='x unified',
+            template='plotly_white',
+            height=550,
+            margin=dict(l=40, r=40, t=60, b=40),
+            legend=dict(orientation="h", yanchor="top", y=1.05, xanchor="right", x=1)
+        )
+
+    info = html.Div(className="info-details", children=[
+        html.P([html.Strong("β ajustado: "), f"{ajuste['beta']:.4f}"]),
+        html.P([html.Strong("γ ajustado: "), f"{ajuste['gamma']:.4f}"]),
+        html.P([html.Strong("R₀ = β/γ: "), f"{ajuste['beta'] / ajuste['gamma']:.3f}"]),
+        html.P([html.Strong("Inicios / evaluaciones: "), f"{ajuste['inicios']} / {ajuste['evaluaciones']}"]),
+        html.P([html.Strong("Tiempo de ajuste: "), f"{ajuste['segundos']:.2f} s"]),
+    ])
+
+    return N_int, S0, I0, R0, round(float(ajuste['beta']), 4), round(float(ajuste['gamma']), 4), fig, info
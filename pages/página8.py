@@ -1,13 +1,60 @@
 import dash
 from dash import html, dcc, callback, Input, Output, State
 import plotly.graph_objects as go
-import requests
 from datetime import datetime
-import pandas as pd
+
+from utils import precalentamiento
+from utils.cache import (
+    obtener_json_cacheado, formatear_edad, refrescar_si_envejece, revalidar_en_segundo_plano
+)
+from utils.cliente_http import obtener_json
+from utils.concurrencia import ejecutar_en_paralelo
+from utils.covid_global import obtener_indice
+from utils.metricas_covid import metricas_pais
+from utils.telemetria import fase
 
 dash.register_page(__name__, path='/covid', name='COVID-19', suppress_callback_exceptions=True)
 
-layout = html.Div([
+# Listas fijas del dashboard (también las usa la precarga en segundo plano)
+PAISES_COVID = [
+    {'label': '🌎 Perú', 'value': 'Peru'},
+    {'label': '🇺🇸 Estados Unidos', 'value': 'US'},
+    {'label': '🇪🇸 España', 'value': 'Spain'},
+    {'label': '🇲🇽 México', 'value': 'Mexico'},
+    {'label': '🇦🇷 Argentina', 'value': 'Argentina'},
+    {'label': '🇧🇷 Brasil', 'value': 'Brazil'},
+    {'label': '🇨🇴 Colombia', 'value': 'Colombia'},
+    {'label': '🇨🇱 Chile', 'value': 'Chile'},
+    {'label': '🇮🇹 Italia', 'value': 'Italy'},
+    {'label': '🇫🇷 Francia', 'value': 'France'},
+]
+
+OPCIONES_PANEL_COVID = [
+    {'label': 'Totales acumulados', 'value': 'acumulados'},
+    {'label': 'Casos y muertes diarias (media 7 días)', 'value': 'nuevos'},
+    {'label': 'Tasa de crecimiento logarítmica', 'value': 'crecimiento'},
+    {'label': 'Tiempo de duplicación', 'value': 'duplicacion'},
+    {'label': 'Número de reproducción efectivo (Rt)', 'value': 'rt'},
+]
+
+OPCIONES_DIAS_COVID = [
+    {'label': '30 días', 'value': 30},
+    {'label': '60 días', 'value': 60},
+    {'label': '90 días', 'value': 90},
+    {'label': 'Todo el histórico', 'value': 'all'},
+]
+
+OPCIONES_METRICA_COMPARACION = [
+    {'label': 'Casos acumulados', 'value': 'casos'},
+    {'label': 'Casos diarios (media 7 días)', 'value': 'media_7d_casos'},
+    {'label': 'Muertes acumuladas', 'value': 'muertes'},
+    {'label': 'Número de reproducción efectivo (Rt)', 'value': 'rt'},
+]
+
+# Nombres tal como los usan los endpoints masivos de disease.sh
+PAISES_COMPARACION_INICIAL = ['Peru', 'Mexico', 'Spain', 'Italy']
+
+_panel_pais = html.Div([
     html.Div([
         html.H2("Dashboard COVID-19 Global", className="title"),
         
@@ -15,18 +62,7 @@ layout = html.Div([
             html.Label("Selecciona un país:"),
             dcc.Dropdown(
                 id="dropdown-pais",
-                options=[
-                    {'label': '🌎 Perú', 'value': 'Peru'},
-                    {'label': '🇺🇸 Estados Unidos', 'value': 'US'},
-                    {'label': '🇪🇸 España', 'value': 'Spain'},
-                    {'label': '🇲🇽 México', 'value': 'Mexico'},
-                    {'label': '🇦🇷 Argentina', 'value': 'Argentina'},
-                    {'label': '🇧🇷 Brasil', 'value': 'Brazil'},
-                    {'label': '🇨🇴 Colombia', 'value': 'Colombia'},
-                    {'label': '🇨🇱 Chile', 'value': 'Chile'},
-                    {'label': '🇮🇹 Italia', 'value': 'Italy'},
-                    {'label': '🇫🇷 Francia', 'value': 'France'},
-                ],
+                options=PAISES_COVID,
                 value='Peru',
                 className="input-field",
                 style={'width': '100%'}
@@ -37,18 +73,25 @@ layout = html.Div([
             html.Label("Días de histórico:"),
             dcc.Dropdown(
                 id="dropdown-dias-covid",
-                options=[
-                    {'label': '30 días', 'value': 30},
-                    {'label': '60 días', 'value': 60},
-                    {'label': '90 días', 'value': 90},
-                    {'label': 'Todo el histórico', 'value': 'all'},
-                ],
+                options=OPCIONES_DIAS_COVID,
                 value=90,
                 className="input-field",
                 style={'width': '100%'}
             )
         ], className="input-group"),
 
+        html.Div([
+            html.Label("Panel:"),
+            dcc.Dropdown(
+                id="dropdown-panel-covid",
+                options=OPCIONES_PANEL_COVID,
+                value='acumulados',
+                clearable=False,
+                className="input-field",
+                style={'width': '100%'}
+            )
+        ], className="input-group"),
+
         html.Button("Actualizar Datos", id="btn-actualizar-covid", className="btn-generar"),
         
         html.Div(id="info-actualizado-covid", style={
@@ -123,24 +166,89 @@ layout = html.Div([
     ], className="content right")
 ], className="page-container")
 
+_panel_comparacion = html.Div([
+    html.Div([
+        html.H2("Comparación entre países", className="title"),
+
+        html.Div([
+            html.Label("Países:"),
+            dcc.Dropdown(
+                id="dropdown-comparar-paises",
+                options=PAISES_COMPARACION_INICIAL,
+                value=PAISES_COMPARACION_INICIAL,
+                multi=True,
+                className="input-field",
+                style={'width': '100%'}
+            )
+        ], className="input-group"),
+
+        html.Div([
+            html.Label("Métrica:"),
+            dcc.RadioItems(
+                id="radio-metrica-comparacion",
+                options=OPCIONES_METRICA_COMPARACION,
+                value='media_7d_casos',
+                labelStyle={'display': 'block'}
+            )
+        ], className="input-group"),
+
+        html.Div([
+            html.Label("Días de histórico:"),
+            dcc.Dropdown(
+                id="dropdown-dias-comparacion",
+                options=OPCIONES_DIAS_COVID,
+                value='all',
+                clearable=False,
+                className="input-field",
+                style={'width': '100%'}
+            )
+        ], className="input-group"),
+
+        dcc.Checklist(
+            id="check-por-100k",
+            options=[{'label': ' Normalizar por 100 mil habitantes', 'value': 'por_100k'}],
+            value=['por_100k']
+        ),
+
+        html.Div(id="info-comparacion-covid", style={
+            'marginTop': '20px',
+            'padding': '10px',
+            'backgroundColor': '#e8f5e9',
+            'borderRadius': '5px',
+            'fontSize': '12px',
+            'textAlign': 'center'
+        })
+    ], className="content left"),
+
+    html.Div([
+        dcc.Graph(id="grafica-comparacion-covid", style={"height": "420px", "width": "100%"}),
+    ], className="content right")
+], className="page-container")
+
+layout = html.Div([_panel_pais, _panel_comparacion])
+
 
 # ==========================================
 # FUNCIONES PARA CONECTAR CON LA API
 # ==========================================
 
+# Tiempo (en segundos) que cada tipo de respuesta se considera fresca
+TTL_DATOS_ACTUALES = 10 * 60
+TTL_HISTORICO = 6 * 60 * 60
+
+# Segundos máximos que el callback espera por ambas consultas juntas
+PLAZO_CONSULTAS = 12
+
+
 def obtener_datos_pais(pais):
     """
     Obtiene datos actuales de COVID-19 para un país específico
     API: disease.sh (totalmente gratuita, sin API key necesaria)
+    Retorna (datos, edad_en_segundos); los datos salen de la caché en disco
+    y se revalidan en segundo plano cuando están vencidos
     """
-    try:
-        url = f"https://disease.sh/v3/covid-19/countries/{pais}"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Lanza error si status code no es 200
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error obteniendo datos del país: {e}")
-        return None
+    url = f"https://disease.sh/v3/covid-19/countries/{pais}"
+    return obtener_json_cacheado(url, ttl=TTL_DATOS_ACTUALES, descargar=obtener_json)
 
 
 def obtener_historico_pais(pais, dias):
@@ -149,16 +257,172 @@ def obtener_historico_pais(pais, dias):
     Parámetros:
         - pais: nombre del país
         - dias: número de días o 'all' para todo el histórico
+    Retorna (datos, edad_en_segundos), igual que obtener_datos_pais
     """
-    try:
-        url = f"https://disease.sh/v3/covid-19/historical/{pais}"
-        params = {'lastdays': dias}
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error obteniendo histórico: {e}")
-        return None
+    url = f"https://disease.sh/v3/covid-19/historical/{pais}"
+    params = {'lastdays': dias}
+    return obtener_json_cacheado(url, params, ttl=TTL_HISTORICO, descargar=obtener_json)
+
+
+# ==========================================
+# PRECARGA EN SEGUNDO PLANO
+# ==========================================
+
+def _precargar_datos_pais(pais):
+    url = f"https://disease.sh/v3/covid-19/countries/{pais}"
+    refrescar_si_envejece(url, ttl=TTL_DATOS_ACTUALES, descargar=obtener_json)
+
+
+def _precargar_historico_pais(pais, dias):
+    url = f"https://disease.sh/v3/covid-19/historical/{pais}"
+    refrescar_si_envejece(url, {'lastdays': dias}, ttl=TTL_HISTORICO, descargar=obtener_json)
+    # También el DataFrame de métricas, así el primer usuario no paga el cálculo
+    historico, _ = obtener_historico_pais(pais, dias)
+    if historico:
+        metricas_pais(pais, dias, historico)
+
+
+# Las tareas corren antes de que venza el TTL, así la caché nunca queda vencida
+for _opcion_pais in PAISES_COVID:
+    _pais = _opcion_pais['value']
+    precalentamiento.registrar_tarea(
+        f"covid/actual/{_pais}",
+        lambda pais=_pais: _precargar_datos_pais(pais),
+        intervalo=TTL_DATOS_ACTUALES / 2
+    )
+    for _opcion_dias in OPCIONES_DIAS_COVID:
+        _dias = _opcion_dias['value']
+        precalentamiento.registrar_tarea(
+            f"covid/historico/{_pais}/{_dias}",
+            lambda pais=_pais, dias=_dias: _precargar_historico_pais(pais, dias),
+            intervalo=TTL_HISTORICO / 2
+        )
+
+
+def _fig_error_api(texto="⚠️ Error al conectar con la API.<br>Verifica tu conexión a internet."):
+    """
+    Figura vacía con un mensaje de error centrado
+    """
+    fig = go.Figure()
+    fig.add_annotation(
+        text=texto,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False,
+        font=dict(size=16, color="red")
+    )
+    fig.update_layout(
+        paper_bgcolor="lightcyan",
+        plot_bgcolor="white"
+    )
+    return fig
+
+
+def _trazas_panel(df, panel):
+    """
+    Trazas de la gráfica para cada panel a partir del DataFrame de métricas
+    Retorna (trazas, título eje y, título eje y2)
+    """
+    fechas = df.index
+    hover_fecha = '<b>Fecha:</b> %{x|%d/%m/%Y}<br>'
+    
+    if panel == 'nuevos':
+        return [
+            go.Bar(
+                x=fechas, y=df['casos_nuevos'],
+                name='Casos Nuevos',
+                marker_color='rgba(25, 118, 210, 0.3)',
+                hovertemplate=hover_fecha + '<b>Casos nuevos:</b> %{y:,.0f}<extra></extra>'
+            ),
+            go.Scatter(
+                x=fechas, y=df['media_7d_casos'],
+                mode='lines', name='Casos (media 7 días)',
+                line=dict(color='#1976d2', width=2.5),
+                hovertemplate=hover_fecha + '<b>Media 7 días:</b> %{y:,.0f}<extra></extra>'
+            ),
+            go.Scatter(
+                x=fechas, y=df['media_7d_muertes'],
+                mode='lines', name='Muertes (media 7 días)',
+                line=dict(color='#d32f2f', width=2, dash='dash'),
+                yaxis='y2',
+                hovertemplate=hover_fecha + '<b>Muertes (media 7 días):</b> %{y:,.1f}<extra></extra>'
+            ),
+        ], "Casos Diarios", "Muertes Diarias"
+    
+    if panel == 'crecimiento':
+        return [
+            go.Scatter(
+                x=fechas, y=df['crecimiento_log'] * 100,
+                mode='lines', name='Crecimiento (%/día)',
+                line=dict(color='#f57c00', width=2.5),
+                hovertemplate=hover_fecha + '<b>Crecimiento:</b> %{y:.2f} %/día<extra></extra>'
+            ),
+        ], "Crecimiento de casos acumulados (%/día)", ""
+    
+    if panel == 'duplicacion':
+        return [
+            go.Scatter(
+                x=fechas, y=df['tiempo_duplicacion'],
+                mode='lines', name='Tiempo de duplicación',
+                line=dict(color='#388e3c', width=2.5),
+                hovertemplate=hover_fecha + '<b>Duplicación:</b> %{y:,.0f} días<extra></extra>'
+            ),
+        ], "Tiempo de duplicación (días)", ""
+    
+    if panel == 'rt':
+        return [
+            # Banda de credibilidad: límite superior y luego el inferior rellenando hasta él
+            go.Scatter(
+                x=fechas, y=df['rt_superior'],
+                mode='lines', line=dict(width=0),
+                showlegend=False, hoverinfo='skip'
+            ),
+            go.Scatter(
+                x=fechas, y=df['rt_inferior'],
+                mode='lines', line=dict(width=0),
+                fill='tonexty', fillcolor='rgba(123, 31, 162, 0.2)',
+                name='IC 95%', hoverinfo='skip'
+            ),
+            go.Scatter(
+                x=fechas, y=df['rt'],
+                mode='lines', name='Rt',
+                line=dict(color='#7b1fa2', width=2.5),
+                hovertemplate=hover_fecha + '<b>Rt:</b> %{y:.2f}<extra></extra>'
+            ),
+            go.Scatter(
+                x=[fechas.min(), fechas.max()] if len(fechas) else [], y=[1, 1],
+                mode='lines', name='Rt = 1',
+                line=dict(color='black', width=1, dash='dot'),
+                hoverinfo='skip'
+            ),
+        ], "Número de reproducción efectivo (Rt)", ""
+    
+    # Panel por defecto: totales acumulados
+    return [
+        go.Scatter(
+            x=fechas,
+            y=df['casos'],
+            mode='lines',
+            name='Casos Totales',
+            line=dict(color='#1976d2', width=2.5),
+            fill='tozeroy',
+            fillcolor='rgba(25, 118, 210, 0.1)',
+            hovertemplate=hover_fecha +
+                          '<b>Casos:</b> %{y:,.0f}<br>' +
+                          '<extra></extra>'
+        ),
+        # Línea de muertes (en eje secundario)
+        go.Scatter(
+            x=fechas,
+            y=df['muertes'],
+            mode='lines',
+            name='Muertes Totales',
+            line=dict(color='#d32f2f', width=2, dash='dash'),
+            yaxis='y2',
+            hovertemplate=hover_fecha +
+                          '<b>Muertes:</b> %{y:,.0f}<br>' +
+                          '<extra></extra>'
+        ),
+    ], "Casos Totales", "Muertes Totales"
 
 
 def formatear_numero(numero):
@@ -183,141 +447,131 @@ def formatear_numero(numero):
      Output("total-recuperados", "children"),
      Output("info-actualizado-covid", "children")],
     [Input("btn-actualizar-covid", "n_clicks"),
+     Input("dropdown-panel-covid", "value"),
      State("dropdown-pais", "value"),
      State("dropdown-dias-covid", "value")],
     prevent_initial_call=False
 )
-def actualizar_dashboard_covid(n_clicks, pais, dias):
+def actualizar_dashboard_covid(n_clicks, panel, pais, dias):
     """
     Callback que actualiza todo el dashboard cuando cambian los inputs
     """
     
-    # PASO 1: Obtener datos actuales del país
-    datos_actuales = obtener_datos_pais(pais)
-    historico = obtener_historico_pais(pais, dias)
+    # PASO 0: El botón pide datos nuevos a la API sin hacer esperar al callback
+    actualizando = bool(n_clicks) and dash.ctx.triggered_id == "btn-actualizar-covid"
+    if actualizando:
+        revalidar_en_segundo_plano(f"https://disease.sh/v3/covid-19/countries/{pais}",
+                                   descargar=obtener_json)
+        revalidar_en_segundo_plano(f"https://disease.sh/v3/covid-19/historical/{pais}",
+                                   {'lastdays': dias}, obtener_json)
+    
+    # PASO 1: Obtener datos actuales e histórico en paralelo (plazo común)
+    with fase("red"):
+        resultados = ejecutar_en_paralelo({
+            'actuales': (obtener_datos_pais, (pais,)),
+            'historico': (obtener_historico_pais, (pais, dias)),
+        }, plazo=PLAZO_CONSULTAS)
+    datos_actuales, edad_actuales = resultados['actuales'] or (None, None)
+    historico, edad_historico = resultados['historico'] or (None, None)
     
     # PASO 2: Validar que la API respondió correctamente
-    if not datos_actuales or not historico:
-        # Crear figura vacía con mensaje de error
-        fig = go.Figure()
-        fig.add_annotation(
-            text="⚠️ Error al conectar con la API.<br>Verifica tu conexión a internet.",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=16, color="red")
-        )
-        fig.update_layout(
-            paper_bgcolor="lightcyan",
-            plot_bgcolor="white"
-        )
-        return fig, "N/A", "N/A", "N/A", "N/A", "❌ Error al cargar datos"
+    if not datos_actuales and not historico:
+        return _fig_error_api(), "N/A", "N/A", "N/A", "N/A", "❌ Error al cargar datos"
     
-    # PASO 3: Extraer datos actuales
-    total_casos = datos_actuales.get('cases', 0)
-    casos_hoy = datos_actuales.get('todayCases', 0)
-    total_muertes = datos_actuales.get('deaths', 0)
-    total_recuperados = datos_actuales.get('recovered', 0)
+    # PASO 3: Extraer datos actuales (si no llegaron, las tarjetas quedan en N/A)
+    if datos_actuales:
+        total_casos = datos_actuales.get('cases', 0)
+        casos_hoy = datos_actuales.get('todayCases', 0)
+        total_muertes = datos_actuales.get('deaths', 0)
+        total_recuperados = datos_actuales.get('recovered', 0)
+    else:
+        total_casos = casos_hoy = total_muertes = total_recuperados = None
     
     # PASO 4: Formatear números para mostrar
     total_casos_texto = formatear_numero(total_casos)
-    casos_hoy_texto = f"+{formatear_numero(casos_hoy)}"
+    casos_hoy_texto = f"+{formatear_numero(casos_hoy)}" if casos_hoy is not None else "N/A"
     total_muertes_texto = formatear_numero(total_muertes)
     total_recuperados_texto = formatear_numero(total_recuperados)
     
-    # PASO 5: Procesar datos históricos
-    timeline = historico.get('timeline', {})
-    casos_historicos = timeline.get('cases', {})
-    muertes_historicas = timeline.get('deaths', {})
-    
-    # Convertir diccionarios a listas
-    fechas = list(casos_historicos.keys())
-    valores_casos = list(casos_historicos.values())
-    valores_muertes = list(muertes_historicas.values())
-    
-    # Convertir fechas de string a datetime
-    fechas_dt = [datetime.strptime(fecha, '%m/%d/%y') for fecha in fechas]
-    
-    # PASO 6: Crear la gráfica con Plotly
-    fig = go.Figure()
+    # Sin histórico solo se muestran las tarjetas
+    if not historico:
+        return (
+            _fig_error_api("⚠️ No se pudo obtener el histórico.<br>Se muestran solo los datos actuales."),
+            total_casos_texto,
+            casos_hoy_texto,
+            total_muertes_texto,
+            total_recuperados_texto,
+            f"⚠️ Histórico no disponible | Datos actuales: {formatear_edad(edad_actuales)}"
+        )
     
-    # Línea de casos totales
-    fig.add_trace(go.Scatter(
-        x=fechas_dt,
-        y=valores_casos,
-        mode='lines',
-        name='Casos Totales',
-        line=dict(color='#1976d2', width=2.5),
-        fill='tozeroy',
-        fillcolor='rgba(25, 118, 210, 0.1)',
-        hovertemplate='<b>Fecha:</b> %{x|%d/%m/%Y}<br>' +
-                      '<b>Casos:</b> %{y:,.0f}<br>' +
-                      '<extra></extra>'
-    ))
+    # PASO 5: Procesar datos históricos (DataFrame vectorizado y cacheado por país)
+    with fase("calculo"):
+        df = metricas_pais(pais, dias, historico)
     
-    # Línea de muertes (en eje secundario)
-    fig.add_trace(go.Scatter(
-        x=fechas_dt,
-        y=valores_muertes,
-        mode='lines',
-        name='Muertes Totales',
-        line=dict(color='#d32f2f', width=2, dash='dash'),
-        yaxis='y2',
-        hovertemplate='<b>Fecha:</b> %{x|%d/%m/%Y}<br>' +
-                      '<b>Muertes:</b> %{y:,.0f}<br>' +
-                      '<extra></extra>'
-    ))
+    # PASO 6: Crear la gráfica con Plotly según el panel elegido
+    with fase("figura"):
+        fig = go.Figure()
+        trazas, titulo_y, titulo_y2 = _trazas_panel(df, panel or 'acumulados')
+        for traza in trazas:
+            fig.add_trace(traza)
     
-    # PASO 7: Configurar el layout de la gráfica
-    fig.update_layout(
-        title=dict(
-            text=f"<b>Evolución COVID-19 en {pais}</b>",
-            x=0.5,
-            font=dict(size=16, color="darkblue")
-        ),
-        xaxis_title="Fecha",
-        yaxis_title="Casos Totales",
-        yaxis2=dict(
-            title="Muertes Totales",
-            overlaying='y',
-            side='right',
-            showgrid=False
-        ),
-        paper_bgcolor="lightcyan",
-        plot_bgcolor="white",
-        font=dict(family="Outfit", size=12),
-        hovermode='x unified',
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="center",
-            x=0.5
-        ),
-        margin=dict(l=60, r=60, t=60, b=40)
-    )
+        # PASO 7: Configurar el layout de la gráfica
+        fig.update_layout(
+            title=dict(
+                text=f"<b>Evolución COVID-19 en {pais}</b>",
+                x=0.5,
+                font=dict(size=16, color="darkblue")
+            ),
+            xaxis_title="Fecha",
+            yaxis_title=titulo_y,
+            yaxis2=dict(
+                title=titulo_y2,
+                overlaying='y',
+                side='right',
+                showgrid=False
+            ),
+            paper_bgcolor="lightcyan",
+            plot_bgcolor="white",
+            font=dict(family="Outfit", size=12),
+            hovermode='x unified',
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="center",
+                x=0.5
+            ),
+            margin=dict(l=60, r=60, t=60, b=40)
+        )
     
-    # Configurar ejes
-    fig.update_xaxes(
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightpink',
-        zeroline=True,
-        zerolinewidth=2,
-        zerolinecolor='black'
-    )
+        # Configurar ejes
+        fig.update_xaxes(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightpink',
+            zeroline=True,
+            zerolinewidth=2,
+            zerolinecolor='black'
+        )
     
-    fig.update_yaxes(
-        showgrid=True,
-        gridwidth=1,
-        gridcolor='lightpink',
-        zeroline=True,
-        zerolinewidth=2,
-        zerolinecolor='black'
-    )
+        fig.update_yaxes(
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightpink',
+            zeroline=True,
+            zerolinewidth=2,
+            zerolinecolor='black'
+        )
     
     # PASO 8: Crear mensaje de actualización
     ahora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-    mensaje = f"✅ Datos actualizados: {ahora}"
+    mensaje = f"✅ Consultado: {ahora} | Histórico: {formatear_edad(edad_historico)}"
+    if datos_actuales:
+        mensaje += f" | Datos actuales: {formatear_edad(edad_actuales)}"
+    else:
+        mensaje += " | ⚠️ Datos actuales no disponibles"
+    if actualizando:
+        mensaje += " | 🔄 Descargando datos nuevos; vuelve a consultar en unos segundos"
     
     # PASO 9: Retornar todos los outputs
     return (
@@ -327,4 +581,65 @@ def actualizar_dashboard_covid(n_clicks, pais, dias):
         total_muertes_texto,
         total_recuperados_texto,
         mensaje
-    )
\ No newline at end of file
+    )
+
+
+# ==========================================
+# COMPARACIÓN ENTRE PAÍSES
+# ==========================================
+
+@callback(
+    [Output("grafica-comparacion-covid", "figure"),
+     Output("dropdown-comparar-paises", "options"),
+     Output("info-comparacion-covid", "children")],
+    [Input("dropdown-comparar-paises", "value"),
+     Input("radio-metrica-comparacion", "value"),
+     Input("dropdown-dias-comparacion", "value"),
+     Input("check-por-100k", "value")],
+    prevent_initial_call=False
+)
+def actualizar_comparacion_covid(paises, metrica, dias, por_100k):
+    """
+    Superpone la métrica elegida para varios países desde el índice en memoria
+    """
+    indice = obtener_indice()
+    if indice is None:
+        return _fig_error_api(), dash.no_update, "❌ Los datos globales aún no están disponibles; se preparan en segundo plano"
+
+    paises = [p for p in (paises or []) if p in indice.posicion]
+    normalizar = 'por_100k' in (por_100k or []) and metrica != 'rt'
+    inicio = 0 if dias == 'all' else max(len(indice.fechas) - int(dias), 0)
+    fechas = indice.fechas[inicio:]
+
+    with fase("figura"):
+        fig = go.Figure()
+        for pais in paises:
+            fig.add_trace(go.Scatter(
+                x=fechas,
+                y=indice.serie(pais, metrica, normalizar)[inicio:],
+                mode='lines',
+                name=pais,
+                line=dict(width=2),
+                hovertemplate='<b>%{fullData.name}:</b> %{y:,.1f}<extra></extra>'
+            ))
+
+        etiqueta = next(o['label'] for o in OPCIONES_METRICA_COMPARACION if o['value'] == metrica)
+        fig.update_layout(
+            title=dict(
+                text=f"<b>{etiqueta}{' por 100 mil habitantes' if normalizar else ''}</b>",
+                x=0.5,
+                font=dict(size=16, color="darkblue")
+            ),
+            xaxis_title="Fecha",
+            yaxis_title=etiqueta,
+            paper_bgcolor="lightcyan",
+            plot_bgcolor="white",
+            font=dict(family="Outfit", size=12),
+            hovermode='x unified',
+            margin=dict(l=60, r=30, t=60, b=40)
+        )
+        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='lightpink')
+        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='lightpink')
+
+    mensaje = f"✅ {len(indice.paises)} países en memoria | Mostrando {len(paises)}"
+    return fig, indice.paises, mensaje
\ No newline at end of file
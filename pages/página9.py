@@ -1,75 +1,14 @@
 import dash
-from dash import html, dcc, callback, Input, Output
+from dash import html, dcc, dash_table, callback, Input, Output
 import plotly.graph_objects as go
 import numpy as np
-from scipy.optimize import curve_fit
-import requests
 
-dash.register_page(__name__, path='/malaria-ajuste', name='SEIR-SEI')
+from utils.ajuste import bandas_bootstrap, modelo_exponencial_lineal
+from utils import precalentamiento
+from utils.ajustes_malaria import obtener_ajuste, tabla_calidad_ajustes
+from utils.datos_malaria import INTERVALO_REFRESCO, datos_disponibles
 
-def obtener_datos_malaria_api(pais_codigo):
-    """
-    Obtiene datos REALES de tu API del Banco Mundial
-    """
-    url = "https://data360api.worldbank.org/data360/data?DATABASE_ID=WEF_GCIHH&INDICATOR=WEF_GCIHH_MALARIAPC&skip=0"
-    
-    try:
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        
-        años = []
-        rankings = []
-        
-        for item in data['value']:
-            if (item.get('REF_AREA') == pais_codigo and 
-                item.get('OBS_VALUE') is not None and
-                item.get('TIME_PERIOD') is not None and
-                item.get('UNIT_MEASURE') == 'RANK'):
-                
-                año = int(item['TIME_PERIOD'])
-                if 2007 <= año <= 2017:
-                    ranking = float(item['OBS_VALUE'])
-                    años.append(año)
-                    rankings.append(ranking)
-        
-        if años:
-            datos_ordenados = sorted(zip(años, rankings))
-            años_ordenados = [d[0] for d in datos_ordenados]
-            rankings_ordenados = [d[1] for d in datos_ordenados]
-            return años_ordenados, rankings_ordenados
-        else:
-            return None, None
-            
-    except Exception as e:
-        print(f"Error API: {e}")
-        return None, None
-
-def transformar_ranking_a_casos(rankings):
-    """
-    Convierte rankings a números que se parezcan a casos de malaria
-    Ranking 1 = muchos casos, Ranking alto = pocos casos
-    """
-    rankings = np.array(rankings)
-    casos_estimados = 100000 / (rankings + 10)
-    return casos_estimados * 80
-
-def modelo_ranking_malaria(t, a, b, c, d):
-    """
-    Modelo para ajustar la evolución de rankings/casos de malaria
-    """
-    return a * np.exp(-b * t) + c * t + d
-
-def ajuste_minimos_cuadrados(x_data, y_data, modelo, parametros_iniciales):
-    try:
-        parametros_optimos, pcov = curve_fit(
-            modelo, x_data, y_data, 
-            p0=parametros_iniciales,
-            maxfev=5000
-        )
-        y_pred = modelo(x_data, *parametros_optimos)
-        return parametros_optimos, y_pred, pcov
-    except Exception as e:
-        raise Exception(f"Error en ajuste: {str(e)}")
+dash.register_page(__name__, path='/malaria-ajuste', name='SEIR-SEI')
 
 paises = [
     {"label": "Argentina", "value": "ARG"},
@@ -84,6 +23,15 @@ paises = [
     {"label": "Republica Dominicana", "value": "DOM"}
 ]
 
+def _precargar_ajustes():
+    # Asegura ingesta + ajuste en lote y deja listos los países del selector.
+    # La primera ingesta del Banco Mundial ocurre aquí, no en una petición
+    for pais in paises:
+        obtener_ajuste(pais["value"])
+
+
+precalentamiento.registrar_tarea("malaria/ajustes", _precargar_ajustes, intervalo=INTERVALO_REFRESCO / 4)
+
 layout = html.Div([
     html.H2("Ajuste por Mínimos Cuadrados - Datos Reales de API", 
              style={'textAlign': 'center', 'color': '#2E86AB', 'marginBottom': '20px'}),
@@ -92,7 +40,7 @@ layout = html.Div([
         html.H4("Metodología del Artículo Aplicada a Datos Reales"),
         html.P("• Fuente: API Banco Mundial - Rankings de Malaria"),
         html.P("• Período: 2007-2017"),
-        html.P("• Método: Mínimos cuadrados no lineales"),
+        html.P("• Método: Mínimos cuadrados no lineales (proyección variable)"),
         html.P("• Transformación: Rankings → Casos estimados")
     ], style={
         'backgroundColor': '#f8f9fa', 
@@ -124,18 +72,69 @@ layout = html.Div([
     
     html.Br(), html.Br(),
     
-    dcc.Graph(id="grafica-ajuste"),
+    # Avance del ajuste (se ejecuta en segundo plano)
+    html.Progress(id="progreso-ajuste", value="0", max="100", style={'width': '100%'}),
+    
+    dcc.Graph(id="grafica-ajuste", figure=go.Figure().update_layout(
+        title="Selecciona un país y presiona el botón",
+        xaxis_title="Año",
+        yaxis_title="Casos de Malaria (estimados)"
+    )),
     
-    html.Div(id="resultados-ajuste", style={'marginTop': '30px'})
+    html.Div(id="resultados-ajuste", style={'marginTop': '30px'}),
+    
+    html.Div([
+        html.H4("Calidad del ajuste por país (todos los países del dataset)"),
+        dash_table.DataTable(
+            id="tabla-ajustes",
+            columns=[
+                {"name": "País", "id": "pais"},
+                {"name": "R²", "id": "r_cuadrado", "type": "numeric"},
+                {"name": "a", "id": "a", "type": "numeric"},
+                {"name": "b", "id": "b", "type": "numeric"},
+                {"name": "c", "id": "c", "type": "numeric"},
+                {"name": "d", "id": "d", "type": "numeric"},
+                {"name": "Puntos", "id": "puntos", "type": "numeric"},
+            ],
+            sort_action="native",
+            page_size=15,
+            style_cell={'textAlign': 'center', 'padding': '6px'},
+            style_header={'backgroundColor': '#2E86AB', 'color': 'white', 'fontWeight': 'bold'}
+        )
+    ], style={'marginTop': '30px'})
 ])
 
+# Se llena al cargar la página con los ajustes guardados en el almacén; si
+# todavía no hubo ingesta queda vacía hasta el próximo clic
+@callback(
+    Output("tabla-ajustes", "data"),
+    Input("btn-ajuste", "n_clicks"),
+    prevent_initial_call=False
+)
+def actualizar_tabla_ajustes(n_clicks):
+    try:
+        if not datos_disponibles():
+            return []
+        return tabla_calidad_ajustes()
+    except Exception as e:
+        print(f"Error API: {e}")
+        return []
+
+# En segundo plano (utils.trabajos): cambiar de país mientras corre cancela el
+# trabajo anterior. n_clicks queda en la clave de la caché de resultados: Dash
+# guarda lo que devuelva el trabajo (también el aviso inicial, un PreventUpdate
+# o un error), y sin n_clicks ese resultado se serviría en el próximo clic
 @callback(
     [Output("grafica-ajuste", "figure"),
      Output("resultados-ajuste", "children")],
     [Input("btn-ajuste", "n_clicks"),
-     Input("selector-pais", "value")]
+     Input("selector-pais", "value")],
+    background=True,
+    running=[(Output("btn-ajuste", "disabled"), True, False)],
+    progress=[Output("progreso-ajuste", "value"), Output("progreso-ajuste", "max")],
+    prevent_initial_call=True
 )
-def ejecutar_ajuste_api_real(n_clicks, pais_seleccionado):
+def ejecutar_ajuste_api_real(set_progress, n_clicks, pais_seleccionado):
     if n_clicks is None:
         fig = go.Figure()
         fig.update_layout(
@@ -146,38 +145,56 @@ def ejecutar_ajuste_api_real(n_clicks, pais_seleccionado):
         return fig, ""
     
     try:
-        años, rankings = obtener_datos_malaria_api(pais_seleccionado)
+        # Los ajustes de todos los países se calculan en lote y quedan guardados
+        set_progress(("10", "100"))
+        ajuste = obtener_ajuste(pais_seleccionado)
+        set_progress(("30", "100"))
         
-        if años is None or rankings is None:
+        if ajuste is None:
             return go.Figure(), html.Div([
                 html.H4("Datos no disponibles"),
                 html.P(f"No se encontraron datos para {pais_seleccionado} en 2007-2017"),
                 html.P("Intenta con otro país como Ghana, Nigeria, Kenya...")
             ], style={'backgroundColor': '#ffebee', 'padding': '15px', 'borderRadius': '10px'})
         
-        casos_estimados = transformar_ranking_a_casos(rankings)
+        años = ajuste["años"]
+        rankings = ajuste["rankings"]
+        casos_estimados = ajuste["casos"]
         
         t = np.array(años) - min(años)
-        y = casos_estimados
-        
-        parametros_iniciales = [max(y)-min(y), 0.1, 0.1, min(y)]
-        
-        parametros_optimos, y_pred, covarianza = ajuste_minimos_cuadrados(
-            t, y, modelo_ranking_malaria, parametros_iniciales
-        )
         
+        parametros_optimos = ajuste["parametros"]
         a_opt, b_opt, c_opt, d_opt = parametros_optimos
         
-        ss_res = np.sum((y - y_pred) ** 2)
-        ss_tot = np.sum((y - np.mean(y)) ** 2)
-        r_cuadrado = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+        ss_res = ajuste["sse"]
+        r_cuadrado = ajuste["r_cuadrado"]
         
         t_suave = np.linspace(min(t), max(t), 300)
-        y_suave = modelo_ranking_malaria(t_suave, *parametros_optimos)
+        y_suave = modelo_exponencial_lineal(t_suave, *parametros_optimos)
         años_suave = t_suave + min(años)
         
+        # Bandas al 95% con 2000 reajustes bootstrap (vectorizados)
+        bandas = bandas_bootstrap(t, casos_estimados, parametros_optimos, t_suave)
+        set_progress(("80", "100"))
+        
         fig = go.Figure()
         
+        for nombre, (inferior, superior), color in [
+            ('predicción 95%', bandas['prediccion'], 'rgba(46, 134, 171, 0.12)'),
+            ('confianza 95%', bandas['confianza'], 'rgba(46, 134, 171, 0.30)'),
+        ]:
+            fig.add_trace(go.Scatter(
+                x=años_suave, y=superior,
+                mode='lines', line=dict(width=0),
+                showlegend=False, hoverinfo='skip'
+            ))
+            fig.add_trace(go.Scatter(
+                x=años_suave, y=inferior,
+                mode='lines', line=dict(width=0),
+                fill='tonexty', fillcolor=color,
+                name=nombre, hoverinfo='skip'
+            ))
+        
         fig.add_trace(go.Scatter(
             x=años, y=casos_estimados,
             mode='markers',
@@ -211,7 +228,7 @@ def ejecutar_ajuste_api_real(n_clicks, pais_seleccionado):
                 dict(
                     x=0.02, y=0.98,
                     xref="paper", yref="paper",
-                    text="• data<br>— bestfit",
+                    text="• data<br>— bestfit<br>▒ bandas bootstrap 95%",
                     showarrow=False,
                     bgcolor="white",
                     bordercolor="black",
@@ -243,7 +260,8 @@ def ejecutar_ajuste_api_real(n_clicks, pais_seleccionado):
                 html.P(f"• R² (bondad de ajuste): {r_cuadrado:.4f}"),
                 html.P(f"• Suma de cuadrados de residuos: {ss_res:.2f}"),
                 html.P(f"• Número de puntos: {len(años)}"),
-                html.P("• Método: Mínimos cuadrados no lineales")
+                html.P("• Método: Mínimos cuadrados no lineales (proyección variable)"),
+                html.P("• Bandas: bootstrap de residuos, 2000 reajustes, 95%")
             ], style={'backgroundColor': '#fff3e0', 'padding': '15px', 'borderRadius': '5px', 'marginTop': '10px'}),
             
             html.Div([
@@ -256,6 +274,7 @@ def ejecutar_ajuste_api_real(n_clicks, pais_seleccionado):
             
         ])
         
+        set_progress(("100", "100"))
         return fig, resultados_html
         
     except Exception as e:
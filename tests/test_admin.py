@@ -0,0 +1,42 @@
+"""
+Pruebas del acceso a las rutas de administración (utils.admin).
+"""
+import pytest
+from flask import Flask
+
+from utils import admin
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+
+    @app.route("/admin/prueba")
+    @admin.requiere_admin
+    def prueba():
+        return "ok"
+
+    return app
+
+
+def _es_admin(app, cabeceras):
+    with app.test_request_context("/", headers=cabeceras):
+        return admin.es_admin()
+
+
+def test_sin_token_configurado_nadie_es_admin(app, monkeypatch):
+    monkeypatch.setattr(admin, "TOKEN", None)
+    assert not _es_admin(app, {admin.CABECERA: ""})
+    assert app.test_client().get("/admin/prueba").status_code == 404
+
+
+def test_token_correcto_e_incorrecto(app, monkeypatch):
+    monkeypatch.setattr(admin, "TOKEN", "secreto")
+    assert _es_admin(app, {admin.CABECERA: "secreto"})
+    assert not _es_admin(app, {admin.CABECERA: "secret"})
+    assert not _es_admin(app, {})
+
+    cliente = app.test_client()
+    assert cliente.get("/admin/prueba").status_code == 403
+    assert cliente.get("/admin/prueba", headers={admin.CABECERA: "otro"}).status_code == 403
+    assert cliente.get("/admin/prueba", headers={admin.CABECERA: "secreto"}).status_code == 200
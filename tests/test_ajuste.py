@@ -0,0 +1,69 @@
+"""
+Pruebas del ajuste por proyección variable (utils.ajuste).
+"""
+import numpy as np
+import pytest
+
+from utils.ajuste import (
+    ajuste_proyeccion_variable_lote, bandas_bootstrap, modelo_exponencial_lineal, rango_b_para
+)
+
+T = np.arange(11.0)
+
+
+@pytest.mark.parametrize("parametros", [
+    (3000.0, 0.35, -40.0, 1200.0),      # decaimiento
+    (-800.0, 1.2, 15.0, 500.0),
+    (5.0, -0.3, 2.0, 100.0),            # exponencial creciente (b < 0)
+])
+def test_recupera_parametros_sin_ruido(parametros):
+    y = modelo_exponencial_lineal(T, *parametros)
+    obtenidos, sse = ajuste_proyeccion_variable_lote(T, y[None, :])
+    np.testing.assert_allclose(obtenidos[0], parametros, rtol=1e-4, atol=1e-3)
+    assert sse[0] < 1e-6 * np.sum(y ** 2)
+
+
+def test_lote_igual_que_series_sueltas():
+    rng = np.random.default_rng(0)
+    Y = np.array([
+        modelo_exponencial_lineal(T, 2000, 0.4, 10, 900),
+        modelo_exponencial_lineal(T, -500, 0.1, -5, 3000),
+    ]) + rng.normal(0, 20, (2, len(T)))
+    juntas, sse_juntas = ajuste_proyeccion_variable_lote(T, Y)
+    for i in range(2):
+        sola, sse_sola = ajuste_proyeccion_variable_lote(T, Y[i:i + 1])
+        np.testing.assert_allclose(juntas[i], sola[0], rtol=1e-5)
+        np.testing.assert_allclose(sse_juntas[i], sse_sola[0], rtol=1e-5)
+
+
+def test_serie_plana_no_falla():
+    parametros, sse = ajuste_proyeccion_variable_lote(T, np.full((1, len(T)), 7.0))
+    a, _, c, d = parametros[0]
+    assert abs(a) < 1e-9 and abs(c) < 1e-9
+    assert np.isclose(d, 7.0)
+    assert sse[0] < 1e-12
+
+
+def test_amplia_un_rango_que_no_contiene_el_minimo():
+    y = modelo_exponencial_lineal(T, 5.0, -0.3, 2.0, 100.0)
+    parametros, _ = ajuste_proyeccion_variable_lote(T, y[None, :], rango_b=(1e-3, 5.0))
+    assert np.isclose(parametros[0, 1], -0.3, rtol=1e-3)
+
+
+def test_rango_b_segun_los_tiempos():
+    b_min, b_max = rango_b_para(T)
+    assert b_min < 0 < b_max
+
+
+def test_bandas_bootstrap_contienen_el_ajuste():
+    rng = np.random.default_rng(1)
+    y = modelo_exponencial_lineal(T, 2000, 0.4, 10, 900) + rng.normal(0, 30, len(T))
+    parametros, _ = ajuste_proyeccion_variable_lote(T, y[None, :])
+    t_eval = np.linspace(0, 10, 50)
+    bandas = bandas_bootstrap(T, y, parametros[0], t_eval, muestras=300)
+
+    curva = modelo_exponencial_lineal(t_eval, *parametros[0])
+    (ci_inf, ci_sup), (pi_inf, pi_sup) = bandas["confianza"], bandas["prediccion"]
+    assert np.all(ci_inf <= curva + 1e-6) and np.all(curva <= ci_sup + 1e-6)
+    # La banda de predicción incluye el ruido: es más ancha que la de confianza
+    assert np.all(pi_sup - pi_inf >= ci_sup - ci_inf)
@@ -0,0 +1,105 @@
+"""
+Pruebas de la caché en disco con stale-while-revalidate (utils.cache).
+"""
+import threading
+import time
+
+import pytest
+
+from utils import cache
+
+URL = "https://api.ejemplo/datos"
+
+
+@pytest.fixture(autouse=True)
+def cache_temporal(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "RUTA_CACHE", str(tmp_path / "respuestas.sqlite"))
+
+
+class Descarga:
+    """
+    Descarga simulada que cuenta las llamadas y avisa cuando termina
+    """
+
+    def __init__(self, respuesta=None, error=None):
+        self.respuesta = respuesta
+        self.error = error
+        self.llamadas = 0
+        self.hecha = threading.Event()
+
+    def __call__(self, url, params):
+        self.llamadas += 1
+        try:
+            if self.error is not None:
+                raise self.error
+            return self.respuesta
+        finally:
+            self.hecha.set()
+
+
+def _envejecer(segundos, monkeypatch):
+    ahora = time.time() + segundos
+    monkeypatch.setattr(cache.time, "time", lambda: ahora)
+
+
+def _esperar_revalidacion(clave):
+    for _ in range(200):
+        with cache._lock_revalidando:
+            if clave not in cache._revalidando:
+                return
+        time.sleep(0.01)
+    raise AssertionError("la revalidación no terminó")
+
+
+def test_primera_lectura_descarga_y_guarda():
+    descarga = Descarga({"casos": 1})
+    assert cache.obtener_json_cacheado(URL, {"a": 1}, ttl=60, descargar=descarga) == ({"casos": 1}, 0.0)
+    assert descarga.llamadas == 1
+
+
+def test_entrada_fresca_no_descarga():
+    cache.obtener_json_cacheado(URL, ttl=60, descargar=Descarga({"casos": 1}))
+    descarga = Descarga({"casos": 2})
+    datos, edad = cache.obtener_json_cacheado(URL, ttl=60, descargar=descarga)
+    assert datos == {"casos": 1}
+    assert edad < 60
+    assert descarga.llamadas == 0
+
+
+def test_entrada_vencida_se_sirve_y_se_revalida(monkeypatch):
+    cache.obtener_json_cacheado(URL, ttl=60, descargar=Descarga({"casos": 1}))
+    _envejecer(120, monkeypatch)
+
+    descarga = Descarga({"casos": 2})
+    datos, edad = cache.obtener_json_cacheado(URL, ttl=60, descargar=descarga)
+    # Se responde al instante con el dato viejo; la descarga va en segundo plano
+    assert datos == {"casos": 1}
+    assert edad >= 120
+    assert descarga.hecha.wait(5)
+    _esperar_revalidacion(cache.clave_cache(URL))
+    assert cache.leer_entrada(cache.clave_cache(URL))[0] == {"casos": 2}
+
+
+def test_error_sin_datos_guardados():
+    descarga = Descarga(error=ConnectionError("sin red"))
+    assert cache.obtener_json_cacheado(URL, ttl=60, descargar=descarga) == (None, None)
+    assert cache.leer_entrada(cache.clave_cache(URL)) == (None, None)
+
+
+def test_error_al_revalidar_conserva_la_entrada(monkeypatch):
+    cache.obtener_json_cacheado(URL, ttl=60, descargar=Descarga({"casos": 1}))
+    _envejecer(120, monkeypatch)
+
+    descarga = Descarga(error=ConnectionError("sin red"))
+    assert cache.obtener_json_cacheado(URL, ttl=60, descargar=descarga)[0] == {"casos": 1}
+    assert descarga.hecha.wait(5)
+    _esperar_revalidacion(cache.clave_cache(URL))
+    assert cache.leer_entrada(cache.clave_cache(URL))[0] == {"casos": 1}
+
+
+def test_cambiar_de_ruta_prepara_la_nueva_base(tmp_path, monkeypatch):
+    cache.guardar_entrada("a", {"n": 1})
+    monkeypatch.setattr(cache, "RUTA_CACHE", str(tmp_path / "otra" / "respuestas.sqlite"))
+    assert cache.leer_entrada("a") == (None, None)
+    cache.guardar_entrada("a", {"n": 2})
+    assert cache.leer_entrada("a")[0] == {"n": 2}
@@ -0,0 +1,45 @@
+"""
+Pruebas de la calibración SIR (utils.calibracion_sir).
+"""
+import numpy as np
+
+from utils.calibracion_sir import calibrar_sir, recortar_serie, simular_con_sensibilidades
+
+N = 1_000_000.0
+PARAMETROS = np.array([0.35, 0.1, 50.0, 1000.0])     # β, γ, I₀, R₀
+T = np.linspace(0, 60, 61)
+
+
+def test_sensibilidades_coinciden_con_diferencias_finitas():
+    _, _, Z = simular_con_sensibilidades(T, *PARAMETROS, N)
+    for j in range(4):
+        paso = 1e-6 * max(abs(PARAMETROS[j]), 1.0)
+        mas, menos = PARAMETROS.copy(), PARAMETROS.copy()
+        mas[j] += paso
+        menos[j] -= paso
+        S_mas, I_mas, _ = simular_con_sensibilidades(T, *mas, N)
+        S_menos, I_menos, _ = simular_con_sensibilidades(T, *menos, N)
+        numerica = np.stack([S_mas - S_menos, I_mas - I_menos], axis=1) / (2 * paso)
+        escala = np.abs(numerica).max()
+        np.testing.assert_allclose(Z[:, :, j], numerica, atol=1e-3 * escala)
+
+
+def test_calibra_una_curva_sintetica():
+    S, _, _ = simular_con_sensibilidades(T, *PARAMETROS, N)
+    ajuste = calibrar_sir(N - S, N, inicios=4)
+    assert np.isclose(ajuste["beta"] / ajuste["gamma"], 3.5, rtol=0.05)
+    np.testing.assert_allclose(ajuste["ajustados"], N - S, rtol=1e-3)
+
+
+def test_avance_por_punto_de_partida():
+    S, _, _ = simular_con_sensibilidades(T, *PARAMETROS, N)
+    avances = []
+    calibrar_sir(N - S, N, inicios=3, al_avanzar=lambda hechos, total: avances.append((hechos, total)))
+    assert avances == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_recortar_serie():
+    inicio, serie = recortar_serie([0, 50, 120, 200, 300], dias=2, minimo=100)
+    assert inicio == 2
+    assert list(serie) == [120, 200]
+    assert recortar_serie([0, 1, 2], dias=10, minimo=100) == (None, None)
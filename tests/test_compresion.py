@@ -0,0 +1,44 @@
+"""
+Pruebas de la negociación de Accept-Encoding (utils.compresion).
+"""
+import pytest
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from utils import compresion
+
+
+def _aceptadas(cabecera):
+    return parse_accept_header(cabecera, Accept)
+
+
+@pytest.fixture
+def con_brotli(monkeypatch):
+    monkeypatch.setattr(compresion, "brotli", object())
+
+
+@pytest.fixture
+def sin_brotli(monkeypatch):
+    monkeypatch.setattr(compresion, "brotli", None)
+
+
+def test_prefiere_brotli_en_empate(con_brotli):
+    assert compresion.elegir_codificacion(_aceptadas("gzip, deflate, br")) == "br"
+
+
+def test_respeta_la_calidad(con_brotli):
+    assert compresion.elegir_codificacion(_aceptadas("br;q=0.5, gzip")) == "gzip"
+
+
+def test_sin_brotli_instalado_usa_gzip(sin_brotli):
+    assert compresion.elegir_codificacion(_aceptadas("br, gzip;q=0.8")) == "gzip"
+
+
+def test_ninguna_aceptada(con_brotli):
+    assert compresion.elegir_codificacion(_aceptadas("identity")) is None
+    assert compresion.elegir_codificacion(_aceptadas("gzip;q=0, br;q=0")) is None
+    assert compresion.elegir_codificacion(_aceptadas("")) is None
+
+
+def test_comodin(sin_brotli):
+    assert compresion.elegir_codificacion(_aceptadas("*")) == "gzip"
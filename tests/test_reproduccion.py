@@ -0,0 +1,57 @@
+"""
+Pruebas del estimador de Rt de Cori (utils.reproduccion).
+"""
+import numpy as np
+
+from utils.reproduccion import VENTANA_RT, estimar_rt, intervalo_serial
+
+
+def _incidencia_renovacion(rt, semilla=50.0):
+    """
+    Incidencia determinista que cumple la ecuación de renovación I_t = R_t Λ_t
+    """
+    pesos = intervalo_serial()
+    incidencia = np.zeros(len(rt))
+    incidencia[0] = semilla
+    for t in range(1, len(rt)):
+        k = np.arange(1, min(t, len(pesos) - 1) + 1)
+        incidencia[t] = rt[t] * np.sum(incidencia[t - k] * pesos[k])
+    return incidencia
+
+
+def test_intervalo_serial_es_una_distribucion():
+    pesos = intervalo_serial()
+    assert pesos[0] == 0.0
+    assert np.isclose(pesos.sum(), 1.0)
+    # La media discreta coincide con la del intervalo serial (4.7 días)
+    assert abs(np.sum(np.arange(len(pesos)) * pesos) - 4.7) < 0.1
+
+
+def test_recupera_un_rt_conocido():
+    rt_real = np.r_[np.full(60, 1.4), np.full(60, 0.8)]
+    media, inferior, superior = estimar_rt(_incidencia_renovacion(rt_real) * 1000)
+
+    # Lejos del arranque y del cambio de régimen, la ventana ve un Rt constante
+    for tramo, valor in ((slice(30, 60), 1.4), (slice(90, 120), 0.8)):
+        assert np.allclose(media[tramo], valor, rtol=0.02)
+        assert np.all(inferior[tramo] <= media[tramo])
+        assert np.all(media[tramo] <= superior[tramo])
+
+
+def test_ventana_incompleta_y_poca_senal_son_nan():
+    media, _, _ = estimar_rt(np.r_[np.full(20, 100.0), np.zeros(20)])
+    assert np.all(np.isnan(media[:VENTANA_RT]))
+    # Sin casos en la ventana no hay Rt
+    assert np.all(np.isnan(media[-5:]))
+
+
+def test_matriz_igual_que_series_sueltas():
+    series = np.array([
+        _incidencia_renovacion(np.full(80, 1.2)) * 100,
+        _incidencia_renovacion(np.full(80, 0.9)) * 5000,
+    ])
+    juntas = estimar_rt(series)
+    for i, serie in enumerate(series):
+        sola = estimar_rt(serie)
+        for a, b in zip(juntas, sola):
+            np.testing.assert_allclose(a[i], b, equal_nan=True)
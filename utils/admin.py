@@ -0,0 +1,40 @@
+"""
+Acceso a las rutas de diagnóstico (/admin/...).
+
+Las rutas de administración solo existen si la variable ADMIN_TOKEN está
+definida, y cada petición debe traer ese valor en la cabecera X-Admin-Token.
+Sin ADMIN_TOKEN responden 404, como si no existieran.
+"""
+import hmac
+import os
+from functools import wraps
+
+from flask import abort, request
+
+TOKEN = os.environ.get("ADMIN_TOKEN")
+CABECERA = "X-Admin-Token"
+
+
+def es_admin():
+    """
+    True si la petición en curso trae el token de administración correcto
+    """
+    if not TOKEN:
+        return False
+    enviado = request.headers.get(CABECERA, "")
+    return hmac.compare_digest(enviado.encode("utf-8"), TOKEN.encode("utf-8"))
+
+
+def requiere_admin(vista):
+    """
+    Decorador para vistas Flask: 404 sin ADMIN_TOKEN configurado, 403 con token incorrecto
+    """
+    @wraps(vista)
+    def protegida(*args, **kwargs):
+        if not TOKEN:
+            abort(404)
+        if not es_admin():
+            abort(403)
+        return vista(*args, **kwargs)
+
+    return protegida
@@ -0,0 +1,257 @@
+"""
+Ajuste por proyección variable del modelo y(t) = a*exp(-b*t) + c*t + d.
+
+Para un b fijo el modelo es lineal en (a, c, d), así que esos tres
+parámetros se obtienen por mínimos cuadrados lineales y solo queda una
+búsqueda en una dimensión sobre b: una malla seguida de una sección áurea
+alrededor del mejor punto. No hay punto inicial ni maxfev, el resultado es
+determinista y una serie plana no provoca errores (el ajuste lineal
+simplemente da a = c = 0).
+
+La malla es uniforme en u = asinh(b / ESCALA_B): casi lineal cerca de b = 0 y
+logarítmica lejos, así cubre b negativos (exponencial creciente) y positivos
+con la misma resolución relativa. El rango sale de los tiempos: en cada
+extremo la exponencial ya cambia en un factor e^DECAIMIENTO_MAXIMO entre dos
+puntos consecutivos (solo pesa el primer punto, o el último), así que el SSE
+es constante más allá. Del lado negativo se corta antes si exp(-b t)
+dejaría de ser representable. Si se pasa un rango más chico y el mínimo de
+alguna serie cae en un extremo, ese extremo se amplía hasta esos límites.
+
+Todas las funciones trabajan con varias series a la vez (matriz Y con una
+serie por fila) para poder ajustar muchos países o muestras bootstrap en
+una sola pasada vectorizada.
+"""
+import numpy as np
+
+ESCALA_B = 1e-3
+DECAIMIENTO_MAXIMO = 40.0     # |b| * paso: más allá la exponencial ya no cambia el SSE
+EXPONENTE_MAXIMO = 300.0      # |b| * max|t| con b < 0: exp(-b t) y a siguen siendo representables
+AMPLIACIONES = 3
+PUNTOS_MALLA = 96
+ITERACIONES_AUREA = 40
+
+_RAZON_AUREA = (np.sqrt(5) - 1) / 2
+
+
+# ==========================================
+# PIEZAS LINEALES
+# ==========================================
+# Con b fijo se proyecta todo sobre el complemento ortogonal de [t, 1]:
+# a = <e⊥, y⊥> / <e⊥, e⊥> con e = exp(-b t), y el SSE sale en forma cerrada.
+# Cada evaluación cuesta O(n) por serie, sin factorizar matrices.
+
+def _proyeccion_tendencia(t):
+    """
+    Matriz A = [t, 1], su pseudoinversa y el proyector sobre su espacio columna
+    """
+    A = np.column_stack([t, np.ones_like(t)])
+    A_pinv = np.linalg.pinv(A)
+    return A, A_pinv, A @ A_pinv
+
+
+def _componente_exponencial(e_perp, y_perp):
+    """
+    Coeficiente a y reducción del SSE que aporta el término exponencial
+    """
+    numerador = np.sum(e_perp * y_perp, axis=-1)
+    denominador = np.sum(e_perp ** 2, axis=-1)
+    # Para b -> 0 la exponencial es casi combinación de t y 1: no aporta nada
+    valido = denominador > 1e-12
+    a = np.where(valido, numerador / np.where(valido, denominador, 1.0), 0.0)
+    return a, a * numerador
+
+
+def _sse_malla(t, Y, malla_b):
+    """
+    Suma de cuadrados de residuos de cada serie para cada b de la malla
+    Y: (m, n), malla_b: (k,) -> (k, m)
+    """
+    _, _, P = _proyeccion_tendencia(t)
+    e = np.exp(-np.asarray(malla_b)[:, None] * t[None, :])   # (k, n)
+    # El SSE no depende de la escala de e: normalizar evita desbordes con b muy negativo
+    e = e / np.max(e, axis=1, keepdims=True)
+    e_perp = e - e @ P
+    y_perp = Y - Y @ P                                        # (m, n)
+
+    numerador = e_perp @ y_perp.T                             # (k, m)
+    denominador = np.sum(e_perp ** 2, axis=1)[:, None]
+    valido = denominador > 1e-12
+    reduccion = np.where(valido, numerador ** 2 / np.where(valido, denominador, 1.0), 0.0)
+    return np.sum(y_perp ** 2, axis=1)[None, :] - reduccion
+
+
+def _ajuste_lineal(t, Y, b):
+    """
+    Coeficientes (a, c, d) y SSE de cada serie con su propio b
+    Y: (m, n), b: (m,) -> coeficientes (m, 3), sse (m,)
+    """
+    _, A_pinv, P = _proyeccion_tendencia(t)
+    e = np.exp(-np.asarray(b)[:, None] * t[None, :])          # (m, n)
+    y_perp = Y - Y @ P
+    a, reduccion = _componente_exponencial(e - e @ P, y_perp)
+
+    c, d = A_pinv @ (Y - a[:, None] * e).T                    # (2, m)
+    sse = np.sum(y_perp ** 2, axis=1) - reduccion
+    return np.column_stack([a, c, d]), np.maximum(sse, 0.0)
+
+
+# ==========================================
+# BÚSQUEDA SOBRE b
+# ==========================================
+
+def _b_desde_u(u):
+    return ESCALA_B * np.sinh(u)
+
+
+def _u_desde_b(b):
+    return np.arcsinh(np.asarray(b, dtype=float) / ESCALA_B)
+
+
+def rango_b_para(t):
+    """
+    Rango (b_min, b_max) de la búsqueda según los tiempos de la serie: fuera
+    de él el SSE ya no cambia (o exp(-b t) no es representable)
+    """
+    tiempos = np.unique(np.asarray(t, dtype=float))
+    if len(tiempos) < 2:
+        return -1.0, 1.0
+    b_max = DECAIMIENTO_MAXIMO / np.min(np.diff(tiempos))
+    b_min = -EXPONENTE_MAXIMO / max(np.max(np.abs(tiempos)), 1e-12)
+    return max(-b_max, b_min), b_max
+
+
+def _malla_ampliada(t, Y, rango_b, puntos_malla):
+    """
+    Malla en u y mejor punto de cada serie; mientras el mínimo de alguna
+    serie caiga en un extremo, ese extremo se aleja otro ancho de la malla
+    (hasta AMPLIACIONES veces, sin salir de rango_b_para(t))
+    """
+    u_tope_izquierda, u_tope_derecha = _u_desde_b(rango_b_para(t))
+    u_min, u_max = _u_desde_b(rango_b)
+    for _ in range(AMPLIACIONES + 1):
+        malla_u = np.linspace(u_min, u_max, puntos_malla)
+        mejor = np.argmin(_sse_malla(t, Y, _b_desde_u(malla_u)), axis=0)
+        en_izquierda = np.any(mejor == 0) and u_min > u_tope_izquierda
+        en_derecha = np.any(mejor == puntos_malla - 1) and u_max < u_tope_derecha
+        if not (en_izquierda or en_derecha):
+            break
+        ancho = u_max - u_min
+        if en_izquierda:
+            u_min = max(u_min - ancho, u_tope_izquierda)
+        if en_derecha:
+            u_max = min(u_max + ancho, u_tope_derecha)
+    return malla_u, mejor
+
+
+def ajuste_proyeccion_variable_lote(t, Y, rango_b=None, puntos_malla=PUNTOS_MALLA,
+                                    iteraciones=ITERACIONES_AUREA):
+    """
+    Ajusta el modelo a varias series que comparten los mismos tiempos
+    Parámetros:
+        - t: tiempos (n,)
+        - Y: observaciones (m, n), una serie por fila
+        - rango_b: (b_min, b_max) inicial; por defecto rango_b_para(t)
+    Retorna:
+        - parametros: (m, 4) con columnas a, b, c, d
+        - sse: (m,) suma de cuadrados de residuos
+    """
+    t = np.asarray(t, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+
+    # 1) Malla en u = asinh(b / ESCALA_B), compartida por todas las series
+    malla_u, mejor = _malla_ampliada(t, Y, rango_b or rango_b_para(t), puntos_malla)
+
+    # 2) Sección áurea (en u) entre los vecinos del mejor punto de la malla
+    izquierda = malla_u[np.maximum(mejor - 1, 0)]
+    derecha = malla_u[np.minimum(mejor + 1, puntos_malla - 1)]
+    x1 = derecha - _RAZON_AUREA * (derecha - izquierda)
+    x2 = izquierda + _RAZON_AUREA * (derecha - izquierda)
+    f1 = _ajuste_lineal(t, Y, _b_desde_u(x1))[1]
+    f2 = _ajuste_lineal(t, Y, _b_desde_u(x2))[1]
+
+    for _ in range(iteraciones):
+        mover_derecha = f1 > f2
+        izquierda = np.where(mover_derecha, x1, izquierda)
+        derecha = np.where(mover_derecha, derecha, x2)
+        nuevo = np.where(
+            mover_derecha,
+            izquierda + _RAZON_AUREA * (derecha - izquierda),
+            derecha - _RAZON_AUREA * (derecha - izquierda)
+        )
+        f_nuevo = _ajuste_lineal(t, Y, _b_desde_u(nuevo))[1]
+        x1, x2, f1, f2 = (
+            np.where(mover_derecha, x2, nuevo),
+            np.where(mover_derecha, nuevo, x1),
+            np.where(mover_derecha, f2, f_nuevo),
+            np.where(mover_derecha, f_nuevo, f1),
+        )
+
+    b = _b_desde_u((izquierda + derecha) / 2)
+    coeficientes, sse = _ajuste_lineal(t, Y, b)
+
+    parametros = np.column_stack([coeficientes[:, 0], b, coeficientes[:, 1], coeficientes[:, 2]])
+    return parametros, sse
+
+
+def modelo_exponencial_lineal(t, a, b, c, d):
+    return a * np.exp(-b * t) + c * t + d
+
+
+def covarianza_parametros(t, parametros, sse):
+    """
+    Covarianza estimada de (a, b, c, d), igual que curve_fit con absolute_sigma=False:
+    s² (JᵀJ)⁻¹ con J el jacobiano del modelo en el óptimo
+    """
+    t = np.asarray(t, dtype=float)
+    a, b, _, _ = parametros
+    exponencial = np.exp(-b * t)
+    J = np.column_stack([exponencial, -a * t * exponencial, t, np.ones_like(t)])
+
+    grados_libertad = len(t) - len(parametros)
+    if grados_libertad <= 0:
+        return np.full((4, 4), np.inf)
+    return np.linalg.pinv(J.T @ J) * (sse / grados_libertad)
+
+
+# ==========================================
+# BANDAS BOOTSTRAP
+# ==========================================
+
+def bandas_bootstrap(t, y, parametros, t_eval, muestras=2000, nivel=0.95, semilla=0):
+    """
+    Bandas de confianza y de predicción por bootstrap de residuos
+    Cada muestra suma al modelo ajustado residuos remuestreados con reemplazo y
+    se reajusta; como todas comparten t, las 'muestras' series se resuelven en
+    una sola llamada a ajuste_proyeccion_variable_lote.
+    Parámetros:
+        - t, y: datos usados en el ajuste
+        - parametros: (a, b, c, d) del ajuste original
+        - t_eval: tiempos donde se evalúan las bandas
+    Retorna:
+        - diccionario con 'confianza' y 'prediccion', cada uno (inferior, superior)
+    """
+    t = np.asarray(t, dtype=float)
+    t_eval = np.asarray(t_eval, dtype=float)
+    rng = np.random.default_rng(semilla)
+
+    y_ajustado = modelo_exponencial_lineal(t, *parametros)
+    residuos = np.asarray(y, dtype=float) - y_ajustado
+    # Corrige el sesgo de los residuos de ajuste (más chicos que los errores reales)
+    n, p = len(t), len(parametros)
+    if n > p:
+        residuos = residuos * np.sqrt(n / (n - p))
+    residuos = residuos - residuos.mean()
+
+    Y = y_ajustado[None, :] + rng.choice(residuos, size=(muestras, n), replace=True)
+    parametros_boot, _ = ajuste_proyeccion_variable_lote(t, Y)
+
+    a, b, c, d = (parametros_boot[:, i:i + 1] for i in range(4))
+    curvas = a * np.exp(-b * t_eval[None, :]) + c * t_eval[None, :] + d     # (muestras, k)
+    predicciones = curvas + rng.choice(residuos, size=curvas.shape, replace=True)
+
+    cola = (1 - nivel) / 2 * 100
+    percentiles = [cola, 100 - cola]
+    return {
+        "confianza": tuple(np.percentile(curvas, percentiles, axis=0)),
+        "prediccion": tuple(np.percentile(predicciones, percentiles, axis=0)),
+    }
@@ -0,0 +1,189 @@
+"""
+Ajuste en lote del modelo de malaria para todos los países del dataset.
+
+Después de cada ingesta (utils.datos_malaria) se ajustan todos los REF_AREA
+de una sola vez: las series que comparten los mismos años se apilan en una
+matriz y se resuelven juntas con ajuste_proyeccion_variable_lote. Los
+parámetros, el R² y la covarianza se guardan en el mismo archivo SQLite que
+los datos, así que cambiar de país en la página es solo una consulta.
+"""
+import json
+import os
+import threading
+from contextlib import closing
+
+import numpy as np
+
+from utils import datos_malaria
+from utils.ajuste import ajuste_proyeccion_variable_lote, covarianza_parametros, modelo_exponencial_lineal
+
+PERIODO = (2007, 2017)
+PUNTOS_MINIMOS = 5
+
+_ajustes = None           # {ref_area: dict con el resultado del ajuste}
+_calculado_en = None      # hora de la ingesta a la que corresponden los ajustes
+_lock = threading.Lock()
+_lock_calculo = threading.Lock()
+
+
+def _reiniciar_tras_fork():
+    global _lock, _lock_calculo
+    _lock = threading.Lock()
+    _lock_calculo = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+def transformar_ranking_a_casos(rankings):
+    """
+    Convierte rankings a números que se parezcan a casos de malaria
+    Ranking 1 = muchos casos, Ranking alto = pocos casos
+    """
+    rankings = np.array(rankings)
+    casos_estimados = 100000 / (rankings + 10)
+    return casos_estimados * 80
+
+
+# ==========================================
+# AJUSTE EN LOTE
+# ==========================================
+
+def _ajustar_grupo(años, series):
+    """
+    Ajusta varias series con los mismos años; retorna una lista de resultados
+    """
+    t = np.array(años) - min(años)
+    Y = np.array([transformar_ranking_a_casos(rankings) for _, rankings in series])
+    parametros, sse = ajuste_proyeccion_variable_lote(t, Y)
+
+    ss_tot = np.sum((Y - Y.mean(axis=1, keepdims=True)) ** 2, axis=1)
+    r_cuadrado = np.where(ss_tot != 0, 1 - sse / np.where(ss_tot != 0, ss_tot, 1.0), 0.0)
+
+    resultados = []
+    for i, (pais, rankings) in enumerate(series):
+        resultados.append({
+            "pais": pais,
+            "años": list(años),
+            "rankings": list(rankings),
+            "parametros": parametros[i].tolist(),
+            "covarianza": covarianza_parametros(t, parametros[i], sse[i]).tolist(),
+            "r_cuadrado": float(r_cuadrado[i]),
+            "sse": float(sse[i]),
+        })
+    return resultados
+
+
+def ajustar_todos_los_paises():
+    """
+    Ajusta todos los países con datos RANK en el período y guarda el resultado
+    Retorna el número de países ajustados
+    """
+    grupos = {}
+    for pais in datos_malaria.paises_disponibles("RANK"):
+        años, rankings = datos_malaria.leer_serie(pais, "RANK", *PERIODO)
+        if años is None or len(años) < PUNTOS_MINIMOS:
+            continue
+        grupos.setdefault(tuple(años), []).append((pais, rankings))
+
+    resultados = []
+    for años, series in grupos.items():
+        resultados.extend(_ajustar_grupo(años, series))
+
+    ingesta = datos_malaria.fecha_actualizacion()
+    with closing(datos_malaria.conectar()) as conexion, conexion:
+        conexion.execute(
+            "CREATE TABLE IF NOT EXISTS ajustes ("
+            " ref_area TEXT PRIMARY KEY,"
+            " resultado TEXT NOT NULL,"
+            " r_cuadrado REAL NOT NULL,"
+            " ingesta REAL NOT NULL)"
+        )
+        conexion.execute("DELETE FROM ajustes")
+        conexion.executemany(
+            "INSERT INTO ajustes (ref_area, resultado, r_cuadrado, ingesta) VALUES (?, ?, ?, ?)",
+            [(r["pais"], json.dumps(r), r["r_cuadrado"], ingesta) for r in resultados]
+        )
+
+    _publicar({r["pais"]: r for r in resultados}, ingesta)
+    return len(resultados)
+
+
+def _publicar(ajustes, ingesta):
+    global _ajustes, _calculado_en
+    with _lock:
+        _ajustes = ajustes
+        _calculado_en = ingesta
+
+
+def _cargar_guardados():
+    """
+    Lee los ajustes del archivo SQLite (si existen y corresponden a la última ingesta)
+    """
+    try:
+        with closing(datos_malaria.conectar()) as conexion:
+            filas = conexion.execute("SELECT resultado, ingesta FROM ajustes").fetchall()
+    except Exception:
+        return False
+
+    if not filas or filas[0][1] != datos_malaria.fecha_actualizacion():
+        return False
+    _publicar({r["pais"]: r for r in (json.loads(f[0]) for f in filas)}, filas[0][1])
+    return True
+
+
+def _asegurar_ajustes():
+    ingesta = datos_malaria.fecha_actualizacion()
+    if _ajustes is not None and _calculado_en == ingesta:
+        return
+    with _lock_calculo:
+        if _ajustes is not None and _calculado_en == datos_malaria.fecha_actualizacion():
+            return
+        if not _cargar_guardados():
+            ajustar_todos_los_paises()
+
+
+# ==========================================
+# CONSULTAS
+# ==========================================
+
+def obtener_ajuste(pais_codigo):
+    """
+    Resultado precalculado del ajuste para un país, o None si no tiene datos suficientes
+    Incluye: años, rankings, casos, parametros, y_pred, covarianza, r_cuadrado, sse
+    """
+    _asegurar_ajustes()
+    resultado = _ajustes.get(pais_codigo)
+    if resultado is None:
+        return None
+
+    casos = transformar_ranking_a_casos(resultado["rankings"])
+    t = np.array(resultado["años"]) - min(resultado["años"])
+    return {
+        **resultado,
+        "parametros": np.array(resultado["parametros"]),
+        "covarianza": np.array(resultado["covarianza"]),
+        "casos": casos,
+        "y_pred": modelo_exponencial_lineal(t, *resultado["parametros"]),
+    }
+
+
+def tabla_calidad_ajustes():
+    """
+    Una fila por país con los parámetros y el R², ordenada de mejor a peor ajuste
+    """
+    _asegurar_ajustes()
+    filas = [
+        {
+            "pais": r["pais"],
+            "r_cuadrado": round(r["r_cuadrado"], 4),
+            "a": round(r["parametros"][0], 4),
+            "b": round(r["parametros"][1], 4),
+            "c": round(r["parametros"][2], 4),
+            "d": round(r["parametros"][3], 4),
+            "puntos": len(r["años"]),
+        }
+        for r in _ajustes.values()
+    ]
+    return sorted(filas, key=lambda f: f["r_cuadrado"], reverse=True)
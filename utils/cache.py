@@ -0,0 +1,218 @@
+"""
+Caché persistente en disco (SQLite) para respuestas de APIs externas.
+
+Cada entrada se guarda con la clave URL + parámetros y la hora en que se
+descargó. Si la entrada está vencida se devuelve igual (dato "stale") y se
+lanza una revalidación en segundo plano, de modo que la página nunca espera
+a la API cuando ya existe algún dato guardado.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+RUTA_CACHE = os.environ.get(
+    "CACHE_RUTA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "respuestas.sqlite")
+)
+
+_revalidando = set()
+_lock_revalidando = threading.Lock()
+_preparadas = set()              # rutas con directorio, WAL y tabla ya creados
+_lock_preparadas = threading.Lock()
+
+
+def _reiniciar_tras_fork():
+    # Los hilos de revalidación del proceso padre no existen en el hijo
+    global _lock_revalidando, _lock_preparadas
+    _revalidando.clear()
+    _lock_revalidando = threading.Lock()
+    _lock_preparadas = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+# ==========================================
+# ACCESO A LA BASE DE DATOS
+# ==========================================
+
+def _preparar(ruta):
+    # WAL queda grabado en el archivo: basta con fijarlo una vez por proceso y ruta
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with closing(sqlite3.connect(ruta, timeout=5)) as conexion:
+        conexion.execute("PRAGMA journal_mode=WAL")
+        conexion.execute(
+            "CREATE TABLE IF NOT EXISTS respuestas ("
+            " clave TEXT PRIMARY KEY,"
+            " guardado REAL NOT NULL,"
+            " contenido TEXT NOT NULL)"
+        )
+
+
+def _conectar():
+    """
+    Abre una conexión nueva (sqlite3 no comparte conexiones entre hilos)
+    El esquema se crea solo la primera vez que el proceso usa cada ruta.
+    """
+    ruta = RUTA_CACHE
+    if ruta not in _preparadas:
+        with _lock_preparadas:
+            if ruta not in _preparadas:
+                _preparar(ruta)
+                _preparadas.add(ruta)
+    return sqlite3.connect(ruta, timeout=5)
+
+
+def clave_cache(url, params=None):
+    """
+    Construye la clave de la caché a partir de la URL y sus parámetros
+    Ejemplo: ('https://x/y', {'b': 1, 'a': 2}) -> 'https://x/y?{"a": 2, "b": 1}'
+    """
+    if not params:
+        return url
+    return f"{url}?{json.dumps(params, sort_keys=True, default=str)}"
+
+
+def leer_entrada(clave):
+    """
+    Retorna (contenido, guardado) o (None, None) si la clave no existe
+    """
+    try:
+        with closing(_conectar()) as conexion:
+            fila = conexion.execute(
+                "SELECT contenido, guardado FROM respuestas WHERE clave = ?", (clave,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"❌ Error leyendo la caché: {e}")
+        return None, None
+
+    if fila is None:
+        return None, None
+    return json.loads(fila[0]), fila[1]
+
+
+def guardar_entrada(clave, contenido):
+    try:
+        with closing(_conectar()) as conexion, conexion:
+            conexion.execute(
+                "INSERT OR REPLACE INTO respuestas (clave, guardado, contenido) VALUES (?, ?, ?)",
+                (clave, time.time(), json.dumps(contenido))
+            )
+    except sqlite3.Error as e:
+        print(f"❌ Error guardando en la caché: {e}")
+
+
+# ==========================================
+# LECTURA CON STALE-WHILE-REVALIDATE
+# ==========================================
+
+def _revalidar(clave, url, params, descargar):
+    try:
+        guardar_entrada(clave, descargar(url, params))
+    except Exception as e:
+        print(f"❌ Error revalidando {url}: {e}")
+    finally:
+        with _lock_revalidando:
+            _revalidando.discard(clave)
+
+
+def _revalidar_en_segundo_plano(clave, url, params, descargar):
+    # Una sola revalidación en curso por clave
+    with _lock_revalidando:
+        if clave in _revalidando:
+            return
+        _revalidando.add(clave)
+
+    hilo = threading.Thread(
+        target=_revalidar, args=(clave, url, params, descargar), daemon=True
+    )
+    hilo.start()
+
+
+def obtener_json_cacheado(url, params=None, ttl=300, descargar=None):
+    """
+    Obtiene una respuesta JSON pasando por la caché en disco
+    Parámetros:
+        - url, params: identifican la petición (y la clave de la caché)
+        - ttl: segundos durante los cuales la entrada se considera fresca
+        - descargar: función descargar(url, params) que retorna el JSON o lanza error
+    Retorna:
+        - (datos, edad_en_segundos) o (None, None) si no hay datos disponibles
+    """
+    clave = clave_cache(url, params)
+    contenido, guardado = leer_entrada(clave)
+
+    if contenido is not None:
+        edad = time.time() - guardado
+        if edad > ttl:
+            _revalidar_en_segundo_plano(clave, url, params, descargar)
+        return contenido, edad
+
+    # Sin datos guardados: hay que esperar a la API esta única vez
+    try:
+        contenido = descargar(url, params)
+    except Exception as e:
+        print(f"❌ Error descargando {url}: {e}")
+        return None, None
+
+    guardar_entrada(clave, contenido)
+    return contenido, 0.0
+
+
+def refrescar_si_envejece(url, params=None, ttl=300, descargar=None, fraccion=0.75):
+    """
+    Descarga y guarda la respuesta si la entrada falta o ya consumió 'fraccion'
+    de su TTL. Pensada para la precarga: como la caché en disco es compartida,
+    varios procesos con el mismo planificador no repiten la descarga.
+    Lanza la excepción de 'descargar' si la descarga falla.
+    """
+    clave = clave_cache(url, params)
+    contenido, guardado = leer_entrada(clave)
+    if contenido is not None and time.time() - guardado < ttl * fraccion:
+        return False
+
+    guardar_entrada(clave, descargar(url, params))
+    return True
+
+
+def fecha_guardado(url, params=None):
+    """
+    Hora (epoch) en que se guardó la entrada, sin decodificar el contenido
+    Retorna None si la entrada no existe
+    """
+    try:
+        with closing(_conectar()) as conexion:
+            fila = conexion.execute(
+                "SELECT guardado FROM respuestas WHERE clave = ?", (clave_cache(url, params),)
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"❌ Error leyendo la caché: {e}")
+        return None
+    return None if fila is None else fila[0]
+
+
+def revalidar_en_segundo_plano(url, params=None, descargar=None):
+    """
+    Lanza una descarga en segundo plano que reemplaza la entrada guardada
+    """
+    _revalidar_en_segundo_plano(clave_cache(url, params), url, params, descargar)
+
+
+def formatear_edad(segundos):
+    """
+    Convierte una edad en segundos a texto legible
+    Ejemplo: 130 -> 'hace 2 min'
+    """
+    if segundos is None:
+        return "N/A"
+    if segundos < 60:
+        return "hace instantes"
+    if segundos < 3600:
+        return f"hace {int(segundos // 60)} min"
+    if segundos < 86400:
+        return f"hace {int(segundos // 3600)} h"
+    return f"hace {int(segundos // 86400)} días"
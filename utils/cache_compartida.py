@@ -0,0 +1,390 @@
+"""
+Cachés de resultados calculados con backend intercambiable.
+
+Cada uso tiene su espacio con nombre (espacio("metricas_covid")), con su
+propio TTL, límite de tamaño y estadísticas de aciertos, fallos, descartes
+por tamaño y entradas vencidas. El backend se elige con CACHE_BACKEND:
+    - memoria: LRU dentro del proceso; cada worker tiene la suya y se pierde
+      al reiniciar
+    - disco:   diskcache (SQLite + archivos) en CACHE_COMPARTIDA_RUTA; todos
+      los workers del nodo comparten la misma caché y sigue caliente tras
+      un reinicio. Es el valor por defecto si diskcache está instalado
+    - redis:   servidor Redis local o compatible (Valkey, KeyDB) en
+      CACHE_REDIS_URL; requiere el paquete redis. El límite de tamaño es el
+      maxmemory del servidor (con maxmemory-policy allkeys-lru)
+    - ninguno: no guarda nada (para medir o depurar sin caché)
+
+Los valores se guardan serializados con pickle en los tres backends, así que
+cada lectura devuelve una copia propia que el código puede modificar sin
+afectar a otros hilos o workers. CACHE_<ESPACIO>_TTL (segundos) y
+CACHE_<ESPACIO>_MB reemplazan los valores que pasa el código; con
+CACHE_<ESPACIO>_MB=0 ese espacio no guarda nada.
+
+Las respuestas crudas de las APIs siguen en utils.cache, que ya es un SQLite
+compartido con su propia lógica de stale-while-revalidate.
+"""
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+BACKENDS = ("memoria", "disco", "redis", "ninguno")
+RUTA_COMPARTIDA = os.environ.get(
+    "CACHE_COMPARTIDA_RUTA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "compartida")
+)
+URL_REDIS = os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+
+def _backend_por_defecto():
+    try:
+        import diskcache  # noqa: F401
+    except ImportError:
+        return "memoria"
+    return "disco"
+
+
+BACKEND = os.environ.get("CACHE_BACKEND") or _backend_por_defecto()
+if BACKEND not in BACKENDS:
+    raise ValueError(f"CACHE_BACKEND desconocido: {BACKEND!r} (opciones: {', '.join(BACKENDS)})")
+
+_espacios = {}
+_lock_espacios = threading.Lock()
+
+
+def _texto(clave):
+    return clave if isinstance(clave, str) else repr(clave)
+
+
+# ==========================================
+# INTERFAZ
+# ==========================================
+
+class Almacen:
+    """
+    Interfaz común de los backends. Las subclases implementan _leer, _escribir,
+    borrar, limpiar y _tamaño trabajando con claves de texto y valores en bytes.
+    """
+    backend = None
+
+    def __init__(self, nombre, ttl=None, maximo_bytes=None):
+        self.nombre = nombre
+        self.ttl = ttl
+        self.maximo_bytes = maximo_bytes
+        self._contadores = {"aciertos": 0, "fallos": 0, "descartes": 0, "vencidas": 0, "errores": 0}
+        self._lock_contadores = threading.Lock()
+
+    def _contar(self, contador, cantidad=1):
+        if cantidad:
+            with self._lock_contadores:
+                self._contadores[contador] += cantidad
+
+    def obtener(self, clave, defecto=None):
+        datos = self._leer(_texto(clave))
+        if datos is None:
+            self._contar("fallos")
+            return defecto
+        self._contar("aciertos")
+        return pickle.loads(datos)
+
+    def guardar(self, clave, valor, ttl=None):
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        self._escribir(_texto(clave), datos, self.ttl if ttl is None else ttl)
+
+    def estadisticas(self):
+        with self._lock_contadores:
+            contadores = dict(self._contadores)
+        return {
+            "backend": self.backend, "ttl": self.ttl, "maximo_bytes": self.maximo_bytes,
+            **contadores, **self._tamaño(),
+        }
+
+    def _reiniciar_tras_fork(self):
+        self._lock_contadores = threading.Lock()
+
+
+# ==========================================
+# BACKENDS
+# ==========================================
+
+class AlmacenMemoria(Almacen):
+    """
+    LRU en el proceso, acotado por el total de bytes serializados
+    """
+    backend = "memoria"
+
+    def __init__(self, nombre, ttl=None, maximo_bytes=None):
+        super().__init__(nombre, ttl, maximo_bytes)
+        self._entradas = OrderedDict()    # clave -> (bytes, vence)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _quitar(self, clave):
+        # Se llama con _lock tomado
+        datos, _ = self._entradas.pop(clave)
+        self._bytes -= len(datos)
+
+    def _leer(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada[1] is None or entrada[1] >= time.time():
+                self._entradas.move_to_end(clave)
+                return entrada[0]
+            self._quitar(clave)
+        self._contar("vencidas")
+        return None
+
+    def _escribir(self, clave, datos, ttl):
+        vence = time.time() + ttl if ttl else None
+        descartes = 0
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = (datos, vence)
+            self._bytes += len(datos)
+            while self.maximo_bytes and self._bytes > self.maximo_bytes and len(self._entradas) > 1:
+                self._quitar(next(iter(self._entradas)))
+                descartes += 1
+        self._contar("descartes", descartes)
+
+    def borrar(self, clave):
+        with self._lock:
+            if _texto(clave) in self._entradas:
+                self._quitar(_texto(clave))
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def _tamaño(self):
+        with self._lock:
+            return {"entradas": len(self._entradas), "bytes": self._bytes}
+
+    def _reiniciar_tras_fork(self):
+        super()._reiniciar_tras_fork()
+        self._lock = threading.Lock()
+
+
+class AlmacenDisco(Almacen):
+    """
+    diskcache en un directorio por espacio, compartido entre procesos
+    """
+    backend = "disco"
+
+    def __init__(self, nombre, ttl=None, maximo_bytes=None):
+        import diskcache
+
+        super().__init__(nombre, ttl, maximo_bytes)
+        self._errores = (diskcache.Timeout, OSError)
+        # cull_limit=0: el recorte se hace después de cada escritura, para contar los descartes.
+        # Se descarta por antigüedad de escritura: por LRU cada lectura sería también una escritura.
+        opciones = {"cull_limit": 0, "eviction_policy": "least-recently-stored"}
+        if maximo_bytes:
+            opciones["size_limit"] = maximo_bytes
+        self._cache = diskcache.Cache(os.path.join(RUTA_COMPARTIDA, nombre), timeout=5, **opciones)
+
+    def _leer(self, clave):
+        try:
+            return self._cache.get(clave)
+        except self._errores as e:
+            print(f"❌ Error leyendo la caché '{self.nombre}': {e}")
+            self._contar("errores")
+            return None
+
+    def _escribir(self, clave, datos, ttl):
+        try:
+            self._cache.set(clave, datos, expire=ttl or None)
+            self._contar("vencidas", self._cache.expire())
+            self._contar("descartes", self._cache.cull())
+        except self._errores as e:
+            print(f"❌ Error guardando en la caché '{self.nombre}': {e}")
+            self._contar("errores")
+
+    def borrar(self, clave):
+        self._cache.delete(_texto(clave))
+
+    def limpiar(self):
+        self._cache.clear()
+
+    def _tamaño(self):
+        return {"entradas": len(self._cache), "bytes": self._cache.volume()}
+
+
+class AlmacenRedis(Almacen):
+    """
+    Redis (o compatible) con las claves de cada espacio bajo el prefijo 'espacio:'
+    """
+    backend = "redis"
+
+    def __init__(self, nombre, ttl=None, maximo_bytes=None):
+        import redis
+
+        super().__init__(nombre, ttl, maximo_bytes)
+        self._errores = redis.RedisError
+        self._cliente = redis.Redis.from_url(URL_REDIS, socket_timeout=2)
+        self._prefijo = f"{nombre}:"
+
+    def _leer(self, clave):
+        try:
+            return self._cliente.get(self._prefijo + clave)
+        except self._errores as e:
+            print(f"❌ Error leyendo la caché '{self.nombre}': {e}")
+            self._contar("errores")
+            return None
+
+    def _escribir(self, clave, datos, ttl):
+        try:
+            self._cliente.set(self._prefijo + clave, datos, ex=int(ttl) if ttl else None)
+        except self._errores as e:
+            print(f"❌ Error guardando en la caché '{self.nombre}': {e}")
+            self._contar("errores")
+
+    def borrar(self, clave):
+        self._cliente.delete(self._prefijo + _texto(clave))
+
+    def limpiar(self):
+        for clave in self._cliente.scan_iter(match=self._prefijo + "*", count=500):
+            self._cliente.delete(clave)
+
+    def _tamaño(self):
+        # Redis descarta y vence claves por su cuenta: se informan los totales del servidor
+        try:
+            info = self._cliente.info()
+        except self._errores:
+            return {}
+        return {
+            "servidor_bytes": info.get("used_memory"),
+            "servidor_descartes": info.get("evicted_keys"),
+            "servidor_vencidas": info.get("expired_keys"),
+        }
+
+
+class AlmacenNulo(Almacen):
+    """
+    No guarda nada: toda lectura es un fallo
+    """
+    backend = "ninguno"
+
+    def _leer(self, clave):
+        return None
+
+    def _escribir(self, clave, datos, ttl):
+        pass
+
+    def borrar(self, clave):
+        pass
+
+    def limpiar(self):
+        pass
+
+    def _tamaño(self):
+        return {}
+
+
+CLASES = {"memoria": AlmacenMemoria, "disco": AlmacenDisco, "redis": AlmacenRedis, "ninguno": AlmacenNulo}
+
+
+# ==========================================
+# ESPACIOS Y MEMOIZACIÓN
+# ==========================================
+
+def _reiniciar_tras_fork():
+    # Un lock tomado por otro hilo del proceso padre quedaría tomado para siempre
+    global _lock_espacios
+    _lock_espacios = threading.Lock()
+    for almacen in _espacios.values():
+        almacen._reiniciar_tras_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+def espacio(nombre, ttl=None, maximo_mb=64):
+    """
+    Almacén 'nombre' del backend configurado; se crea en el primer uso y las
+    llamadas siguientes devuelven el mismo (ttl y maximo_mb solo cuentan la primera vez)
+    """
+    with _lock_espacios:
+        almacen = _espacios.get(nombre)
+        if almacen is None:
+            variable = f"CACHE_{nombre.upper()}"
+            ttl = float(os.environ.get(f"{variable}_TTL", ttl or 0)) or None
+            maximo_bytes = int(float(os.environ.get(f"{variable}_MB", maximo_mb)) * 2**20)
+            clase = CLASES[BACKEND] if maximo_bytes > 0 else AlmacenNulo
+            almacen = _espacios[nombre] = clase(nombre, ttl, maximo_bytes)
+    return almacen
+
+
+def estadisticas():
+    """
+    Estadísticas de todos los espacios creados en este proceso
+    """
+    with _lock_espacios:
+        almacenes = list(_espacios.values())
+    return {almacen.nombre: almacen.estadisticas() for almacen in almacenes}
+
+
+def registrar_ruta_estadisticas(servidor):
+    """
+    GET /admin/cache: estadisticas() de este proceso (requiere ADMIN_TOKEN)
+    """
+    from flask import jsonify
+
+    from utils.admin import requiere_admin
+
+    @servidor.route("/admin/cache")
+    @requiere_admin
+    def estadisticas_cache():
+        return jsonify({"pid": os.getpid(), "backend": BACKEND, "espacios": estadisticas()})
+
+
+def _version(funcion, version=None):
+    # Con un backend persistente, un cambio en el código no debe servir
+    # resultados viejos: se usa el módulo completo, que incluye las funciones
+    # auxiliares que llama (p. ej. las ecuaciones del modelo)
+    try:
+        fuente = inspect.getsource(sys.modules[funcion.__module__])
+    except (KeyError, OSError, TypeError):
+        fuente = funcion.__qualname__
+    return hashlib.sha1(f"{fuente}\n{version}".encode("utf-8")).hexdigest()[:12]
+
+
+_FALTA = object()
+
+
+def memoizar(nombre, ttl=None, maximo_mb=64, convertir=None, version=None):
+    """
+    Decorador: guarda el resultado de la función en el espacio 'nombre', con
+    los argumentos (que deben tener un repr estable) como clave. 'convertir'
+    se aplica al resultado antes de guardarlo y es lo que se retorna
+    (p. ej. Figure.to_dict, mucho más barato de deserializar que la Figure).
+    La clave incluye un hash del código del módulo de la función; 'version'
+    se cambia a mano cuando el resultado depende de código de otro módulo.
+    """
+    def decorador(funcion):
+        prefijo = (f"{funcion.__module__}.{funcion.__qualname__}", _version(funcion, version))
+
+        @wraps(funcion)
+        def memoizada(*args, **kwargs):
+            almacen = espacio(nombre, ttl, maximo_mb)
+            clave = (prefijo, args, sorted(kwargs.items()))
+            valor = almacen.obtener(clave, _FALTA)
+            if valor is _FALTA:
+                valor = funcion(*args, **kwargs)
+                if convertir is not None:
+                    valor = convertir(valor)
+                almacen.guardar(clave, valor)
+            return valor
+
+        return memoizada
+
+    return decorador
@@ -0,0 +1,182 @@
+"""
+Calibración del modelo SIR contra curvas reales de casos acumulados.
+
+Se ajustan β, γ y las condiciones iniciales I₀, R₀ (S₀ = N - I₀ - R₀) por
+mínimos cuadrados sobre los casos acumulados observados, que el modelo
+representa como N - S(t). El jacobiano de los residuos es exacto: se integra
+el sistema SIR junto con sus sensibilidades hacia adelante
+    dZ/dt = (∂f/∂y) Z + ∂f/∂p,
+de modo que least_squares no necesita diferencias finitas. Para evitar
+mínimos locales se ajusta desde varios puntos de partida, uno tras otro: la
+página lo ejecuta como callback en segundo plano, que ya corre en su propio
+proceso (crear un pool de procesos desde un worker con hilos no es seguro).
+"""
+import time
+
+import numpy as np
+
+from utils.carga_diferida import diferido
+
+integrate = diferido("scipy.integrate")
+optimize = diferido("scipy.optimize")
+
+INICIOS = 8
+CASOS_INICIALES = 100      # el ajuste empieza el primer día con al menos estos casos acumulados
+
+# Parámetros optimizados: θ = (β, γ, log10 I₀, R₀/N)
+LIMITES = ([1e-3, 1e-3, 0.0, 0.0], [3.0, 1.0, 7.0, 0.5])
+
+
+# ==========================================
+# SISTEMA SIR CON SENSIBILIDADES
+# ==========================================
+
+def _sir_aumentado(y, t, beta, gamma, N):
+    """
+    Estado [S, I] seguido de Z (2 x 4) = ∂(S, I)/∂(β, γ, I₀, R₀), aplanado por filas
+    R no aparece: R = N - S - I
+    """
+    S, I = y[0], y[1]
+    Z = y[2:].reshape(2, 4)
+
+    contagio = beta * S * I / N
+    jac_y = np.array([
+        [-beta * I / N, -beta * S / N],
+        [beta * I / N, beta * S / N - gamma],
+    ])
+    jac_p = np.array([
+        [-S * I / N, 0.0, 0.0, 0.0],
+        [S * I / N, -I, 0.0, 0.0],
+    ])
+
+    dZ = jac_y @ Z + jac_p
+    return np.concatenate(([-contagio, contagio - gamma * I], dZ.ravel()))
+
+
+def simular_con_sensibilidades(t, beta, gamma, I0, R0, N):
+    """
+    Integra el SIR y sus sensibilidades en los instantes t
+    Retorna (S, I, Z) con Z de forma (len(t), 2, 4)
+    """
+    S0 = N - I0 - R0
+    # Condición inicial de las sensibilidades: ∂S₀/∂I₀ = ∂S₀/∂R₀ = -1, ∂I₀/∂I₀ = 1
+    Z0 = np.array([
+        [0.0, 0.0, -1.0, -1.0],
+        [0.0, 0.0, 1.0, 0.0],
+    ])
+    y0 = np.concatenate(([S0, I0], Z0.ravel()))
+    solucion = integrate.odeint(_sir_aumentado, y0, t, args=(beta, gamma, N), rtol=1e-7, atol=1e-6)
+    return solucion[:, 0], solucion[:, 1], solucion[:, 2:].reshape(-1, 2, 4)
+
+
+# ==========================================
+# AJUSTE
+# ==========================================
+
+def _desempaquetar(theta, N):
+    beta, gamma, log_i0, fraccion_r0 = theta
+    return beta, gamma, 10 ** log_i0, fraccion_r0 * N
+
+
+def _ajustar_desde(t, observados, N, theta0):
+    """
+    Un ajuste local desde theta0
+    """
+    escala = max(observados.max(), 1.0)
+    memoria = {}
+
+    def resolver(theta):
+        clave = theta.tobytes()
+        if clave not in memoria:
+            memoria.clear()
+            beta, gamma, I0, R0 = _desempaquetar(theta, N)
+            memoria[clave] = simular_con_sensibilidades(t, beta, gamma, I0, R0, N)
+        return memoria[clave]
+
+    def residuos(theta):
+        S, _, _ = resolver(theta)
+        return (N - S - observados) / escala
+
+    def jacobiano(theta):
+        _, _, Z = resolver(theta)
+        _, _, I0, _ = _desempaquetar(theta, N)
+        # Regla de la cadena de (β, γ, I₀, R₀) a θ
+        cadena = np.array([1.0, 1.0, I0 * np.log(10), N])
+        return -Z[:, 0, :] * cadena / escala
+
+    resultado = optimize.least_squares(residuos, theta0, jac=jacobiano, bounds=LIMITES, x_scale='jac')
+    return resultado.x, 2 * resultado.cost, resultado.nfev
+
+
+def _puntos_de_partida(observados, N, cantidad, semilla=0):
+    """
+    Muestreo estratificado de R₀ = β/γ y del periodo infeccioso 1/γ
+    """
+    rng = np.random.default_rng(semilla)
+    estratos = (np.arange(cantidad) + rng.random(cantidad)) / cantidad
+    r0 = 1.1 + 2.9 * estratos
+    periodo = 3 + 17 * rng.permutation(estratos)
+    gamma = 1 / periodo
+    log_i0 = np.log10(np.clip(observados[0] * rng.uniform(0.2, 1.0, cantidad), 1, None))
+    fraccion_r0 = np.zeros(cantidad)
+    return np.clip(
+        np.column_stack([r0 * gamma, gamma, log_i0, fraccion_r0]),
+        LIMITES[0], LIMITES[1]
+    )
+
+
+def calibrar_sir(casos_acumulados, N, inicios=INICIOS, al_avanzar=None):
+    """
+    Ajusta el SIR a una serie diaria de casos acumulados
+    Parámetros:
+        - casos_acumulados: array con un valor por día
+        - N: población total
+        - inicios: cantidad de puntos de partida del multi-start
+        - al_avanzar: función opcional al_avanzar(hechos, total) tras cada punto de partida
+    Retorna:
+        - diccionario con beta, gamma, I0, R0, S0, N, sse, t, observados,
+          ajustados (N - S del mejor ajuste), inicios, evaluaciones y segundos
+    """
+    inicio_reloj = time.perf_counter()
+    observados = np.asarray(casos_acumulados, dtype=float)
+    t = np.arange(len(observados), dtype=float)
+    partidas = _puntos_de_partida(observados, N, inicios)
+
+    resultados = []
+    for theta0 in partidas:
+        resultados.append(_ajustar_desde(t, observados, N, theta0))
+        if al_avanzar is not None:
+            al_avanzar(len(resultados), len(partidas))
+
+    theta, sse, _ = min(resultados, key=lambda r: r[1])
+    beta, gamma, I0, R0 = _desempaquetar(theta, N)
+    S, _, _ = simular_con_sensibilidades(t, beta, gamma, I0, R0, N)
+
+    return {
+        'beta': beta,
+        'gamma': gamma,
+        'I0': I0,
+        'R0': R0,
+        'S0': N - I0 - R0,
+        'N': N,
+        'sse': sse * max(observados.max(), 1.0) ** 2,
+        't': t,
+        'observados': observados,
+        'ajustados': N - S,
+        'inicios': len(resultados),
+        'evaluaciones': sum(r[2] for r in resultados),
+        'segundos': time.perf_counter() - inicio_reloj,
+    }
+
+
+def recortar_serie(casos_acumulados, dias, minimo=CASOS_INICIALES):
+    """
+    Ventana de 'dias' días desde el primer día con al menos 'minimo' casos acumulados
+    Retorna (indice_inicio, serie) o (None, None) si la serie nunca alcanza el mínimo
+    """
+    casos = np.asarray(casos_acumulados, dtype=float)
+    superan = np.flatnonzero(casos >= minimo)
+    if len(superan) == 0:
+        return None, None
+    inicio = int(superan[0])
+    return inicio, casos[inicio:inicio + int(dias)]
@@ -0,0 +1,136 @@
+"""
+Importación diferida de dependencias pesadas para acortar el arranque.
+
+Con use_pages=True Dash importa todas las páginas al crear la app, y con
+ellas scipy, pandas y plotly.express, aunque el usuario solo abra '/'. Las
+páginas siguen registrándose y definiendo sus callbacks al inicio (el
+navegador pide _dash-dependencies una sola vez), pero los módulos pesados se
+declaran con diferido('scipy.integrate') y recién se importan cuando un
+callback o un layout los usa por primera vez.
+
+Para que esa primera vez no la pague un usuario, precargar() importa todos
+los módulos diferidos (y ejecuta las funciones registradas con al_precargar,
+p. ej. las figuras fijas de las páginas). En producción se llama antes de
+atender peticiones: plotly consulta sys.modules['pandas'] al construir cada
+traza, y si otro hilo está a mitad de importar pandas la traza falla con un
+módulo parcialmente inicializado. precargar_en_segundo_plano() hace lo mismo
+en un hilo, para el servidor de desarrollo.
+"""
+import importlib
+import threading
+import time
+
+_registrados = {}         # nombre -> ModuloDiferido
+_funciones = []           # callables sin argumentos a ejecutar en la precarga
+_lock = threading.Lock()
+_hilo = None
+
+
+class ModuloDiferido:
+    """
+    Sustituto de un módulo que lo importa en el primer acceso a un atributo
+    Ejemplo:
+        integrate = diferido("scipy.integrate")
+        integrate.odeint(...)   # aquí recién se importa scipy.integrate
+    """
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+
+    def cargar(self):
+        if self._modulo is None:
+            # importlib serializa importaciones concurrentes del mismo módulo
+            self._modulo = importlib.import_module(self._nombre)
+        return self._modulo
+
+    @property
+    def cargado(self):
+        return self._modulo is not None
+
+    def __getattr__(self, atributo):
+        return getattr(self.cargar(), atributo)
+
+    def __repr__(self):
+        estado = "cargado" if self.cargado else "pendiente"
+        return f"<módulo diferido '{self._nombre}' ({estado})>"
+
+
+def diferido(nombre):
+    """
+    Retorna el sustituto diferido de 'nombre' (uno solo por módulo)
+    """
+    with _lock:
+        if nombre not in _registrados:
+            _registrados[nombre] = ModuloDiferido(nombre)
+        return _registrados[nombre]
+
+
+def al_precargar(funcion):
+    """
+    Registra una función sin argumentos para ejecutarla en la precarga
+    Se puede usar como decorador; retorna la misma función
+    """
+    with _lock:
+        _funciones.append(funcion)
+    return funcion
+
+
+def precargar(extra=()):
+    """
+    Importa todos los módulos diferidos registrados (y los de 'extra') y
+    luego ejecuta las funciones registradas con al_precargar
+    Retorna {nombre: segundos} con lo que tardó cada paso
+    """
+    tiempos = {}
+    with _lock:
+        pendientes = [m for m in _registrados.values() if not m.cargado]
+    pendientes += [diferido(nombre) for nombre in extra]
+
+    for modulo in pendientes:
+        inicio = time.perf_counter()
+        try:
+            modulo.cargar()
+        except Exception as e:
+            print(f"❌ Error precargando {modulo._nombre}: {e!r}")
+            continue
+        tiempos[modulo._nombre] = time.perf_counter() - inicio
+
+    with _lock:
+        funciones = list(_funciones)
+    for funcion in funciones:
+        nombre = f"{funcion.__module__}.{funcion.__qualname__}"
+        inicio = time.perf_counter()
+        try:
+            funcion()
+        except Exception as e:
+            print(f"❌ Error precargando {nombre}: {e!r}")
+            continue
+        tiempos[nombre] = time.perf_counter() - inicio
+    return tiempos
+
+
+def precargar_en_segundo_plano(retraso=1.0, extra=()):
+    """
+    Lanza precargar() en un hilo daemon (una sola vez por proceso)
+    'retraso' deja que el servidor termine de arrancar antes de competir por CPU
+    """
+    global _hilo
+
+    def tarea():
+        time.sleep(retraso)
+        precargar(extra)
+
+    with _lock:
+        if _hilo is not None:
+            return
+        _hilo = threading.Thread(target=tarea, daemon=True, name="precarga-modulos")
+        _hilo.start()
+
+
+def estado():
+    """
+    {nombre: True/False} según si cada módulo diferido ya se importó
+    """
+    with _lock:
+        return {nombre: modulo.cargado for nombre, modulo in _registrados.items()}
@@ -0,0 +1,168 @@
+"""
+Cliente HTTP compartido por las páginas que consultan APIs externas.
+
+- Una requests.Session por host, con pool de conexiones keep-alive
+  (se evita el handshake TCP+TLS en cada consulta).
+- Timeouts de conexión y lectura siempre definidos.
+- Reintentos con backoff exponencial y jitter ante errores de red, 429 y 5xx.
+- Límite de peticiones simultáneas por host (y separación mínima entre
+  peticiones para servicios como Nominatim, que exige 1 petición/segundo).
+- Grabación/reproducción de respuestas (utils.grabaciones) y redirección a
+  un servidor local simulado (HTTP_REDIRIGIR) para pruebas sin red.
+"""
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import grabaciones
+
+# (conexión, lectura) en segundos
+TIMEOUT_POR_DEFECTO = (3.05, 10)
+
+REINTENTOS = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAXIMO = 8.0
+CODIGOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+TAMANO_POOL = 10
+LIMITE_CONCURRENCIA_POR_DEFECTO = 4
+LIMITES_CONCURRENCIA = {
+    "nominatim.openstreetmap.org": 1,
+}
+INTERVALO_MINIMO = {
+    "nominatim.openstreetmap.org": 1.0,
+}
+
+USER_AGENT = "ClimaDashApp/1.0 (contacto: ejemplo@gmail.com)"
+
+# Ej: http://127.0.0.1:8765 -> las peticiones van al servidor simulado
+REDIRIGIR_A = os.environ.get("HTTP_REDIRIGIR")
+
+_sesiones = {}
+_semaforos = {}
+_ultima_peticion = {}
+_lock = threading.Lock()
+
+
+def _reiniciar_tras_fork():
+    # Un worker creado con fork no debe reutilizar los sockets ni los semáforos del maestro
+    global _lock
+    _sesiones.clear()
+    _semaforos.clear()
+    _ultima_peticion.clear()
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+# ==========================================
+# ESTADO POR HOST
+# ==========================================
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+def obtener_sesion(host):
+    """
+    Retorna la Session (con pool de conexiones) asociada a un host
+    """
+    with _lock:
+        sesion = _sesiones.get(host)
+        if sesion is None:
+            sesion = requests.Session()
+            adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=TAMANO_POOL)
+            sesion.mount("https://", adaptador)
+            sesion.mount("http://", adaptador)
+            sesion.headers["User-Agent"] = USER_AGENT
+            _sesiones[host] = sesion
+        return sesion
+
+
+def _semaforo(host):
+    with _lock:
+        semaforo = _semaforos.get(host)
+        if semaforo is None:
+            limite = LIMITES_CONCURRENCIA.get(host, LIMITE_CONCURRENCIA_POR_DEFECTO)
+            semaforo = threading.BoundedSemaphore(limite)
+            _semaforos[host] = semaforo
+        return semaforo
+
+
+def _respetar_intervalo(host):
+    # Se llama con el semáforo del host tomado
+    intervalo = INTERVALO_MINIMO.get(host)
+    if not intervalo:
+        return
+    espera = _ultima_peticion.get(host, 0.0) + intervalo - time.monotonic()
+    if espera > 0:
+        time.sleep(espera)
+    _ultima_peticion[host] = time.monotonic()
+
+
+def _espera_backoff(intento, respuesta=None):
+    """
+    Backoff exponencial con "full jitter"; respeta Retry-After si viene en la respuesta
+    """
+    if respuesta is not None:
+        retry_after = respuesta.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAXIMO)
+    return random.uniform(0, min(BACKOFF_MAXIMO, BACKOFF_BASE * 2 ** intento))
+
+
+# ==========================================
+# PETICIONES
+# ==========================================
+
+def obtener(url, params=None, headers=None, timeout=TIMEOUT_POR_DEFECTO, reintentos=REINTENTOS):
+    """
+    GET con sesión compartida, reintentos y límite de concurrencia por host
+    Retorna el objeto Response (status 2xx) o lanza requests.exceptions.RequestException
+    """
+    completa = grabaciones.url_canonica(url, params)
+    if grabaciones.MODO == "reproducir":
+        respuesta = grabaciones.reproducir(completa)
+        respuesta.raise_for_status()
+        return respuesta
+
+    host = _host(url)
+    if REDIRIGIR_A:
+        # https://host/ruta?query -> REDIRIGIR_A/host/ruta?query
+        url, params = f"{REDIRIGIR_A.rstrip('/')}/{completa.split('://', 1)[1]}", None
+    sesion = obtener_sesion(_host(url))
+
+    for intento in range(reintentos + 1):
+        respuesta = None
+        try:
+            with _semaforo(host):
+                _respetar_intervalo(host)
+                respuesta = sesion.get(url, params=params, headers=headers, timeout=timeout)
+
+            if respuesta.status_code in CODIGOS_REINTENTABLES and intento < reintentos:
+                time.sleep(_espera_backoff(intento, respuesta))
+                continue
+
+            respuesta.raise_for_status()
+            if grabaciones.MODO == "grabar":
+                grabaciones.grabar(completa, respuesta)
+            return respuesta
+
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if intento == reintentos:
+                raise
+            time.sleep(_espera_backoff(intento))
+
+
+def obtener_json(url, params=None, headers=None, timeout=TIMEOUT_POR_DEFECTO):
+    """
+    Igual que obtener(), pero retorna directamente el cuerpo JSON decodificado
+    """
+    return obtener(url, params=params, headers=headers, timeout=timeout).json()
@@ -0,0 +1,133 @@
+"""
+Compresión gzip/brotli de las respuestas del servidor Flask.
+
+Un after_request comprime, según lo que acepte el navegador (Accept-Encoding),
+toda respuesta de texto (JSON de callbacks, layout, dependencias, HTML, JS,
+CSS) de al menos COMPRESION_MINIMO bytes. Se prefiere brotli si está
+instalado (paquete brotli o brotlicffi, opcional) y si no gzip. Niveles con
+COMPRESION_NIVEL_GZIP (1-9) y COMPRESION_NIVEL_BROTLI (0-11); COMPRESION=0
+la desactiva, p. ej. detrás de un proxy que ya comprime.
+
+Las respuestas con ETag o bajo /assets/ y /_dash-component-suites/ (los
+bundles de JS, que son siempre los mismos bytes) se comprimen una vez y se
+guardan en la caché compartida; las de callbacks se comprimen en cada
+petición. Una respuesta comprimida lleva su propio ETag ("etiqueta-br"),
+y las peticiones condicionales con ese ETag reciben un 304.
+"""
+import gzip
+import os
+
+from flask import request
+
+from utils.cache_compartida import espacio
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+ACTIVA = os.environ.get("COMPRESION", "1") != "0"
+MINIMO_BYTES = int(os.environ.get("COMPRESION_MINIMO", "1024"))
+NIVEL_GZIP = int(os.environ.get("COMPRESION_NIVEL_GZIP", "6"))
+NIVEL_BROTLI = int(os.environ.get("COMPRESION_NIVEL_BROTLI", "5"))
+
+TIPOS = {
+    "application/json", "application/javascript", "application/x-javascript",
+    "application/xml", "image/svg+xml",
+}
+RUTAS_ESTATICAS = ("/assets/", "/_dash-component-suites/")
+
+
+def comprimir(datos, codificacion):
+    if codificacion == "br":
+        return brotli.compress(datos, quality=NIVEL_BROTLI)
+    return gzip.compress(datos, compresslevel=NIVEL_GZIP, mtime=0)
+
+
+def codificaciones_disponibles():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def elegir_codificacion(aceptadas):
+    """
+    La codificación disponible con mayor q en Accept-Encoding (brotli en caso de empate)
+    Retorna None si el cliente no acepta ninguna
+    """
+    mejor, mejor_q = None, 0
+    for codificacion in codificaciones_disponibles():
+        q = aceptadas.quality(codificacion)
+        if q > mejor_q:
+            mejor, mejor_q = codificacion, q
+    return mejor
+
+
+def _comprimible(respuesta):
+    if respuesta.status_code < 200 or respuesta.status_code in (204, 206, 304):
+        return False
+    if "Content-Encoding" in respuesta.headers or "no-transform" in respuesta.headers.get("Cache-Control", ""):
+        return False
+    if respuesta.is_streamed and not respuesta.direct_passthrough:
+        return False
+    tipo = respuesta.mimetype or ""
+    return tipo.startswith("text/") or tipo in TIPOS
+
+
+def _estatica(respuesta):
+    return request.path.startswith(RUTAS_ESTATICAS) or respuesta.get_etag()[0] is not None
+
+
+def _no_modificada(respuesta, etiqueta):
+    respuesta.direct_passthrough = False
+    respuesta.status_code = 304
+    respuesta.set_data(b"")
+    respuesta.set_etag(etiqueta)
+    del respuesta.headers["Content-Length"]
+    return respuesta
+
+
+def comprimir_respuesta(respuesta):
+    if request.method == "HEAD" or not _comprimible(respuesta):
+        return respuesta
+
+    respuesta.vary.add("Accept-Encoding")
+    codificacion = elegir_codificacion(request.accept_encodings)
+    if codificacion is None:
+        return respuesta
+
+    # Si el cliente ya tiene la versión comprimida se responde 304 sin leer ni comprimir nada
+    etiqueta = respuesta.get_etag()[0]
+    if etiqueta is not None and request.if_none_match.contains(f"{etiqueta}-{codificacion}"):
+        return _no_modificada(respuesta, f"{etiqueta}-{codificacion}")
+
+    # send_file entrega el archivo sin leerlo (direct_passthrough); hay que leerlo para comprimirlo
+    respuesta.direct_passthrough = False
+    datos = respuesta.get_data()
+    if len(datos) < MINIMO_BYTES:
+        return respuesta
+
+    if _estatica(respuesta):
+        cache = espacio("compresion", maximo_mb=64)
+        clave = (codificacion, NIVEL_BROTLI if codificacion == "br" else NIVEL_GZIP, request.path, etiqueta, len(datos))
+        comprimidos = cache.obtener(clave)
+        if comprimidos is None:
+            comprimidos = comprimir(datos, codificacion)
+            cache.guardar(clave, comprimidos)
+    else:
+        comprimidos = comprimir(datos, codificacion)
+
+    respuesta.set_data(comprimidos)
+    respuesta.headers["Content-Encoding"] = codificacion
+    if etiqueta is not None:
+        respuesta.set_etag(f"{etiqueta}-{codificacion}")
+    return respuesta
+
+
+def instrumentar(servidor):
+    """
+    Registra la compresión como after_request del servidor Flask
+    """
+    if ACTIVA:
+        servidor.after_request(comprimir_respuesta)
@@ -0,0 +1,42 @@
+"""
+Pool de hilos compartido para lanzar varias consultas de red a la vez.
+
+Las llamadas a APIs pasan casi todo el tiempo esperando la red, así que un
+pool de hilos basta para solaparlas sin bloquear el hilo del callback más
+allá del plazo indicado.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+POOL_CONSULTAS = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("POOL_CONSULTAS_HILOS", "8")),
+    thread_name_prefix="consultas"
+)
+
+
+def ejecutar_en_paralelo(tareas, plazo=12):
+    """
+    Ejecuta varias funciones a la vez con un plazo total común
+    Parámetros:
+        - tareas: diccionario {nombre: (funcion, args)}
+        - plazo: segundos máximos a esperar por el conjunto de tareas
+    Retorna:
+        - diccionario {nombre: resultado}; las tareas que fallan o no
+          terminan dentro del plazo quedan con resultado None
+    """
+    limite = time.monotonic() + plazo
+    futuros = {
+        nombre: POOL_CONSULTAS.submit(funcion, *args)
+        for nombre, (funcion, args) in tareas.items()
+    }
+
+    resultados = {}
+    for nombre, futuro in futuros.items():
+        restante = max(0.0, limite - time.monotonic())
+        try:
+            resultados[nombre] = futuro.result(timeout=restante)
+        except Exception as e:
+            print(f"❌ La consulta '{nombre}' no terminó a tiempo o falló: {e!r}")
+            resultados[nombre] = None
+    return resultados
@@ -0,0 +1,191 @@
+"""
+Índice en memoria con el histórico COVID de todos los países.
+
+Una sola descarga por ciclo de refresco trae todos los países desde los
+endpoints masivos de disease.sh (/countries y /historical?lastdays=all). Con
+eso se arma un índice columnar: matrices (países x días) de casos y muertes,
+el vector de población y un diccionario país -> fila. Cualquier selección
+posterior de países para comparar se responde desde memoria.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils import precalentamiento
+from utils.reproduccion import estimar_rt
+from utils.cache import (
+    fecha_guardado, obtener_json_cacheado, refrescar_si_envejece, revalidar_en_segundo_plano
+)
+from utils.carga_diferida import diferido
+from utils.cliente_http import obtener_json
+
+pd = diferido("pandas")
+
+URL_PAISES = "https://disease.sh/v3/covid-19/countries"
+URL_HISTORICO = "https://disease.sh/v3/covid-19/historical"
+PARAMS_HISTORICO = {"lastdays": "all"}
+
+TTL_MASIVO = 6 * 60 * 60
+VENTANA_MEDIA = 7
+INTERVALO_VERIFICACION = 30      # segundos entre consultas de la versión guardada
+
+_indice = None
+_version = None
+_verificado = 0.0                # última vez que se comparó la versión con la caché
+_lock = threading.Lock()
+_lock_construccion = threading.Lock()   # una sola reconstrucción a la vez
+
+
+def _reiniciar_tras_fork():
+    # Un hilo del padre pudo quedar a mitad de una reconstrucción con el lock tomado
+    global _lock, _lock_construccion
+    _lock = threading.Lock()
+    _lock_construccion = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+class IndiceCovid:
+    """
+    Datos de todos los países alineados en una misma malla de fechas
+    """
+
+    def __init__(self, paises_actuales, historicos):
+        poblacion = {p["country"]: p.get("population") or np.nan for p in paises_actuales}
+
+        # Las provincias (p. ej. Canadá, Australia) llegan como filas separadas: se suman por país
+        fechas_texto = None
+        acumulado = {}
+        for registro in historicos:
+            timeline = registro.get("timeline") or {}
+            casos = timeline.get("cases") or {}
+            if not casos:
+                continue
+            if fechas_texto is None:
+                fechas_texto = list(casos.keys())
+            fila = np.array([
+                np.fromiter((casos.get(f, 0) for f in fechas_texto), dtype=float, count=len(fechas_texto)),
+                np.fromiter(((timeline.get("deaths") or {}).get(f, 0) for f in fechas_texto),
+                            dtype=float, count=len(fechas_texto)),
+            ])
+            pais = registro["country"]
+            acumulado[pais] = acumulado[pais] + fila if pais in acumulado else fila
+
+        self.paises = sorted(acumulado)
+        self.posicion = {pais: i for i, pais in enumerate(self.paises)}
+        self.fechas = pd.to_datetime(pd.Index(fechas_texto or []), format="%m/%d/%y")
+
+        datos = np.array([acumulado[p] for p in self.paises]) if self.paises else np.zeros((0, 2, 0))
+        self.casos = datos[:, 0, :]
+        self.muertes = datos[:, 1, :]
+        self.poblacion = np.array([poblacion.get(p, np.nan) for p in self.paises], dtype=float)
+
+        # Incrementos diarios y media móvil, calculados una vez para todos los países
+        nuevos = np.clip(np.diff(self.casos, axis=1, prepend=self.casos[:, :1]), 0, None)
+        suma = np.cumsum(nuevos, axis=1)
+        suma[:, VENTANA_MEDIA:] = suma[:, VENTANA_MEDIA:] - suma[:, :-VENTANA_MEDIA]
+        divisor = np.minimum(np.arange(1, nuevos.shape[1] + 1), VENTANA_MEDIA)
+        self.media_7d_casos = suma / divisor
+        self._nuevos = nuevos
+        self._rt = None
+
+    @property
+    def rt(self):
+        """
+        Rt de todos los países (matriz países x días), calculado la primera vez que se pide
+        """
+        if self._rt is None:
+            self._rt = estimar_rt(self._nuevos)[0]
+        return self._rt
+
+    def serie(self, pais, metrica, por_100k=False):
+        """
+        Serie de un país: metrica en {'casos', 'muertes', 'media_7d_casos', 'rt'}
+        Rt no se normaliza por población
+        """
+        valores = getattr(self, metrica)[self.posicion[pais]]
+        if por_100k and metrica != 'rt':
+            valores = valores / self.poblacion[self.posicion[pais]] * 100_000
+        return valores
+
+
+def _construir():
+    global _indice, _version
+
+    # La versión es la hora en que se guardó el histórico masivo en la caché en disco
+    version = fecha_guardado(URL_HISTORICO, PARAMS_HISTORICO)
+    paises, _ = obtener_json_cacheado(URL_PAISES, ttl=TTL_MASIVO, descargar=obtener_json)
+    historicos, _ = obtener_json_cacheado(URL_HISTORICO, PARAMS_HISTORICO, ttl=TTL_MASIVO,
+                                          descargar=obtener_json)
+    if not historicos:
+        return _indice
+
+    indice = IndiceCovid(paises or [], historicos)
+    with _lock:
+        _indice = indice
+        _version = version or fecha_guardado(URL_HISTORICO, PARAMS_HISTORICO)
+    return indice
+
+
+def _reconstruir():
+    with _lock_construccion:
+        if _indice is None or fecha_guardado(URL_HISTORICO, PARAMS_HISTORICO) != _version:
+            _construir()
+
+
+def _reconstruir_en_segundo_plano():
+    # Si ya hay una reconstrucción en curso no se lanza otra
+    if not _lock_construccion.acquire(blocking=False):
+        return
+
+    def tarea():
+        try:
+            _construir()
+        except Exception as e:
+            print(f"❌ Error construyendo el índice COVID: {e}")
+        finally:
+            _lock_construccion.release()
+
+    threading.Thread(target=tarea, daemon=True).start()
+
+
+def obtener_indice():
+    """
+    Retorna el índice global, o None si todavía no se ha construido
+    Nunca descarga ni reconstruye en el hilo que llama: la primera construcción
+    la hace la precarga, y las siguientes se lanzan en segundo plano cuando la
+    caché en disco guarda una descarga nueva. La versión guardada se consulta
+    como mucho una vez cada INTERVALO_VERIFICACION segundos.
+    """
+    global _verificado
+
+    ahora = time.time()
+    with _lock:
+        indice, version = _indice, _version
+        verificar = indice is None or ahora - _verificado >= INTERVALO_VERIFICACION
+        if verificar:
+            _verificado = ahora
+
+    if indice is None:
+        _reconstruir_en_segundo_plano()
+    elif verificar:
+        guardado = fecha_guardado(URL_HISTORICO, PARAMS_HISTORICO)
+        if guardado != version:
+            _reconstruir_en_segundo_plano()
+        elif ahora - guardado > TTL_MASIVO:
+            revalidar_en_segundo_plano(URL_HISTORICO, PARAMS_HISTORICO, obtener_json)
+            revalidar_en_segundo_plano(URL_PAISES, descargar=obtener_json)
+    return indice
+
+
+def _precargar():
+    refrescar_si_envejece(URL_PAISES, ttl=TTL_MASIVO, descargar=obtener_json)
+    refrescar_si_envejece(URL_HISTORICO, PARAMS_HISTORICO, ttl=TTL_MASIVO, descargar=obtener_json)
+    _reconstruir()
+
+
+precalentamiento.registrar_tarea("covid/masivo", _precargar, intervalo=TTL_MASIVO / 2)
@@ -0,0 +1,239 @@
+"""
+Almacén local del indicador de malaria del Banco Mundial (WEF_GCIHH_MALARIAPC).
+
+El dataset completo se descarga una sola vez recorriendo todas las páginas de
+la API (parámetro skip) y se guarda en SQLite con índice por país y año. Los
+callbacks leen la serie de un país desde un índice en memoria construido a
+partir de ese archivo, sin tocar la red.
+
+Ingesta manual o desde cron:
+    python -m utils.datos_malaria
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from utils.cliente_http import obtener_json
+
+URL_DATOS = "https://data360api.worldbank.org/data360/data"
+PARAMS_INDICADOR = {"DATABASE_ID": "WEF_GCIHH", "INDICATOR": "WEF_GCIHH_MALARIAPC"}
+
+RUTA_ALMACEN = os.environ.get(
+    "MALARIA_RUTA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "malaria.sqlite")
+)
+
+# Cada cuánto se vuelve a descargar el dataset (el indicador es anual)
+INTERVALO_REFRESCO = 24 * 60 * 60
+
+_indice = None            # {(ref_area, unidad): ([años], [valores])}
+_cargado_en = None        # hora de la última ingesta (time.time())
+_lock_indice = threading.Lock()
+_lock_ingesta = threading.Lock()      # escritura del almacén y recarga del índice
+_lock_refresco = threading.Lock()     # tomado mientras corre la ingesta en segundo plano
+
+
+def _reiniciar_tras_fork():
+    # La ingesta en curso en el padre (si la había) no sigue en el hijo
+    global _lock_indice, _lock_ingesta, _lock_refresco
+    _lock_indice = threading.Lock()
+    _lock_ingesta = threading.Lock()
+    _lock_refresco = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+# ==========================================
+# ARCHIVO SQLITE
+# ==========================================
+
+def conectar():
+    os.makedirs(os.path.dirname(RUTA_ALMACEN), exist_ok=True)
+    conexion = sqlite3.connect(RUTA_ALMACEN, timeout=5)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS observaciones ("
+        " ref_area TEXT NOT NULL,"
+        " unidad TEXT NOT NULL,"
+        " anio INTEGER NOT NULL,"
+        " valor REAL NOT NULL,"
+        " PRIMARY KEY (ref_area, unidad, anio))"
+    )
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS ingesta (id INTEGER PRIMARY KEY CHECK (id = 1), actualizado REAL NOT NULL)"
+    )
+    return conexion
+
+
+def _descargar_todas_las_paginas():
+    """
+    Recorre la API página por página hasta obtener todas las observaciones
+    """
+    filas = []
+    skip = 0
+    while True:
+        data = obtener_json(URL_DATOS, params={**PARAMS_INDICADOR, "skip": skip})
+        pagina = data.get("value", [])
+        if not pagina:
+            break
+
+        for item in pagina:
+            if (item.get("REF_AREA") is None or
+                    item.get("OBS_VALUE") is None or
+                    item.get("TIME_PERIOD") is None):
+                continue
+            try:
+                filas.append((
+                    item["REF_AREA"],
+                    item.get("UNIT_MEASURE") or "",
+                    int(item["TIME_PERIOD"]),
+                    float(item["OBS_VALUE"]),
+                ))
+            except (TypeError, ValueError):
+                continue
+
+        skip += len(pagina)
+        total = data.get("count")
+        if total is not None and skip >= int(total):
+            break
+    return filas
+
+
+def ingerir_dataset():
+    """
+    Descarga el dataset completo y reemplaza el contenido del almacén
+    Retorna el número de observaciones guardadas
+    """
+    # La descarga va sin lock: solo la escritura y la recarga del índice se serializan
+    filas = _descargar_todas_las_paginas()
+    if not filas:
+        raise ValueError("La API no devolvió observaciones")
+
+    with _lock_ingesta:
+        with closing(conectar()) as conexion, conexion:
+            conexion.execute("DELETE FROM observaciones")
+            conexion.executemany(
+                "INSERT OR REPLACE INTO observaciones (ref_area, unidad, anio, valor) VALUES (?, ?, ?, ?)",
+                filas
+            )
+            conexion.execute("INSERT OR REPLACE INTO ingesta (id, actualizado) VALUES (1, ?)", (time.time(),))
+
+        _cargar_indice()
+    return len(filas)
+
+
+# ==========================================
+# ÍNDICE EN MEMORIA
+# ==========================================
+
+def _cargar_indice():
+    """
+    Lee el archivo SQLite (ordenado por país y año) y arma el índice en memoria
+    """
+    global _indice, _cargado_en
+
+    with closing(conectar()) as conexion:
+        fila = conexion.execute("SELECT actualizado FROM ingesta WHERE id = 1").fetchone()
+        observaciones = conexion.execute(
+            "SELECT ref_area, unidad, anio, valor FROM observaciones ORDER BY ref_area, unidad, anio"
+        ).fetchall()
+
+    indice = {}
+    for ref_area, unidad, anio, valor in observaciones:
+        años, valores = indice.setdefault((ref_area, unidad), ([], []))
+        años.append(anio)
+        valores.append(valor)
+
+    with _lock_indice:
+        _indice = indice
+        _cargado_en = fila[0] if fila else None
+
+
+def _refrescar_en_segundo_plano():
+    # Si ya hay una ingesta en segundo plano no se lanza otra
+    if not _lock_refresco.acquire(blocking=False):
+        return
+
+    def tarea():
+        try:
+            ingerir_dataset()
+        except Exception as e:
+            print(f"❌ Error refrescando datos de malaria: {e}")
+        finally:
+            _lock_refresco.release()
+
+    threading.Thread(target=tarea, daemon=True).start()
+
+
+def _asegurar_datos():
+    if _indice is None:
+        _cargar_indice()
+
+    if _cargado_en is None:
+        # Primera vez: no hay nada guardado, se espera a la ingesta completa
+        ingerir_dataset()
+    elif time.time() - _cargado_en > INTERVALO_REFRESCO:
+        _refrescar_en_segundo_plano()
+
+
+def datos_disponibles():
+    """
+    Indica si el almacén ya tiene una ingesta, sin esperar a la red
+    Si no la tiene, lanza la primera ingesta en segundo plano: pensada para
+    las peticiones, que no deben quedar bloqueadas por la descarga completa
+    (la hace la precarga al arrancar)
+    """
+    if _indice is None:
+        _cargar_indice()
+    if _cargado_en is None:
+        _refrescar_en_segundo_plano()
+        return False
+    return True
+
+
+def leer_serie(pais_codigo, unidad="RANK", desde=None, hasta=None):
+    """
+    Retorna (años, valores) de un país ordenados por año, o (None, None) si no hay datos
+    Parámetros:
+        - pais_codigo: código REF_AREA (ej: 'GHA')
+        - unidad: UNIT_MEASURE de la observación
+        - desde, hasta: rango de años (inclusive) opcional
+    """
+    _asegurar_datos()
+
+    serie = _indice.get((pais_codigo, unidad))
+    if serie is None:
+        return None, None
+
+    años, valores = serie
+    pares = [
+        (año, valor) for año, valor in zip(años, valores)
+        if (desde is None or año >= desde) and (hasta is None or año <= hasta)
+    ]
+    if not pares:
+        return None, None
+    return [p[0] for p in pares], [p[1] for p in pares]
+
+
+def fecha_actualizacion():
+    """
+    Hora (time.time()) de la última ingesta guardada en el almacén
+    """
+    _asegurar_datos()
+    return _cargado_en
+
+
+def paises_disponibles(unidad="RANK"):
+    """
+    Lista de códigos REF_AREA con datos para la unidad indicada
+    """
+    _asegurar_datos()
+    return sorted(ref_area for ref_area, u in _indice if u == unidad)
+
+
+if __name__ == "__main__":
+    print(f"✅ Observaciones guardadas: {ingerir_dataset()}")
@@ -83,7 +83,17 @@ def fucion_graficas_ecu_log(P0,K,t_max,r):
 
 import numpy as np
 import plotly.graph_objects as go
-from scipy.integrate import odeint
+
+from utils.cache_compartida import memoizar
+from utils.carga_diferida import diferido
+
+integrate = diferido("scipy.integrate")
+
+# Las figuras de los modelos se guardan en la caché compartida como dict: los
+# mismos parámetros no se vuelven a integrar en ningún worker. Deserializar
+# una Figure costaría casi lo mismo que construirla de nuevo, así que las
+# funciones privadas devuelven el dict y las públicas arman la Figure con él.
+_figura_memoizada = memoizar("figuras", maximo_mb=128, convertir=go.Figure.to_dict)
 
 
 def funcion_graficas_ecu_log(P0, r, K, t_max):
@@ -115,12 +125,17 @@ def funcion_graficas_ecu_log(P0, r, K, t_max):
 
 
 def funcion_grafica_logistica_con_cosecha(P0, r, K, t_max, h):
+    return go.Figure(_figura_logistica_con_cosecha(P0, r, K, t_max, h))
+
+
+@_figura_memoizada
+def _figura_logistica_con_cosecha(P0, r, K, t_max, h):
     t = np.linspace(0, t_max, 500)
 
     def modelo(P, t, r, K, h):
         return r * P * (1 - P / K) - h
 
-    P = odeint(modelo, P0, t, args=(r, K, h)).flatten()
+    P = integrate.odeint(modelo, P0, t, args=(r, K, h)).flatten()
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(
@@ -147,6 +162,11 @@ def funcion_grafica_logistica_con_cosecha(P0, r, K, t_max, h):
 
 
 def generar_campo_vectorial(ecu_dx_dt, ecu_dy_dt, rango_x, rango_y, mallado):
+    return go.Figure(_figura_campo_vectorial(ecu_dx_dt, ecu_dy_dt, rango_x, rango_y, mallado))
+
+
+@_figura_memoizada
+def _figura_campo_vectorial(ecu_dx_dt, ecu_dy_dt, rango_x, rango_y, mallado):
     x = np.linspace(-rango_x, rango_x, mallado)
     y = np.linspace(-rango_y, rango_y, mallado)
     X, Y = np.meshgrid(x, y)
@@ -199,6 +219,11 @@ def generar_campo_vectorial(ecu_dx_dt, ecu_dy_dt, rango_x, rango_y, mallado):
 
 
 def generar_modelo_sir(N, I0, beta, gamma, T):
+    return go.Figure(_figura_modelo_sir(N, I0, beta, gamma, T))
+
+
+@_figura_memoizada
+def _figura_modelo_sir(N, I0, beta, gamma, T):
     t = np.linspace(0, T, T*5)
     S0 = N - I0
     R0 = 0
@@ -211,7 +236,7 @@ def generar_modelo_sir(N, I0, beta, gamma, T):
         dRdt = gamma * I
         return dSdt, dIdt, dRdt
 
-    ret = odeint(deriv, y0, t, args=(N, beta, gamma))
+    ret = integrate.odeint(deriv, y0, t, args=(N, beta, gamma))
     S, I, R = ret.T
 
     fig = go.Figure()
@@ -227,6 +252,11 @@ def generar_modelo_sir(N, I0, beta, gamma, T):
 
 
 def generar_modelo_seir(N, E0, I0, beta, sigma, gamma, T):
+    return go.Figure(_figura_modelo_seir(N, E0, I0, beta, sigma, gamma, T))
+
+
+@_figura_memoizada
+def _figura_modelo_seir(N, E0, I0, beta, sigma, gamma, T):
     t = np.linspace(0, T, T*5)
     R0 = 0
     S0 = N - E0 - I0
@@ -240,7 +270,7 @@ def generar_modelo_seir(N, E0, I0, beta, sigma, gamma, T):
         dRdt = gamma * I
         return dSdt, dEdt, dIdt, dRdt
 
-    ret = odeint(deriv, y0, t, args=(N, beta, sigma, gamma))
+    ret = integrate.odeint(deriv, y0, t, args=(N, beta, sigma, gamma))
     S, E, I, R = ret.T
 
     fig = go.Figure()
@@ -0,0 +1,224 @@
+"""
+Geocodificación en dos niveles para la página de clima.
+
+1. Gazetteer local (formato GeoNames, p. ej. cities500.txt) cargado en
+   arreglos ordenados por nombre normalizado: búsqueda exacta y por prefijo
+   con bisect, sin red. También alimenta el autocompletado de ciudades.
+2. Nominatim como respaldo para lo que no está en el gazetteer, pasando por
+   la caché en disco (utils.cache) para no repetir consultas: el servicio
+   solo admite una petición por segundo.
+
+Descarga del gazetteer (una sola vez):
+    python -m utils.geocodificacion
+"""
+import io
+import os
+import threading
+import unicodedata
+import urllib.parse
+import zipfile
+from bisect import bisect_left
+
+import numpy as np
+
+from utils import precalentamiento
+from utils.cache import obtener_json_cacheado
+from utils.cliente_http import obtener, obtener_json
+
+RUTA_GAZETTEER = os.environ.get(
+    "GAZETTEER_RUTA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cities500.txt")
+)
+URL_GAZETTEER = "https://download.geonames.org/export/dump/cities500.zip"
+
+# Un lugar no cambia de coordenadas: la caché de Nominatim dura 30 días
+TTL_NOMINATIM = 30 * 24 * 60 * 60
+
+_gazetteer = None
+_lock = threading.Lock()
+
+
+def _reiniciar_tras_fork():
+    # Una carga del gazetteer a medio hacer en el padre no termina en el hijo
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+def normalizar(texto):
+    """
+    Minúsculas y sin tildes: 'Bogotá ' -> 'bogota'
+    """
+    texto = unicodedata.normalize("NFKD", texto.strip().lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+# ==========================================
+# GAZETTEER LOCAL
+# ==========================================
+
+class Gazetteer:
+    """
+    Índice compacto de ciudades: claves ordenadas + columnas NumPy paralelas
+    """
+
+    def __init__(self, filas):
+        # filas: (clave, nombre, pais, lat, lon, poblacion)
+        filas.sort(key=lambda f: (f[0], -f[5]))
+        self.claves = [f[0] for f in filas]
+        self.nombres = [f[1] for f in filas]
+        self.paises = [f[2] for f in filas]
+        self.lat = np.array([f[3] for f in filas], dtype=np.float32)
+        self.lon = np.array([f[4] for f in filas], dtype=np.float32)
+        self.poblacion = np.array([f[5] for f in filas], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.claves)
+
+    def _rango(self, prefijo):
+        inicio = bisect_left(self.claves, prefijo)
+        fin = bisect_left(self.claves, prefijo + "\uffff", lo=inicio)
+        return inicio, fin
+
+    def _lugar(self, i):
+        return {
+            "lat": float(self.lat[i]),
+            "lon": float(self.lon[i]),
+            "name": f"{self.nombres[i]}, {self.paises[i]}",
+        }
+
+    def buscar(self, nombre, pais=None):
+        """
+        Coincidencia exacta (normalizada) más poblada, opcionalmente filtrando por país
+        """
+        clave = normalizar(nombre)
+        inicio = bisect_left(self.claves, clave)
+        fin = inicio
+        while fin < len(self.claves) and self.claves[fin] == clave:
+            fin += 1
+
+        # Dentro de una clave las filas ya están ordenadas por población
+        for i in range(inicio, fin):
+            if pais is None or self.paises[i] == pais:
+                return self._lugar(i)
+        return None
+
+    def sugerir(self, prefijo, limite=10):
+        """
+        Las 'limite' ciudades más pobladas cuyo nombre empieza con 'prefijo'
+        """
+        inicio, fin = self._rango(normalizar(prefijo))
+        if inicio == fin:
+            return []
+
+        poblacion = self.poblacion[inicio:fin]
+        if fin - inicio > limite:
+            mejores = np.argpartition(-poblacion, limite)[:limite]
+        else:
+            mejores = np.arange(fin - inicio)
+        mejores = mejores[np.argsort(-poblacion[mejores], kind="stable")]
+        return [f"{self.nombres[inicio + i]}, {self.paises[inicio + i]}" for i in mejores]
+
+
+def _leer_geonames(lineas):
+    filas = []
+    for linea in lineas:
+        campos = linea.rstrip("\n").split("\t")
+        if len(campos) < 15:
+            continue
+        try:
+            nombre, lat, lon = campos[1], float(campos[4]), float(campos[5])
+            pais, poblacion = campos[8], int(campos[14] or 0)
+        except ValueError:
+            continue
+        filas.append((normalizar(nombre), nombre, pais, lat, lon, poblacion))
+    return filas
+
+
+def cargar_gazetteer():
+    """
+    Retorna el gazetteer en memoria (se carga una vez); vacío si no hay archivo
+    """
+    global _gazetteer
+    if _gazetteer is not None:
+        return _gazetteer
+
+    with _lock:
+        if _gazetteer is None:
+            filas = []
+            if os.path.exists(RUTA_GAZETTEER):
+                with open(RUTA_GAZETTEER, encoding="utf-8") as archivo:
+                    filas = _leer_geonames(archivo)
+            else:
+                print(f"⚠ Gazetteer no encontrado en {RUTA_GAZETTEER}; solo se usará Nominatim")
+            _gazetteer = Gazetteer(filas)
+    return _gazetteer
+
+
+# El archivo no cambia mientras la app corre: la tarea solo lo carga antes de la primera búsqueda
+precalentamiento.registrar_tarea("geocodificacion/gazetteer", cargar_gazetteer, intervalo=24 * 60 * 60)
+
+
+def descargar_gazetteer():
+    """
+    Descarga cities500 de GeoNames y lo deja en RUTA_GAZETTEER
+    """
+    respuesta = obtener(URL_GAZETTEER, timeout=(3.05, 120))
+    with zipfile.ZipFile(io.BytesIO(respuesta.content)) as comprimido:
+        contenido = comprimido.read("cities500.txt")
+    os.makedirs(os.path.dirname(RUTA_GAZETTEER), exist_ok=True)
+    with open(RUTA_GAZETTEER, "wb") as archivo:
+        archivo.write(contenido)
+
+
+# ==========================================
+# CONSULTA EN DOS NIVELES
+# ==========================================
+
+def _separar_pais(consulta):
+    """
+    'Lima, PE' -> ('Lima', 'PE'); 'Lima' -> ('Lima', None)
+    """
+    partes = [p.strip() for p in consulta.split(",")]
+    if len(partes) == 2 and len(partes[1]) == 2 and partes[1].isalpha():
+        return partes[0], partes[1].upper()
+    return consulta, None
+
+
+def geocodificar(consulta):
+    """
+    Retorna {'lat', 'lon', 'name'} o None si la ciudad no se encuentra
+    """
+    nombre, pais = _separar_pais(consulta)
+    # La clave normalizada es solo para el gazetteer; Nominatim recibe el texto original
+    lugar = cargar_gazetteer().buscar(nombre, pais)
+    if lugar is not None:
+        return lugar
+
+    url = (
+        "https://nominatim.openstreetmap.org/search"
+        f"?q={urllib.parse.quote(consulta.strip())}&format=json&limit=1"
+    )
+    data, _ = obtener_json_cacheado(url, ttl=TTL_NOMINATIM, descargar=obtener_json)
+    if not data:
+        return None
+
+    return {
+        "lat": float(data[0]["lat"]),
+        "lon": float(data[0]["lon"]),
+        "name": data[0]["display_name"],
+    }
+
+
+def sugerir_ciudades(prefijo, limite=10):
+    if not prefijo or len(prefijo.strip()) < 2:
+        return []
+    return cargar_gazetteer().sugerir(prefijo, limite)
+
+
+if __name__ == "__main__":
+    descargar_gazetteer()
+    print(f"✅ Gazetteer guardado en {RUTA_GAZETTEER}: {len(cargar_gazetteer())} ciudades")
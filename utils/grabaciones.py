@@ -0,0 +1,107 @@
+"""
+Grabación y reproducción de respuestas HTTP para trabajar sin red.
+
+utils.cliente_http consulta este módulo según la variable HTTP_MODO:
+    - 'vivo' (por defecto): peticiones reales, sin grabar
+    - 'grabar': peticiones reales y cada respuesta se guarda en disco
+    - 'reproducir': nunca sale a la red; responde con lo grabado
+
+Cada respuesta es un archivo JSON en HTTP_GRABACIONES, con nombre derivado
+de la URL canónica (parámetros ordenados), así que la misma consulta siempre
+cae en el mismo archivo. El servidor simulado (utils.servidor_simulado) lee
+los mismos archivos.
+"""
+import base64
+import hashlib
+import json
+import os
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+MODO = os.environ.get("HTTP_MODO", "vivo")
+RUTA_GRABACIONES = os.environ.get(
+    "HTTP_GRABACIONES",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "grabaciones")
+)
+
+
+def url_canonica(url, params=None):
+    """
+    URL completa con los parámetros de la query ordenados
+    Ejemplo: ('https://x/y?b=1', {'a': 2}) -> 'https://x/y?a=2&b=1'
+    """
+    partes = urlsplit(url)
+    query = parse_qsl(partes.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in params.items()]
+    return urlunsplit((partes.scheme, partes.netloc.lower(), partes.path, urlencode(sorted(query)), ""))
+
+
+def ruta_grabacion(url, ruta_base=None):
+    completa = url_canonica(url)
+    resumen = hashlib.sha1(completa.encode("utf-8")).hexdigest()[:16]
+    host = urlsplit(completa).netloc.replace(":", "_")
+    return os.path.join(ruta_base or RUTA_GRABACIONES, host, f"{resumen}.json")
+
+
+# ==========================================
+# GRABAR / LEER
+# ==========================================
+
+def grabar(url, respuesta, ruta_base=None):
+    """
+    Guarda status, content-type y cuerpo de una respuesta requests
+    """
+    contenido = respuesta.content
+    try:
+        cuerpo, codificacion = contenido.decode("utf-8"), "texto"
+    except UnicodeDecodeError:
+        cuerpo, codificacion = base64.b64encode(contenido).decode("ascii"), "base64"
+
+    ruta = ruta_grabacion(url, ruta_base)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump({
+            "url": url_canonica(url),
+            "status": respuesta.status_code,
+            "content_type": respuesta.headers.get("Content-Type", "application/json"),
+            "codificacion": codificacion,
+            "cuerpo": cuerpo,
+        }, archivo, ensure_ascii=False)
+
+
+def leer_grabacion(url, ruta_base=None):
+    """
+    Retorna (status, content_type, bytes) o None si no hay grabación
+    """
+    ruta = ruta_grabacion(url, ruta_base)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding="utf-8") as archivo:
+        grabacion = json.load(archivo)
+
+    if grabacion["codificacion"] == "base64":
+        contenido = base64.b64decode(grabacion["cuerpo"])
+    else:
+        contenido = grabacion["cuerpo"].encode("utf-8")
+    return grabacion["status"], grabacion["content_type"], contenido
+
+
+def reproducir(url, ruta_base=None):
+    """
+    Construye un requests.Response a partir de la grabación de 'url'
+    Lanza ConnectionError si no existe, igual que si no hubiera red
+    """
+    grabacion = leer_grabacion(url, ruta_base)
+    if grabacion is None:
+        raise requests.exceptions.ConnectionError(f"Sin grabación para {url_canonica(url)}")
+
+    status, content_type, contenido = grabacion
+    respuesta = requests.Response()
+    respuesta.status_code = status
+    respuesta.headers["Content-Type"] = content_type
+    respuesta._content = contenido
+    respuesta.url = url_canonica(url)
+    respuesta.encoding = "utf-8"
+    return respuesta
@@ -0,0 +1,265 @@
+"""
+Diagnóstico de memoria con tracemalloc: qué callback retiene memoria y dónde.
+
+Apagado por defecto. Se enciende con MEMORIA_DIAGNOSTICO=1 al arrancar, o en
+caliente con POST /admin/memoria/activar (solo en el worker que atiende la
+petición: así se diagnostica un worker de producción sin tocar los demás).
+
+Con el diagnóstico activo, cada callback registra:
+    - memoria neta retenida por llamada: la memoria trazada después menos la
+      de antes (dos lecturas de contador, casi gratis)
+    - cada MEMORIA_CADA llamadas, instantáneas antes y después de la llamada:
+      las líneas de código que dejaron memoria viva se acumulan por callback
+      (p. ej. utils/funciones.py:170 para el np.meshgrid de
+      generar_campo_vectorial, o la línea de una caché de DataFrames)
+
+GET /admin/memoria devuelve lo acumulado por callback, y
+GET /admin/memoria/crecimiento compara la memoria viva con la instantánea
+de la consulta anterior: las líneas que más crecieron entre las dos.
+
+Costo: tracemalloc agrega trabajo a cada asignación de Python (bastante
+menos con MEMORIA_MARCOS=1, el valor por defecto) y las instantáneas
+recorren todas las asignaciones vivas, por eso se toman solo cada N llamadas
+y nunca dos a la vez. Las asignaciones de otros hilos durante una llamada
+instantánea se le atribuyen a ese callback; con varias llamadas en paralelo,
+los sitios por callback son aproximados. La respuesta ya serializada sigue
+viva al medir (aparece como plotly/io/_json.py); lo que importa es lo que
+crece entre consultas a /admin/memoria/crecimiento. Solo se ve lo asignado
+después de activar el diagnóstico.
+"""
+import os
+import sysconfig
+import threading
+import tracemalloc
+from functools import wraps
+
+from flask import jsonify, request
+
+from utils.admin import requiere_admin
+from utils.telemetria import nombre_callback
+
+ACTIVO_AL_INICIO = os.environ.get("MEMORIA_DIAGNOSTICO", "0") == "1"
+MARCOS = int(os.environ.get("MEMORIA_MARCOS", "1"))
+CADA = max(1, int(os.environ.get("MEMORIA_CADA", "10")))
+SITIOS_POR_CALLBACK = 20
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BIBLIOTECA = sysconfig.get_paths()["stdlib"]
+FILTROS = [
+    tracemalloc.Filter(False, __file__),           # lo acumulado aquí mismo
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_estadisticas = {}                     # nombre del callback -> dict (ver _anotar)
+_lock = threading.Lock()
+_lock_instantanea = threading.Lock()   # una sola instantánea en curso por proceso
+_anterior = {"instantanea": None}      # base de /admin/memoria/crecimiento
+
+
+def activar(marcos=MARCOS):
+    """
+    Empieza a trazar asignaciones guardando 'marcos' niveles de pila
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(marcos)
+
+
+def desactivar():
+    """
+    Deja de trazar; descarta las trazas y lo acumulado
+    """
+    tracemalloc.stop()
+    with _lock:
+        _estadisticas.clear()
+        _anterior["instantanea"] = None
+
+
+def _instantanea():
+    return tracemalloc.take_snapshot().filter_traces(FILTROS)
+
+
+def _sitio(estadistica):
+    marco = estadistica.traceback[0]
+    archivo = marco.filename
+    if archivo.startswith(RAIZ):
+        archivo = os.path.relpath(archivo, RAIZ)
+    elif "site-packages" in archivo:
+        archivo = archivo.split("site-packages" + os.sep, 1)[1]
+    elif archivo.startswith(BIBLIOTECA):
+        archivo = os.path.relpath(archivo, BIBLIOTECA)
+    return f"{archivo}:{marco.lineno}"
+
+
+def _diferencias(despues, antes, limite):
+    """
+    (sitio, bytes, bloques) de las líneas que más memoria viva sumaron
+    """
+    cambios = [e for e in despues.compare_to(antes, "lineno") if e.size_diff > 0]
+    return [(_sitio(e), e.size_diff, e.count_diff) for e in cambios[:limite]]
+
+
+# ==========================================
+# POR CALLBACK
+# ==========================================
+
+def _anotar(nombre, neto, sitios):
+    with _lock:
+        datos = _estadisticas.setdefault(nombre, {
+            "llamadas": 0, "neto_total": 0, "neto_maximo": 0, "instantaneas": 0, "sitios": {},
+        })
+        datos["llamadas"] += 1
+        datos["neto_total"] += neto
+        datos["neto_maximo"] = max(datos["neto_maximo"], neto)
+        if sitios is None:
+            return
+        datos["instantaneas"] += 1
+        for sitio, tamaño, bloques in sitios:
+            acumulado = datos["sitios"].setdefault(sitio, [0, 0])
+            acumulado[0] += tamaño
+            acumulado[1] += bloques
+        # Solo los sitios más pesados, para que no crezca sin límite
+        if len(datos["sitios"]) > 2 * SITIOS_POR_CALLBACK:
+            mayores = sorted(datos["sitios"].items(), key=lambda par: par[1][0], reverse=True)
+            datos["sitios"] = dict(mayores[:SITIOS_POR_CALLBACK])
+
+
+def _toca_instantanea(nombre):
+    datos = _estadisticas.get(nombre)
+    llamadas = datos["llamadas"] if datos else 0
+    return llamadas % CADA == 0 and _lock_instantanea.acquire(blocking=False)
+
+
+def _envolver_callback(funcion, nombre):
+    @wraps(funcion)
+    def envuelta(*args, **kwargs):
+        if not tracemalloc.is_tracing():
+            return funcion(*args, **kwargs)
+
+        instantanea = _toca_instantanea(nombre)
+        try:
+            antes = _instantanea() if instantanea else None
+            memoria_antes = tracemalloc.get_traced_memory()[0]
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                # Si se desactivó durante la llamada no hay nada que comparar
+                if tracemalloc.is_tracing():
+                    neto = tracemalloc.get_traced_memory()[0] - memoria_antes
+                    sitios = _diferencias(_instantanea(), antes, SITIOS_POR_CALLBACK) if instantanea else None
+                    _anotar(nombre, neto, sitios)
+        finally:
+            if instantanea:
+                _lock_instantanea.release()
+
+    envuelta._memoria = True
+    return envuelta
+
+
+def envolver_callbacks(app):
+    for entrada in list(app.callback_map.values()):
+        funcion = entrada.get("callback")
+        if funcion is not None and not getattr(funcion, "_memoria", False):
+            entrada["callback"] = _envolver_callback(funcion, nombre_callback(funcion))
+
+
+def resumen():
+    """
+    Lo acumulado por callback, ordenado por memoria neta retenida
+    """
+    with _lock:
+        callbacks = {}
+        for nombre, datos in _estadisticas.items():
+            sitios = sorted(datos["sitios"].items(), key=lambda par: par[1][0], reverse=True)
+            callbacks[nombre] = {
+                "llamadas": datos["llamadas"],
+                "neto_total_bytes": datos["neto_total"],
+                "neto_medio_bytes": datos["neto_total"] // datos["llamadas"],
+                "neto_maximo_bytes": datos["neto_maximo"],
+                "instantaneas": datos["instantaneas"],
+                "sitios": [{"sitio": sitio, "bytes": tamaño, "bloques": bloques}
+                           for sitio, (tamaño, bloques) in sitios[:SITIOS_POR_CALLBACK]],
+            }
+    actual, pico = tracemalloc.get_traced_memory()
+    return {
+        "activo": tracemalloc.is_tracing(),
+        "marcos": tracemalloc.get_traceback_limit(),
+        "instantanea_cada": CADA,
+        "trazada_bytes": actual,
+        "pico_bytes": pico,
+        "callbacks": dict(sorted(callbacks.items(), key=lambda par: par[1]["neto_total_bytes"], reverse=True)),
+    }
+
+
+def crecimiento(limite=25):
+    """
+    Líneas que más crecieron desde la consulta anterior; la instantánea
+    actual queda como base de la próxima
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    with _lock_instantanea:
+        actual = _instantanea()
+    with _lock:
+        anterior, _anterior["instantanea"] = _anterior["instantanea"], actual
+    total = sum(traza.size for traza in actual.traces)
+    if anterior is None:
+        return {"base": True, "total_bytes": total, "sitios": []}
+    sitios = _diferencias(actual, anterior, limite)
+    return {
+        "base": False,
+        "total_bytes": total,
+        "crecimiento_bytes": sum(tamaño for _, tamaño, _ in sitios),
+        "sitios": [{"sitio": sitio, "bytes": tamaño, "bloques": bloques} for sitio, tamaño, bloques in sitios],
+    }
+
+
+# ==========================================
+# INSTRUMENTACIÓN Y RUTAS
+# ==========================================
+
+def instrumentar(app):
+    """
+    Envuelve los callbacks (con el diagnóstico apagado cuesta una consulta a
+    tracemalloc.is_tracing() por llamada) y registra las rutas /admin/memoria
+    """
+    if ACTIVO_AL_INICIO:
+        activar()
+    envueltos = {"cantidad": -1}
+
+    @app.server.before_request
+    def _instrumentar_memoria():
+        if len(app.callback_map) != envueltos["cantidad"]:
+            envolver_callbacks(app)
+            envueltos["cantidad"] = len(app.callback_map)
+
+    @app.server.route("/admin/memoria")
+    @requiere_admin
+    def estado_memoria():
+        return jsonify({"pid": os.getpid(), **resumen()})
+
+    @app.server.route("/admin/memoria/crecimiento")
+    @requiere_admin
+    def crecimiento_memoria():
+        datos = crecimiento(request.args.get("limite", 25, type=int))
+        if datos is None:
+            return jsonify({"pid": os.getpid(), "error": "diagnóstico de memoria inactivo"}), 409
+        return jsonify({"pid": os.getpid(), **datos})
+
+    @app.server.route("/admin/memoria/activar", methods=["POST"])
+    @requiere_admin
+    def activar_memoria():
+        datos = request.get_json(silent=True) or request.form
+        try:
+            activar(int(datos.get("marcos", MARCOS)))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"pid": os.getpid(), "activo": True, "marcos": tracemalloc.get_traceback_limit()})
+
+    @app.server.route("/admin/memoria/desactivar", methods=["POST"])
+    @requiere_admin
+    def desactivar_memoria():
+        desactivar()
+        return jsonify({"pid": os.getpid(), "activo": False})
@@ -0,0 +1,94 @@
+"""
+Procesamiento vectorizado del histórico de disease.sh.
+
+El timeline ({'cases': {'1/22/20': 0, ...}, 'deaths': {...}}) se convierte
+en un DataFrame con índice de fechas en una sola llamada a pd.to_datetime, y
+todas las métricas derivadas se calculan como operaciones de columna:
+incrementos diarios, medias móviles de 7 días, tasa de crecimiento
+logarítmica, tiempo de duplicación y Rt (utils.reproduccion). El resultado se guarda por país y
+ventana en la caché compartida (utils.cache_compartida), y solo se recalcula
+cuando cambia el histórico de origen.
+"""
+import numpy as np
+
+from utils.cache_compartida import espacio
+from utils.carga_diferida import diferido
+from utils.reproduccion import estimar_rt
+
+pd = diferido("pandas")
+
+VENTANA_MEDIA = 7
+MAXIMO_MB = 32             # ≈ 110 KB por país y ventana con el histórico completo
+
+_cache = espacio("metricas_covid", maximo_mb=MAXIMO_MB)    # (pais, dias) -> (firma, DataFrame)
+
+
+def timeline_a_dataframe(historico):
+    """
+    DataFrame con columnas casos, muertes, recuperados (float64) indexado por fecha
+    """
+    timeline = historico.get('timeline', {}) if historico else {}
+    casos = timeline.get('cases', {})
+    if not casos:
+        return pd.DataFrame(columns=['casos', 'muertes', 'recuperados'], dtype=float)
+
+    df = pd.DataFrame({
+        'casos': pd.Series(casos, dtype=float),
+        'muertes': pd.Series(timeline.get('deaths', {}), dtype=float),
+        'recuperados': pd.Series(timeline.get('recovered', {}), dtype=float),
+    })
+    df.index = pd.to_datetime(df.index, format='%m/%d/%y')
+    df.index.name = 'fecha'
+    return df.sort_index()
+
+
+def calcular_metricas(df):
+    """
+    Agrega al DataFrame acumulado las columnas derivadas:
+        casos_nuevos, muertes_nuevas, media_7d_casos, media_7d_muertes,
+        crecimiento_log (1/día), tiempo_duplicacion (días) y
+        rt, rt_inferior, rt_superior (intervalo de credibilidad del 95%)
+    """
+    resultado = df.copy()
+
+    # Las correcciones de los reportes a veces bajan el acumulado: no hay incrementos negativos
+    resultado['casos_nuevos'] = df['casos'].diff().clip(lower=0)
+    resultado['muertes_nuevas'] = df['muertes'].diff().clip(lower=0)
+    resultado['media_7d_casos'] = resultado['casos_nuevos'].rolling(VENTANA_MEDIA, min_periods=1).mean()
+    resultado['media_7d_muertes'] = resultado['muertes_nuevas'].rolling(VENTANA_MEDIA, min_periods=1).mean()
+
+    log_casos = np.log(df['casos'].where(df['casos'] > 0))
+    crecimiento = log_casos.diff().rolling(VENTANA_MEDIA, min_periods=1).mean()
+    resultado['crecimiento_log'] = crecimiento
+    resultado['tiempo_duplicacion'] = np.log(2) / crecimiento.where(crecimiento > 0)
+
+    rt, rt_inferior, rt_superior = estimar_rt(resultado['casos_nuevos'].to_numpy())
+    resultado['rt'] = rt
+    resultado['rt_inferior'] = rt_inferior
+    resultado['rt_superior'] = rt_superior
+    return resultado
+
+
+def _firma(historico):
+    # Identifica una versión del histórico sin recorrerlo completo
+    casos = historico.get('timeline', {}).get('cases', {})
+    if not casos:
+        return (0, None, None)
+    ultima_fecha = next(reversed(casos))
+    return (len(casos), ultima_fecha, casos[ultima_fecha])
+
+
+def metricas_pais(pais, dias, historico):
+    """
+    DataFrame con acumulados y métricas derivadas de un país, cacheado por (pais, dias)
+    """
+    clave = (pais, dias)
+    firma = _firma(historico)
+
+    entrada = _cache.obtener(clave)
+    if entrada is not None and entrada[0] == firma:
+        return entrada[1]
+
+    df = calcular_metricas(timeline_a_dataframe(historico))
+    _cache.guardar(clave, (firma, df))
+    return df
@@ -0,0 +1,278 @@
+"""
+Perfilado a pedido de callbacks: cProfile o muestreo de pila (speedscope).
+
+Se arma de tres maneras, todas opcionales y apagadas por defecto:
+    - variable PERFILAR al arrancar: "página12.calibrar_con_datos_reales:5,página8.actualizar_dashboard_covid:3:muestreo"
+      (nombre del callback como en /metrics, cantidad de llamadas, modo)
+    - POST /admin/perfiles/armar con {"callback": ..., "n": 5, "modo": "cprofile"}
+    - cabecera X-Perfilar: cprofile|muestreo en una petición con X-Admin-Token:
+      se perfilan los callbacks de esa sola petición
+
+Modos:
+    - cprofile: archivo .pstats (abrir con snakeviz o pstats) y un .txt con
+      las 40 funciones de mayor tiempo acumulado
+    - muestreo: un hilo toma la pila del callback cada INTERVALO_MUESTREO
+      segundos; se guarda como .speedscope.json (abrir en speedscope.app).
+      Perturba mucho menos los tiempos que cProfile. Con el callback ocupando
+      la CPU, el muestreador solo obtiene el GIL cada sys.getswitchinterval()
+      (5 ms), así que bajar el intervalo de ahí no agrega resolución.
+
+El perfil cubre el callback completo tal como lo ejecuta Dash: el cálculo
+(odeint, least_squares), la validación de plotly al armar la figura y la
+serialización a JSON. Los archivos quedan en PERFILES_RUTA y se listan en
+GET /admin/perfiles. El armado es por proceso: con varios workers de
+gunicorn, /admin/perfiles/armar arma solo el que atendió la petición (la
+respuesta trae su pid); PERFILAR y X-Perfilar no tienen ese problema. Para
+los callbacks con background=True solo se perfila el despacho, ya que el
+cálculo corre en otro proceso.
+"""
+import cProfile
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from functools import wraps
+
+from flask import has_request_context, jsonify, request, send_from_directory
+
+from utils.admin import es_admin, requiere_admin
+from utils.telemetria import nombre_callback
+
+RUTA_PERFILES = os.environ.get(
+    "PERFILES_RUTA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "perfiles")
+)
+MODOS = ("cprofile", "muestreo")
+INTERVALO_MUESTREO = float(os.environ.get("PERFILADO_INTERVALO", "0.005"))
+CABECERA = "X-Perfilar"
+
+_armados = {}                        # nombre del callback -> [llamadas restantes, modo]
+_lock = threading.Lock()
+_lock_cprofile = threading.Lock()    # un solo cProfile activo a la vez por proceso
+_secuencia = itertools.count(1)      # distingue archivos creados en el mismo segundo
+
+
+def armar(nombre, n=1, modo="cprofile"):
+    """
+    Perfila las próximas 'n' llamadas del callback 'nombre' en este proceso
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconocido: {modo!r} (opciones: {', '.join(MODOS)})")
+    with _lock:
+        if n > 0:
+            _armados[nombre] = [int(n), modo]
+        else:
+            _armados.pop(nombre, None)
+
+
+def _armar_desde_entorno(texto):
+    # "a.b:5,c.d:3:muestreo" -> armar('a.b', 5), armar('c.d', 3, 'muestreo')
+    for parte in filter(None, (p.strip() for p in texto.split(","))):
+        nombre, _, resto = parte.partition(":")
+        n, _, modo = resto.partition(":")
+        armar(nombre, int(n or 1), modo or "cprofile")
+
+
+def _tomar_turno(nombre):
+    """
+    Modo a usar en esta llamada, o None si no corresponde perfilar
+    """
+    if _armados:
+        with _lock:
+            armado = _armados.get(nombre)
+            if armado is not None:
+                armado[0] -= 1
+                if armado[0] <= 0:
+                    del _armados[nombre]
+                return armado[1]
+
+    if has_request_context():
+        modo = request.headers.get(CABECERA)
+        if modo in MODOS and es_admin():
+            return modo
+    return None
+
+
+def _ruta_archivo(nombre, modo, extension):
+    os.makedirs(RUTA_PERFILES, exist_ok=True)
+    seguro = re.sub(r"[^\w.-]", "_", nombre)
+    marca = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(RUTA_PERFILES, f"{marca}_{os.getpid()}-{next(_secuencia)}_{seguro}_{modo}{extension}")
+
+
+# ==========================================
+# CPROFILE
+# ==========================================
+
+def _con_cprofile(funcion, nombre, args, kwargs):
+    # Con otro cProfile activo (otro hilo) la llamada corre sin perfilar
+    if not _lock_cprofile.acquire(blocking=False):
+        return funcion(*args, **kwargs)
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            perfil.disable()
+            ruta = _ruta_archivo(nombre, "cprofile", ".pstats")
+            perfil.dump_stats(ruta)
+            texto = io.StringIO()
+            pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(40)
+            with open(ruta[:-len(".pstats")] + ".txt", "w", encoding="utf-8") as archivo:
+                archivo.write(texto.getvalue())
+    finally:
+        _lock_cprofile.release()
+
+
+# ==========================================
+# MUESTREO
+# ==========================================
+
+class Muestreador(threading.Thread):
+    """
+    Toma la pila de un hilo cada 'intervalo' segundos hasta que se llama detener()
+    """
+
+    def __init__(self, id_hilo, intervalo=INTERVALO_MUESTREO):
+        super().__init__(daemon=True, name="perfilado-muestreo")
+        self.id_hilo = id_hilo
+        self.intervalo = intervalo
+        self.marcos = {}       # (función, archivo, línea) -> índice
+        self.muestras = []
+        self.pesos = []
+        self._parar = threading.Event()
+
+    def _indice(self, codigo):
+        clave = (codigo.co_name, codigo.co_filename, codigo.co_firstlineno)
+        indice = self.marcos.get(clave)
+        if indice is None:
+            indice = self.marcos[clave] = len(self.marcos)
+        return indice
+
+    def run(self):
+        anterior = time.perf_counter()
+        while not self._parar.wait(self.intervalo):
+            marco = sys._current_frames().get(self.id_hilo)
+            ahora = time.perf_counter()
+            pila = []
+            while marco is not None:
+                pila.append(self._indice(marco.f_code))
+                marco = marco.f_back
+            if pila:
+                self.muestras.append(pila[::-1])
+                self.pesos.append(ahora - anterior)
+            anterior = ahora
+
+    def detener(self):
+        self._parar.set()
+        self.join()
+
+    def a_speedscope(self, nombre):
+        marcos = sorted(self.marcos.items(), key=lambda par: par[1])
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": nombre,
+            "shared": {"frames": [{"name": f, "file": archivo, "line": linea}
+                                  for (f, archivo, linea), _ in marcos]},
+            "profiles": [{
+                "type": "sampled",
+                "name": nombre,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(self.pesos),
+                "samples": self.muestras,
+                "weights": self.pesos,
+            }],
+        }
+
+
+def _con_muestreo(funcion, nombre, args, kwargs):
+    muestreador = Muestreador(threading.get_ident())
+    muestreador.start()
+    try:
+        return funcion(*args, **kwargs)
+    finally:
+        muestreador.detener()
+        with open(_ruta_archivo(nombre, "muestreo", ".speedscope.json"), "w", encoding="utf-8") as archivo:
+            json.dump(muestreador.a_speedscope(nombre), archivo)
+
+
+# ==========================================
+# INSTRUMENTACIÓN Y RUTAS
+# ==========================================
+
+def _envolver_callback(funcion, nombre):
+    @wraps(funcion)
+    def envuelta(*args, **kwargs):
+        modo = _tomar_turno(nombre)
+        if modo is None:
+            return funcion(*args, **kwargs)
+        if modo == "muestreo":
+            return _con_muestreo(funcion, nombre, args, kwargs)
+        return _con_cprofile(funcion, nombre, args, kwargs)
+
+    envuelta._perfilado = True
+    return envuelta
+
+
+def envolver_callbacks(app):
+    for entrada in list(app.callback_map.values()):
+        funcion = entrada.get("callback")
+        if funcion is not None and not getattr(funcion, "_perfilado", False):
+            entrada["callback"] = _envolver_callback(funcion, nombre_callback(funcion))
+
+
+def listar():
+    """
+    Archivos de perfil guardados, del más reciente al más antiguo
+    """
+    if not os.path.isdir(RUTA_PERFILES):
+        return []
+    archivos = []
+    for nombre in os.listdir(RUTA_PERFILES):
+        ruta = os.path.join(RUTA_PERFILES, nombre)
+        archivos.append({"archivo": nombre, "bytes": os.path.getsize(ruta), "modificado": os.path.getmtime(ruta)})
+    return sorted(archivos, key=lambda a: a["modificado"], reverse=True)
+
+
+def instrumentar(app):
+    """
+    Envuelve los callbacks (solo cuesta una consulta a un dict por llamada
+    mientras no haya nada armado) y registra las rutas /admin/perfiles
+    """
+    _armar_desde_entorno(os.environ.get("PERFILAR", ""))
+    envueltos = {"cantidad": -1}
+
+    @app.server.before_request
+    def _instrumentar_perfilado():
+        if len(app.callback_map) != envueltos["cantidad"]:
+            envolver_callbacks(app)
+            envueltos["cantidad"] = len(app.callback_map)
+
+    @app.server.route("/admin/perfiles")
+    @requiere_admin
+    def perfiles():
+        with _lock:
+            armados = {nombre: {"restantes": n, "modo": modo} for nombre, (n, modo) in _armados.items()}
+        return jsonify({"pid": os.getpid(), "armados": armados, "archivos": listar()})
+
+    @app.server.route("/admin/perfiles/armar", methods=["POST"])
+    @requiere_admin
+    def armar_perfil():
+        datos = request.get_json(silent=True) or request.form
+        try:
+            armar(datos["callback"], int(datos.get("n", 1)), datos.get("modo", "cprofile"))
+        except (KeyError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"pid": os.getpid(), "armado": datos["callback"]})
+
+    @app.server.route("/admin/perfiles/<path:archivo>")
+    @requiere_admin
+    def descargar_perfil(archivo):
+        return send_from_directory(RUTA_PERFILES, archivo, as_attachment=True)
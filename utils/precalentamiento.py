@@ -0,0 +1,143 @@
+"""
+Planificador en segundo plano que mantiene calientes las cachés.
+
+Las páginas registran al importarse las tareas de precarga de sus listas
+fijas (países del dashboard COVID, países del ajuste de malaria). Al iniciar
+la app, un hilo ejecuta cada tarea periódicamente con jitter, sobre un pool
+pequeño propio para no competir con las peticiones interactivas, de modo que
+en régimen estable los callbacks siempre encuentran los datos en caché.
+
+El estado de cada tarea se consulta en /estado/precalentamiento.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import jsonify
+
+MAXIMO_SIMULTANEAS = int(os.environ.get("PRECALENTAMIENTO_HILOS", "2"))
+JITTER = 0.1              # ±10% sobre el intervalo de cada tarea
+RETRASO_INICIAL = 5.0     # las primeras ejecuciones se reparten en estos segundos
+
+_tareas = {}              # nombre -> dict(funcion, intervalo, proxima, estado...)
+_lock = threading.Lock()
+_hilo = None
+
+
+def _reiniciar_tras_fork():
+    # El planificador y su pool no existen en el hijo: iniciar() los vuelve a crear
+    global _lock, _hilo
+    _lock = threading.Lock()
+    _hilo = None
+    for tarea in _tareas.values():
+        tarea["en_curso"] = False
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+def registrar_tarea(nombre, funcion, intervalo):
+    """
+    Registra (o reemplaza) una tarea de precarga
+    Parámetros:
+        - nombre: identificador único, se muestra en el estado
+        - funcion: callable sin argumentos
+        - intervalo: segundos entre ejecuciones
+    """
+    with _lock:
+        _tareas[nombre] = {
+            "funcion": funcion,
+            "intervalo": intervalo,
+            "proxima": time.time() + random.uniform(0, RETRASO_INICIAL),
+            "en_curso": False,
+            "ultima_ejecucion": None,
+            "duracion": None,
+            "ejecuciones": 0,
+            "errores": 0,
+            "ultimo_error": None,
+        }
+
+
+def _ejecutar(nombre):
+    with _lock:
+        tarea = _tareas[nombre]
+    inicio = time.time()
+    error = None
+    try:
+        tarea["funcion"]()
+    except Exception as e:
+        error = repr(e)
+        print(f"❌ Error en precarga '{nombre}': {error}")
+
+    with _lock:
+        tarea["en_curso"] = False
+        tarea["ultima_ejecucion"] = inicio
+        tarea["duracion"] = time.time() - inicio
+        tarea["ejecuciones"] += 1
+        if error:
+            tarea["errores"] += 1
+            tarea["ultimo_error"] = error
+        factor = 1 + random.uniform(-JITTER, JITTER)
+        tarea["proxima"] = time.time() + tarea["intervalo"] * factor
+
+
+def _bucle(pool):
+    while True:
+        ahora = time.time()
+        with _lock:
+            pendientes = [
+                nombre for nombre, tarea in _tareas.items()
+                if not tarea["en_curso"] and tarea["proxima"] <= ahora
+            ]
+            for nombre in pendientes:
+                _tareas[nombre]["en_curso"] = True
+        for nombre in pendientes:
+            pool.submit(_ejecutar, nombre)
+        time.sleep(1.0)
+
+
+def iniciar():
+    """
+    Arranca el planificador (una sola vez por proceso)
+    """
+    global _hilo
+    with _lock:
+        if _hilo is not None:
+            return
+        pool = ThreadPoolExecutor(max_workers=MAXIMO_SIMULTANEAS, thread_name_prefix="precalentamiento")
+        _hilo = threading.Thread(target=_bucle, args=(pool,), daemon=True, name="planificador")
+        _hilo.start()
+
+
+def estado():
+    """
+    Resumen serializable de todas las tareas registradas
+    """
+    ahora = time.time()
+    with _lock:
+        tareas = {
+            nombre: {
+                "intervalo": tarea["intervalo"],
+                "en_curso": tarea["en_curso"],
+                "ejecuciones": tarea["ejecuciones"],
+                "errores": tarea["errores"],
+                "ultimo_error": tarea["ultimo_error"],
+                "duracion": tarea["duracion"],
+                "hace": None if tarea["ultima_ejecucion"] is None else ahora - tarea["ultima_ejecucion"],
+                "proxima_en": tarea["proxima"] - ahora,
+            }
+            for nombre, tarea in _tareas.items()
+        }
+    return {"activo": _hilo is not None, "tareas": tareas}
+
+
+def registrar_ruta_estado(server):
+    """
+    Expone el estado del planificador en el servidor Flask de la app
+    """
+    @server.route("/estado/precalentamiento")
+    def estado_precalentamiento():
+        return jsonify(estado())
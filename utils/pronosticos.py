@@ -0,0 +1,108 @@
+"""
+Caché de pronósticos de Open-Meteo por celda de la malla del modelo.
+
+Dos búsquedas cercanas (p. ej. dos barrios de la misma ciudad) caen en la
+misma celda al redondear lat/lon a la resolución del modelo, y el pronóstico
+solo cambia cuando se publica una nueva corrida. Por eso la clave es
+(lat redondeada, lon redondeada, hora de emisión) y las entradas vencen
+cuando se publica la corrida siguiente. Se guardan en la caché compartida
+(utils.cache_compartida), así que una celda descargada por un worker sirve
+para todos.
+
+Los datos se guardan como columnas NumPy (datetime64 + float32) en lugar del
+JSON original, así que servir una entrada no requiere volver a parsear nada.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+
+from utils.cache_compartida import espacio
+from utils.carga_diferida import diferido
+from utils.cliente_http import obtener_json
+
+pd = diferido("pandas")
+
+URL_PRONOSTICO = "https://api.open-meteo.com/v1/forecast"
+
+# Resolución de la malla (grados) y cada cuántas horas se publica una corrida
+RESOLUCION_GRADOS = 0.1
+HORAS_ENTRE_CORRIDAS = 1
+MAXIMO_MB = 8                # ≈ 2 KB por celda (168 horas)
+LOCKS_CELDA = 64
+
+_entradas = espacio("pronosticos", ttl=HORAS_ENTRE_CORRIDAS * 3600, maximo_mb=MAXIMO_MB)
+# Locks repartidos por hash de la celda: cantidad fija, sin importar cuántas celdas se consulten
+_locks_celda = [threading.Lock() for _ in range(LOCKS_CELDA)]
+
+
+def _reiniciar_tras_fork():
+    # Una descarga en curso en el padre dejaría su lock tomado en el hijo
+    global _locks_celda
+    _locks_celda = [threading.Lock() for _ in range(LOCKS_CELDA)]
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+
+def _redondear(valor):
+    return round(round(valor / RESOLUCION_GRADOS) * RESOLUCION_GRADOS, 4)
+
+
+def hora_emision(ahora=None):
+    """
+    Inicio (epoch UTC, en horas) de la corrida vigente
+    """
+    ahora = time.time() if ahora is None else ahora
+    horas = int(ahora // 3600)
+    return horas - horas % HORAS_ENTRE_CORRIDAS
+
+
+def _descargar(lat, lon):
+    data = obtener_json(URL_PRONOSTICO, params={
+        "latitude": lat,
+        "longitude": lon,
+        "hourly": "temperature_2m",
+    })
+    if "hourly" not in data:
+        return None
+
+    horas = np.array(data["hourly"]["time"], dtype="datetime64[m]")
+    temperaturas = np.array(
+        [np.nan if v is None else v for v in data["hourly"]["temperature_2m"]],
+        dtype=np.float32
+    )
+    return horas, temperaturas
+
+
+def pronostico_temperatura(lat, lon):
+    """
+    DataFrame con 'Hora' y 'Temperatura (°C)' para la celda que contiene (lat, lon)
+    Retorna None si Open-Meteo no devolvió datos horarios
+    """
+    emision = hora_emision()
+    clave = (_redondear(lat), _redondear(lon), emision)
+    lock_celda = _locks_celda[hash(clave[:2]) % LOCKS_CELDA]
+
+    # Un solo hilo del proceso descarga cada celda; los demás esperan y reutilizan el resultado
+    with lock_celda:
+        columnas = _entradas.obtener(clave)
+        if columnas is None:
+            columnas = _descargar(clave[0], clave[1])
+            if columnas is None:
+                return None
+            # Vence justo cuando se publica la corrida siguiente
+            ttl = (emision + HORAS_ENTRE_CORRIDAS) * 3600 - time.time()
+            _entradas.guardar(clave, columnas, ttl=max(1.0, ttl))
+
+    horas, temperaturas = columnas
+    return pd.DataFrame({
+        "Hora": horas,
+        "Temperatura (°C)": temperaturas,
+    })
+
+
+def estadisticas_cache():
+    return _entradas.estadisticas()
@@ -0,0 +1,97 @@
+"""
+Servidor HTTP local que imita disease.sh, Banco Mundial, Nominatim y
+Open-Meteo a partir de las respuestas grabadas (utils.grabaciones).
+
+Con HTTP_REDIRIGIR=http://127.0.0.1:8765 el cliente compartido envía
+https://disease.sh/v3/... como http://127.0.0.1:8765/disease.sh/v3/..., y
+este servidor responde con la grabación de la URL original. La latencia y
+la tasa de errores son configurables para pruebas de carga y perfiles.
+
+Uso:
+    python -m utils.servidor_simulado --puerto 8765 --latencia 0.15 --jitter 0.05 --tasa-error 0.02
+"""
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.grabaciones import RUTA_GRABACIONES, leer_grabacion
+
+
+class ManejadorSimulado(BaseHTTPRequestHandler):
+    # Valores por defecto; crear_servidor() los reemplaza en una subclase
+    ruta_grabaciones = RUTA_GRABACIONES
+    latencia = 0.0
+    jitter = 0.0
+    tasa_error = 0.0
+    latencia_por_host = {}
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, content_type, contenido):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(contenido)))
+        self.end_headers()
+        self.wfile.write(contenido)
+
+    def do_GET(self):
+        # /disease.sh/v3/covid-19/countries/Peru -> https://disease.sh/v3/covid-19/countries/Peru
+        url_original = "https://" + self.path.lstrip("/")
+        host = url_original.split("/")[2]
+
+        espera = self.latencia_por_host.get(host, self.latencia) + random.uniform(0, self.jitter)
+        if espera > 0:
+            time.sleep(espera)
+
+        if self.tasa_error and random.random() < self.tasa_error:
+            self._responder(503, "application/json", b'{"error": "error inyectado"}')
+            return
+
+        grabacion = leer_grabacion(url_original, self.ruta_grabaciones)
+        if grabacion is None:
+            cuerpo = json.dumps({"error": "sin grabación", "url": url_original}).encode("utf-8")
+            self._responder(404, "application/json", cuerpo)
+            return
+        self._responder(*grabacion)
+
+
+def crear_servidor(puerto=8765, ruta_grabaciones=None, latencia=0.0, jitter=0.0,
+                   tasa_error=0.0, latencia_por_host=None):
+    """
+    Crea (sin iniciar) el servidor simulado; usar serve_forever() o un hilo
+    """
+    manejador = type("Manejador", (ManejadorSimulado,), {
+        "ruta_grabaciones": ruta_grabaciones or RUTA_GRABACIONES,
+        "latencia": latencia,
+        "jitter": jitter,
+        "tasa_error": tasa_error,
+        "latencia_por_host": latencia_por_host or {},
+    })
+    return ThreadingHTTPServer(("127.0.0.1", puerto), manejador)
+
+
+def _leer_latencias(valores):
+    # ['disease.sh=0.3', 'api.open-meteo.com=0.1'] -> {'disease.sh': 0.3, ...}
+    return {host: float(segundos) for host, segundos in (v.split("=", 1) for v in valores)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor simulado de APIs externas")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--grabaciones", default=RUTA_GRABACIONES)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos fijos por respuesta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="segundos aleatorios adicionales (máximo)")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="fracción de respuestas 503")
+    parser.add_argument("--latencia-host", nargs="*", default=[], help="host=segundos")
+    args = parser.parse_args()
+
+    servidor = crear_servidor(
+        args.puerto, args.grabaciones, args.latencia, args.jitter,
+        args.tasa_error, _leer_latencias(args.latencia_host)
+    )
+    print(f"✅ Servidor simulado en http://127.0.0.1:{args.puerto} (grabaciones: {args.grabaciones})")
+    servidor.serve_forever()
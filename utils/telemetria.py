@@ -0,0 +1,240 @@
+"""
+Métricas por callback en formato Prometheus (ruta /metrics).
+
+instrumentar(app) envuelve cada callback registrado en app.callback_map y
+registra, por callback:
+    - duración total (reloj) y tiempo de CPU del hilo
+    - tiempo por fase: "serializacion" (el to_json de Dash) y, si el
+      callback no marca fases propias, "calculo" con todo el resto. Los que
+      marcan `with fase("red")`, `with fase("figura")`, etc. registran esas
+      fases y "otros" (lo que quede sin marcar)
+    - tamaño de la respuesta en bytes
+    - excepciones por tipo (PreventUpdate no cuenta como error)
+
+Cada medición son un par de lecturas de reloj y una actualización de
+contadores bajo un lock, del orden de microsegundos por llamada.
+
+Las métricas son por proceso: con varios workers, cada uno expone las suyas.
+Los callbacks con background=True se ejecutan en otro proceso; de ellos solo
+se mide el despacho y las consultas de avance.
+"""
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+from dash.exceptions import PreventUpdate
+
+ACTIVA = os.environ.get("TELEMETRIA", "1") != "0"
+
+LIMITES_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LIMITES_BYTES = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+_registro_actual = contextvars.ContextVar("registro_telemetria", default=None)
+_lock = threading.Lock()
+
+
+# ==========================================
+# HISTOGRAMAS Y CONTADORES
+# ==========================================
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_etiquetas(nombres, valores, extra=None):
+    pares = list(zip(nombres, valores)) + ([extra] if extra else [])
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, etiquetas, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = limites
+        self._series = {}     # valores de etiquetas -> [conteos por cubeta, suma, total]
+
+    def observar(self, valor, *etiquetas):
+        indice = bisect_left(self.limites, valor)
+        with _lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with _lock:
+            series = [(k, list(v[0]), v[1], v[2]) for k, v in self._series.items()]
+        for etiquetas, conteos, suma, total in sorted(series):
+            acumulado = 0
+            for limite, conteo in zip(list(self.limites) + ["+Inf"], conteos):
+                acumulado += conteo
+                texto = _formatear_etiquetas(self.etiquetas, etiquetas, ("le", limite))
+                lineas.append(f"{self.nombre}_bucket{texto} {acumulado}")
+            texto = _formatear_etiquetas(self.etiquetas, etiquetas)
+            lineas.append(f"{self.nombre}_sum{texto} {suma}")
+            lineas.append(f"{self.nombre}_count{texto} {total}")
+        return lineas
+
+
+class Contador:
+    def __init__(self, nombre, ayuda, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._series = {}
+
+    def incrementar(self, *etiquetas, cantidad=1):
+        with _lock:
+            self._series[etiquetas] = self._series.get(etiquetas, 0) + cantidad
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        with _lock:
+            series = sorted(self._series.items())
+        for etiquetas, valor in series:
+            lineas.append(f"{self.nombre}{_formatear_etiquetas(self.etiquetas, etiquetas)} {valor}")
+        return lineas
+
+
+DURACION = Histograma("dash_callback_duracion_segundos", "Duración total del callback",
+                      ("callback",), LIMITES_SEGUNDOS)
+CPU = Histograma("dash_callback_cpu_segundos", "Tiempo de CPU del hilo durante el callback",
+                 ("callback",), LIMITES_SEGUNDOS)
+FASES = Histograma("dash_callback_fase_segundos", "Tiempo por fase del callback",
+                   ("callback", "fase"), LIMITES_SEGUNDOS)
+BYTES = Histograma("dash_callback_respuesta_bytes", "Tamaño de la respuesta JSON",
+                   ("callback",), LIMITES_BYTES)
+ERRORES = Contador("dash_callback_errores_total", "Excepciones lanzadas por el callback",
+                   ("callback", "tipo"))
+
+METRICAS = [DURACION, CPU, FASES, BYTES, ERRORES]
+
+
+# ==========================================
+# FASES
+# ==========================================
+
+@contextmanager
+def fase(nombre):
+    """
+    Suma el tiempo del bloque a la fase 'nombre' del callback en curso
+    Fuera de un callback instrumentado no hace nada. Las fases no deben anidarse.
+    """
+    registro = _registro_actual.get()
+    if registro is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro[nombre] = registro.get(nombre, 0.0) + time.perf_counter() - inicio
+
+
+def _envolver_callback(funcion, nombre):
+    @wraps(funcion)
+    def envuelta(*args, **kwargs):
+        registro = {}
+        token = _registro_actual.set(registro)
+        inicio, inicio_cpu = time.perf_counter(), time.thread_time()
+        respuesta = None
+        try:
+            respuesta = funcion(*args, **kwargs)
+            return respuesta
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            ERRORES.incrementar(nombre, type(e).__name__)
+            raise
+        finally:
+            duracion = time.perf_counter() - inicio
+            _registro_actual.reset(token)
+            DURACION.observar(duracion, nombre)
+            CPU.observar(time.thread_time() - inicio_cpu, nombre)
+            for nombre_fase, segundos in registro.items():
+                FASES.observar(segundos, nombre, nombre_fase)
+            # Sin fases propias, el callback es cálculo salvo la serialización
+            resto = "otros" if set(registro) - {"serializacion"} else "calculo"
+            FASES.observar(max(duracion - sum(registro.values()), 0.0), nombre, resto)
+            if isinstance(respuesta, (str, bytes)):
+                BYTES.observar(len(respuesta), nombre)
+
+    envuelta._telemetria = True
+    return envuelta
+
+
+def _envolver_to_json():
+    # add_context de Dash serializa la respuesta con dash._callback.to_json
+    from dash import _callback
+
+    original = getattr(_callback, "to_json", None)
+    if original is None or getattr(original, "_telemetria", False):
+        return
+
+    @wraps(original)
+    def to_json(*args, **kwargs):
+        with fase("serializacion"):
+            return original(*args, **kwargs)
+
+    to_json._telemetria = True
+    _callback.to_json = to_json
+
+
+def nombre_callback(funcion):
+    original = getattr(funcion, "__wrapped__", funcion)
+    modulo = getattr(original, "__module__", "") or ""
+    return f"{modulo.rsplit('.', 1)[-1]}.{getattr(original, '__name__', 'callback')}"
+
+
+def envolver_callbacks(app):
+    """
+    Envuelve los callbacks de app.callback_map que aún no lo estén
+    """
+    for entrada in list(app.callback_map.values()):
+        funcion = entrada.get("callback")
+        if funcion is not None and not getattr(funcion, "_telemetria", False):
+            entrada["callback"] = _envolver_callback(funcion, nombre_callback(funcion))
+
+
+def exponer():
+    """
+    Todas las métricas en formato de texto de Prometheus
+    """
+    lineas = []
+    for metrica in METRICAS:
+        lineas.extend(metrica.exponer())
+    return "\n".join(lineas) + "\n"
+
+
+def instrumentar(app):
+    """
+    Activa la instrumentación de la app y registra la ruta /metrics
+    Dash copia los callbacks a app.callback_map en la primera petición, así que
+    se envuelven desde un before_request (solo trabaja cuando aparecen nuevos).
+    """
+    from flask import Response
+
+    if not ACTIVA:
+        return
+    _envolver_to_json()
+    envueltos = {"cantidad": -1}
+
+    @app.server.before_request
+    def _instrumentar_callbacks():
+        if len(app.callback_map) != envueltos["cantidad"]:
+            envolver_callbacks(app)
+            envueltos["cantidad"] = len(app.callback_map)
+
+    @app.server.route("/metrics")
+    def metricas():
+        return Response(exponer(), content_type="text/plain; version=0.0.4; charset=utf-8")
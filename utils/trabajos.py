@@ -0,0 +1,43 @@
+"""
+Administrador de callbacks en segundo plano (Dash background callbacks).
+
+Los callbacks pesados (simulaciones, ajustes con bootstrap) se declaran con
+background=True: Dash los ejecuta en un proceso aparte y el worker que
+recibió la petición queda libre; el navegador consulta el avance hasta que
+el resultado está listo. Los resultados quedan en una caché diskcache en
+disco, compartida por todos los workers, con la clave formada por los
+argumentos del callback y el código de la función.
+
+Requiere las dependencias de dash[diskcache] (diskcache, multiprocess, psutil).
+"""
+import os
+import uuid
+
+from dash import DiskcacheManager
+
+RUTA_TRABAJOS = os.environ.get(
+    "TRABAJOS_RUTA",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache", "trabajos")
+)
+
+# Segundos sin uso tras los cuales se descarta un resultado guardado
+EXPIRACION = 60 * 60
+
+# Un identificador por arranque: los resultados de una ejecución anterior de la
+# app no se reutilizan. Con preload_app de gunicorn se calcula una sola vez en
+# el maestro, así que todos los workers comparten la misma caché.
+ID_ARRANQUE = uuid.uuid4().hex
+
+
+def crear_administrador():
+    import diskcache
+
+    os.makedirs(RUTA_TRABAJOS, exist_ok=True)
+    return DiskcacheManager(
+        diskcache.Cache(RUTA_TRABAJOS),
+        cache_by=[lambda: ID_ARRANQUE],
+        expire=EXPIRACION,
+    )
+
+
+ADMINISTRADOR = crear_administrador()